@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from selexia_travel.models import Excursion, ExcursionImage, Booking, Review, Favorite, User, Country, City, Category
 from django.utils import timezone
+from selexia_travel.favorites import sync_max_operations
 
 
 class CountrySerializer(serializers.ModelSerializer):
@@ -143,39 +144,28 @@ class FavoriteSerializer(serializers.ModelSerializer):
 
 
 class FavoriteCreateSerializer(serializers.Serializer):
-    """Сериализатор для создания избранного"""
+    """Сериализатор для создания избранного (существование элемента проверяет сервис избранного)"""
     item_id = serializers.IntegerField(help_text="ID элемента")
     item_type = serializers.ChoiceField(
         choices=[('excursion', 'Экскурсия'), ('category', 'Категория'), ('country', 'Страна')],
         help_text="Тип элемента"
     )
+
+
+class FavoriteOperationSerializer(FavoriteCreateSerializer):
+    """Операция пакетной синхронизации избранного"""
+    op = serializers.ChoiceField(choices=[('add', 'Добавить'), ('remove', 'Удалить')], help_text="Операция")
+
+
+class FavoriteSyncSerializer(serializers.Serializer):
+    """Пакет операций избранного из SPA (в порядке кликов)"""
+    operations = FavoriteOperationSerializer(many=True, allow_empty=False)
     
-    def validate(self, data):
-        """Проверяет, что заполнено только одно поле"""
-        item_id = data.get('item_id')
-        item_type = data.get('item_type')
-        
-        if not item_id or not item_type:
-            raise serializers.ValidationError("Необходимо указать item_id и item_type")
-        
-        # Проверяем существование объекта
-        if item_type == 'excursion':
-            try:
-                Excursion.objects.get(id=item_id)
-            except Excursion.DoesNotExist:
-                raise serializers.ValidationError("Экскурсия не найдена")
-        elif item_type == 'category':
-            try:
-                Category.objects.get(id=item_id)
-            except Category.DoesNotExist:
-                raise serializers.ValidationError("Категория не найдена")
-        elif item_type == 'country':
-            try:
-                Country.objects.get(id=item_id)
-            except Country.DoesNotExist:
-                raise serializers.ValidationError("Страна не найдена")
-        
-        return data
+    def validate_operations(self, value):
+        limit = sync_max_operations()
+        if len(value) > limit:
+            raise serializers.ValidationError(f"Не больше {limit} операций за запрос")
+        return value
 
 
 class BookingSerializer(serializers.ModelSerializer):
@@ -13,6 +13,14 @@ router.register(r'categories', views.CategoryViewSet, basename='category')
 
 # Дополнительные URL для специальных эндпоинтов
 urlpatterns = [
+    # Асинхронные списки каталога - раньше роутера, иначе эти пути перехватывают list у viewset'ов.
+    # Поиск и фильтры по экскурсиям (viewset) - /api/search/, статистика viewset'а - /api/excursions/stats/
+    path('excursions/', views.api_excursions, name='api_excursions'),
+    path('countries/', views.api_countries, name='api_countries'),
+    path('categories/', views.api_categories, name='api_categories'),
+    path('cities/', views.api_cities, name='api_cities'),
+    path('stats/', views.api_stats, name='api_stats'),
+    
     # Основные API эндпоинты через роутер
     path('', include(router.urls)),
     
@@ -20,7 +28,6 @@ urlpatterns = [
     path('search/', views.ExcursionViewSet.as_view({'get': 'list'}), name='api-search'),
     path('popular/', views.ExcursionViewSet.as_view({'get': 'popular'}), name='api-popular'),
     path('featured/', views.ExcursionViewSet.as_view({'get': 'featured'}), name='api-featured'),
-    path('stats/', views.ExcursionViewSet.as_view({'get': 'stats'}), name='api-stats'),
     
     # Избранное - убираем, так как используем отдельные функции
     
@@ -37,16 +44,17 @@ urlpatterns = [
     path('categories/featured/', views.CategoryViewSet.as_view({'get': 'featured'}), name='api-categories-featured'),
     
     # Новые API endpoints для соответствия основному urls.py
-    path('excursions/', views.api_excursions, name='api_excursions'),
-    path('countries/', views.api_countries, name='api_countries'),
-    path('categories/', views.api_categories, name='api_categories'),
-    path('cities/', views.api_cities, name='api_cities'),
     path('cities-home/', views.api_cities_for_home, name='api_cities_home'),
+    path('bootstrap/', views.api_bootstrap, name='api_bootstrap'),
+    path('geo/nearby/', views.api_geo_nearby, name='api_geo_nearby'),
+    path('geo/clusters/', views.api_geo_clusters, name='api_geo_clusters'),
     path('favorites/toggle/', views.api_favorites_toggle, name='api_favorites_toggle'),
+    path('favorites/sync/', views.api_favorites_sync, name='api_favorites_sync'),
     path('favorites/', views.api_favorites, name='api_favorites'),
     path('reviews/', views.api_reviews, name='api_reviews'),
+    path('excursions/<int:excursion_id>/reviews/', views.api_excursion_reviews, name='api_excursion_reviews'),
+    path('moderation/reviews/', views.api_reviews_moderate, name='api_reviews_moderate'),
     path('contact/', views.api_contact, name='api_contact'),
-    path('stats/', views.api_stats, name='api_stats'),
     
     # API для форм
     path('application/submit/', views.submit_application, name='submit_application'),
@@ -85,7 +93,7 @@ def api_root(request, format=None):
             'categories': reverse('category-list', request=request, format=format),
         },
         'documentation': {
-            'search': 'GET /api/excursions/?search=query&country=slug&city=slug&category=slug&price_min=100&price_max=1000&rating=4&sort=popular',
+            'search': 'GET /api/search/?search=query&country=slug&city=slug&category=slug&price_min=100&price_max=1000&rating=4&sort=popular',
             'favorites': 'POST /api/favorites/ {"item_id": 1, "item_type": "excursion"}',
             'bookings': 'POST /api/bookings/ {"excursion": 1, "date": "2024-01-01", "people_count": 2, "contact_phone": "+1234567890", "contact_email": "user@example.com"}',
         }
@@ -4,16 +4,36 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
 from rest_framework.pagination import PageNumberPagination
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q, Count, Avg
+from django.db.models import Q, Count, Avg, F
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
-
-from selexia_travel.models import Excursion, Booking, Review, Favorite, Country, City, Category, Application
+from django.http import JsonResponse, HttpResponse, HttpResponseNotAllowed, HttpResponseNotModified, Http404
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from functools import wraps
+import hashlib
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
+from rest_framework.permissions import AllowAny, IsAdminUser
+
+from selexia_travel.models import (
+    Excursion, ExcursionImage, Booking, Review, Favorite, Country, City, Category, Application
+)
+from selexia_travel.caching import conditional_catalog, ConditionalCatalogMixin
+from selexia_travel.reference_data import (
+    get_reference_snapshot, get_reference_snapshot_version, parse_known_digests, encode_body
+)
+from selexia_travel.moderation import moderate_reviews, MODERATION_ACTIONS
+from selexia_travel.review_feed import get_review_page
+from selexia_travel.excursion_detail import get_excursion_bundle
+from selexia_travel.rate_limiting import rate_limit, scoped_throttle
+from selexia_travel.favorites import toggle_favorite, sync_favorites
 from .serializers import (
     ExcursionListSerializer, ExcursionDetailSerializer, ReviewSerializer,
-    FavoriteSerializer, FavoriteCreateSerializer, BookingSerializer, BookingCreateSerializer,
+    FavoriteSerializer, FavoriteCreateSerializer, FavoriteSyncSerializer, BookingSerializer, BookingCreateSerializer,
     SearchFilterSerializer, CountrySerializer, CitySerializer, CategorySerializer
 )
 
@@ -25,18 +45,20 @@ class StandardResultsSetPagination(PageNumberPagination):
     max_page_size = 100
 
 
-class ExcursionViewSet(viewsets.ReadOnlyModelViewSet):
+class ExcursionViewSet(ConditionalCatalogMixin, viewsets.ReadOnlyModelViewSet):
     """API для экскурсий"""
+    catalog_models = (Excursion, ExcursionImage, Country, City, Category)
+    catalog_actions = ('list', 'retrieve', 'popular', 'featured')
     queryset = Excursion.objects.filter(status='published').select_related(
         'country', 'city', 'category'
-    ).prefetch_related('images').order_by('-is_popular', '-rating', '-views_count')
+    ).prefetch_related('images').order_by('-popularity_score')
     permission_classes = [IsAuthenticatedOrReadOnly]
     pagination_class = StandardResultsSetPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['country__slug', 'city__slug', 'category__slug', 'is_popular', 'is_featured']
     search_fields = ['title_ru', 'title_en', 'description_ru', 'description_en', 'city__name_ru', 'country__name_ru']
-    ordering_fields = ['price', 'rating', 'created_at', 'views_count']
-    ordering = ['-is_popular', '-rating', '-views_count']
+    ordering_fields = ['price', 'rating', 'created_at', 'views_count', 'popularity_score']
+    ordering = ['-popularity_score']
     
     def get_serializer_class(self):
         """Выбирает сериализатор в зависимости от действия"""
@@ -71,15 +93,15 @@ class ExcursionViewSet(viewsets.ReadOnlyModelViewSet):
         
         # Фильтр по стране
         if country:
-            queryset = queryset.filter(country__slug=country)
+            queryset = queryset.in_section(country=country)
         
         # Фильтр по городу
         if city:
-            queryset = queryset.filter(city__slug=city)
+            queryset = queryset.in_section(city=city)
         
         # Фильтр по категории
         if category:
-            queryset = queryset.filter(category__slug=category)
+            queryset = queryset.in_section(category=category)
         
         # Фильтр по цене
         if price_min:
@@ -93,7 +115,7 @@ class ExcursionViewSet(viewsets.ReadOnlyModelViewSet):
         
         # Сортировка
         if sort == 'popular':
-            queryset = queryset.order_by('-is_popular', '-views_count', '-rating')
+            queryset = queryset.order_by('-popularity_score')
         elif sort == 'price_asc':
             queryset = queryset.order_by('price')
         elif sort == 'price_desc':
@@ -105,18 +127,26 @@ class ExcursionViewSet(viewsets.ReadOnlyModelViewSet):
         
         return queryset
     
+    def before_conditional(self, request, action, *args, **kwargs):
+        """Просмотр считается до проверки ETag: повторный просмотр с 304 тоже учитывается"""
+        if action != 'retrieve' or request.method != 'GET':
+            return
+        try:
+            pk = int(kwargs['pk'])
+        except (KeyError, ValueError):
+            return
+        # Атомарный UPDATE без сдвига версии каталога (views_count не входит в ETag)
+        Excursion.objects.filter(pk=pk, status='published').update(views_count=F('views_count') + 1)
+
     def retrieve(self, request, *args, **kwargs):
-        """Получение детальной информации об экскурсии с увеличением счетчика просмотров"""
-        instance = self.get_object()
-        
-        # Увеличиваем счетчик просмотров
-        instance.views_count += 1
-        
-        # Автоматически определяем популярность
-        if instance.views_count >= 100:
-            instance.is_popular = True
-        
-        instance.save(update_fields=['views_count', 'is_popular'])
+        """Получение детальной информации об экскурсии (просмотр учтен в before_conditional)"""
+        # Экскурсия с географией и изображениями - из общего пакета детальной страницы
+        try:
+            bundle = get_excursion_bundle(request.LANGUAGE_CODE, pk=int(kwargs['pk']))
+        except (Excursion.DoesNotExist, ValueError):
+            raise Http404('Экскурсия не найдена')
+        instance = bundle['excursion']
+        self.check_object_permissions(request, instance)
         
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
@@ -124,7 +154,7 @@ class ExcursionViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=False, methods=['get'])
     def popular(self, request):
         """Популярные экскурсии"""
-        popular_excursions = self.get_queryset().filter(is_popular=True)[:6]
+        popular_excursions = self.get_queryset().order_by('-popularity_score')[:6]
         serializer = self.get_serializer(popular_excursions, many=True)
         return Response(serializer.data)
     
@@ -172,68 +202,20 @@ class FavoriteViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        item_id = serializer.validated_data['item_id']
         item_type = serializer.validated_data['item_type']
-        
-        # Проверяем, есть ли уже в избранном
-        if item_type == 'excursion':
-            existing_favorite = Favorite.objects.filter(
-                user=request.user,
-                excursion_id=item_id
-            ).first()
-        elif item_type == 'category':
-            existing_favorite = Favorite.objects.filter(
-                user=request.user,
-                category_id=item_id
-            ).first()
-        elif item_type == 'country':
-            existing_favorite = Favorite.objects.filter(
-                user=request.user,
-                country_id=item_id
-            ).first()
-        else:
+        try:
+            is_favorite = toggle_favorite(request.user, item_type, serializer.validated_data['item_id'])
+        except ObjectDoesNotExist:
             return Response({
                 'success': False,
-                'error': 'Неизвестный тип элемента'
+                'error': 'Элемент не найден'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        if existing_favorite:
-            # Удаляем из избранного
-            existing_favorite.delete()
-            return Response({
-                'success': True,
-                'is_favorite': False,
-                'message': 'Убрано из избранного'
-            })
-        else:
-            # Добавляем в избранное
-            if item_type == 'excursion':
-                excursion = get_object_or_404(Excursion, id=item_id)
-                favorite = Favorite.objects.create(
-                    user=request.user,
-                    item_type=item_type,
-                    excursion=excursion
-                )
-            elif item_type == 'category':
-                category = get_object_or_404(Category, id=item_id)
-                favorite = Favorite.objects.create(
-                    user=request.user,
-                    item_type=item_type,
-                    category=category
-                )
-            elif item_type == 'country':
-                country = get_object_or_404(Country, id=item_id)
-                favorite = Favorite.objects.create(
-                    user=request.user,
-                    item_type=item_type,
-                    country=country
-                )
-            
-            return Response({
-                'success': True,
-                'is_favorite': True,
-                'message': 'Добавлено в избранное'
-            })
+        return Response({
+            'success': True,
+            'is_favorite': is_favorite,
+            'message': 'Добавлено в избранное' if is_favorite else 'Убрано из избранного'
+        })
     
     @action(detail=False, methods=['get'])
     def count(self, request):
@@ -330,19 +312,22 @@ class ReviewViewSet(viewsets.ReadOnlyModelViewSet):
     
     @action(detail=False, methods=['get'])
     def by_excursion(self, request):
-        """Получение отзывов по экскурсии"""
+        """Получение отзывов по экскурсии (курсорная лента: ?cursor=)"""
         excursion_id = request.query_params.get('excursion_id')
-        if not excursion_id:
+        if not excursion_id or not excursion_id.isdigit():
             return Response({'error': 'Необходимо указать excursion_id'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
-        reviews = self.get_queryset().filter(excursion_id=excursion_id)
-        serializer = self.get_serializer(reviews, many=True)
-        return Response(serializer.data)
+        try:
+            page = get_review_page(int(excursion_id), request.query_params.get('cursor'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(page)
 
 
-class CountryViewSet(viewsets.ReadOnlyModelViewSet):
+class CountryViewSet(ConditionalCatalogMixin, viewsets.ReadOnlyModelViewSet):
     """API для стран (только чтение)"""
+    catalog_models = (Country,)
     queryset = Country.objects.all().order_by('name_ru')
     serializer_class = CountrySerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
@@ -358,8 +343,9 @@ class CountryViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(serializer.data)
 
 
-class CityViewSet(viewsets.ReadOnlyModelViewSet):
+class CityViewSet(ConditionalCatalogMixin, viewsets.ReadOnlyModelViewSet):
     """API для городов (только чтение)"""
+    catalog_models = (City, Country)
     queryset = City.objects.select_related('country').order_by('name_ru')
     serializer_class = CitySerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
@@ -381,8 +367,9 @@ class CityViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(serializer.data)
 
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class CategoryViewSet(ConditionalCatalogMixin, viewsets.ReadOnlyModelViewSet):
     """API для категорий (только чтение)"""
+    catalog_models = (Category,)
     queryset = Category.objects.all().order_by('name_ru')
     serializer_class = CategorySerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
@@ -398,151 +385,351 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(serializer.data)
 
 # Дополнительные API views для соответствия новым URL-паттернам
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def api_excursions(request):
+CATALOG_CACHE_TIMEOUT = 60 * 5  # 5 минут
+
+
+def _localized(obj, field, language):
+    """Возвращает значение поля на языке запроса"""
+    return getattr(obj, f'{field}_ru' if language == 'ru' else f'{field}_en')
+
+
+def async_get_view(view_func):
+    """Декоратор для асинхронных read-only эндпоинтов (пропускает только GET/HEAD)"""
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return HttpResponseNotAllowed(['GET', 'HEAD'])
+        return await view_func(request, *args, **kwargs)
+    return wrapper
+
+
+async def _cached_json(request, cache_key, build):
+    """
+    Отдает JSON из кэша, при промахе собирает данные через build() и кэширует их.
+    Ключ включает ETag версии каталога, поэтому изменения данных сразу дают промах.
+    """
+    cache_key = f"{cache_key}:{getattr(request, 'catalog_etag', '')}"
+    data = await cache.aget(cache_key)
+    if data is None:
+        data = await build()
+        await cache.aset(cache_key, data, CATALOG_CACHE_TIMEOUT)
+    return JsonResponse(data, safe=False)
+
+
+# Дополнительные API views для соответствия новым URL-паттернам.
+# Read-only эндпоинты каталога асинхронные: под ASGI (uvicorn) медленные
+# клиенты не занимают воркер на время отдачи ответа.
+@async_get_view
+@conditional_catalog(Excursion, ExcursionImage, Country, City, Category)
+async def api_excursions(request):
     """API для получения списка экскурсий (для AJAX)"""
-    excursions = Excursion.objects.filter(status='published').select_related(
-        'country', 'city', 'category'
-    ).prefetch_related('images')[:20]
-    
-    data = []
-    for excursion in excursions:
-        data.append({
-            'id': excursion.id,
-            'title': excursion.title_ru if request.LANGUAGE_CODE == 'ru' else excursion.title_en,
-            'slug': excursion.slug,
-            'price': excursion.price,
-            'rating': excursion.rating,
-            'reviews_count': excursion.reviews_count,
-            'image': excursion.images.first().image.url if excursion.images.exists() else None,
-            'country': excursion.country.name_ru if request.LANGUAGE_CODE == 'ru' else excursion.country.name_en,
-            'city': excursion.city.name_ru if request.LANGUAGE_CODE == 'ru' else excursion.city.name_en,
-            'category': excursion.category.name_ru if request.LANGUAGE_CODE == 'ru' else excursion.category.name_en,
-        })
-    
-    return Response(data)
+    language = request.LANGUAGE_CODE
 
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def api_countries(request):
-    """API для получения списка стран (для AJAX)"""
-    countries = Country.objects.all()
-    data = []
-    for country in countries:
-        data.append({
-            'id': country.id,
-            'name': country.name_ru if request.LANGUAGE_CODE == 'ru' else country.name_en,
-            'slug': country.slug,
-            'image': country.image.url if country.image else None,
-            'cities_count': country.cities.count(),
-        })
-    
-    return Response(data)
+    async def build():
+        excursions = Excursion.objects.filter(status='published').localized(
+            language, 'title', related=('country', 'city', 'category')
+        ).prefetch_related('images').order_by('-popularity_score')[:20]
 
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def api_categories(request):
+        data = []
+        async for excursion in excursions:
+            images = excursion.images.all()
+            data.append({
+                'id': excursion.id,
+                'title': excursion.title,
+                'slug': excursion.slug,
+                'price': float(excursion.price),
+                'rating': float(excursion.rating),
+                'reviews_count': excursion.reviews_count,
+                'image': images[0].image.url if images else None,
+                'country': excursion.country_name,
+                'city': excursion.city_name,
+                'category': excursion.category_name,
+            })
+        return data
+
+    return await _cached_json(request, f'api:excursions:{language}', build)
+
+@async_get_view
+@conditional_catalog(Country, City)
+async def api_countries(request):
+    """API для получения списка стран (для AJAX)"""
+    language = request.LANGUAGE_CODE
+
+    async def build():
+        countries = Country.objects.annotate(cities_total=Count('cities'))
+        return [
+            {
+                'id': country.id,
+                'name': _localized(country, 'name', language),
+                'slug': country.slug,
+                'image': country.image.url if country.image else None,
+                'cities_count': country.cities_total,
+            }
+            async for country in countries
+        ]
+
+    return await _cached_json(request, f'api:countries:{language}', build)
+
+@async_get_view
+@conditional_catalog(Category, Excursion)
+async def api_categories(request):
     """API для получения списка категорий (для AJAX)"""
-    categories = Category.objects.all()
-    data = []
-    for category in categories:
-        data.append({
-            'id': category.id,
-            'name': category.name_ru if request.LANGUAGE_CODE == 'ru' else category.name_en,
-            'slug': category.slug,
-            'image': category.image.url if category.image else None,
-            'excursions_count': category.excursions.filter(status='published').count(),
-        })
-    
-    return Response(data)
+    language = request.LANGUAGE_CODE
 
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def api_cities(request):
+    async def build():
+        categories = Category.objects.annotate(
+            published_total=Count('excursions', filter=Q(excursions__status='published'))
+        )
+        return [
+            {
+                'id': category.id,
+                'name': _localized(category, 'name', language),
+                'slug': category.slug,
+                'image': category.image.url if category.image else None,
+                'excursions_count': category.published_total,
+            }
+            async for category in categories
+        ]
+
+    return await _cached_json(request, f'api:categories:{language}', build)
+
+@async_get_view
+@conditional_catalog(City, Country, Excursion)
+async def api_cities(request):
     """API для получения списка городов (для AJAX)"""
-    cities = City.objects.all()
-    data = []
-    for city in cities:
-        data.append({
-            'id': city.id,
-            'name': city.name_ru if request.LANGUAGE_CODE == 'ru' else city.name_en,
-            'slug': city.slug,
-            'country': city.country.name_ru if request.LANGUAGE_CODE == 'ru' else city.country.name_en,
-            'excursions_count': city.excursions.filter(status='published').count(),
-        })
-    
-    return Response(data)
+    language = request.LANGUAGE_CODE
 
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def api_cities_for_home(request):
+    async def build():
+        cities = City.objects.select_related('country').annotate(
+            published_total=Count('excursions', filter=Q(excursions__status='published'))
+        )
+        return [
+            {
+                'id': city.id,
+                'name': _localized(city, 'name', language),
+                'slug': city.slug,
+                'country': _localized(city.country, 'name', language),
+                'excursions_count': city.published_total,
+            }
+            async for city in cities
+        ]
+
+    return await _cached_json(request, f'api:cities:{language}', build)
+
+@async_get_view
+@conditional_catalog(City, Country)
+async def api_cities_for_home(request):
     """API для получения городов для главной страницы"""
-    cities = City.objects.filter(is_popular=True)[:8]
-    data = []
-    for city in cities:
-        data.append({
-            'id': city.id,
-            'name': city.name_ru if request.LANGUAGE_CODE == 'ru' else city.name_en,
-            'slug': city.slug,
-            'country': city.country.name_ru if request.LANGUAGE_CODE == 'ru' else city.country.name_en,
-            'image': city.image.url if city.image else None,
-        })
-    
-    return Response(data)
+    language = request.LANGUAGE_CODE
+
+    async def build():
+        cities = City.objects.filter(is_popular=True).select_related('country')[:8]
+        return [
+            {
+                'id': city.id,
+                'name': _localized(city, 'name', language),
+                'slug': city.slug,
+                'country': _localized(city.country, 'name', language),
+                'image': city.image.url if city.image else None,
+            }
+            async for city in cities
+        ]
+
+    return await _cached_json(request, f'api:cities_home:{language}', build)
+
+@async_get_view
+async def api_bootstrap(request):
+    """
+    Снимок справочника (страны, города, категории) одним запросом для старта SPA.
+
+    ?v=<version> - неизменяемый снимок конкретной версии (кэшируется навсегда);
+    ?known=<slug>:<digest>,... - не присылать списки городов, которые у клиента актуальны.
+    """
+    language = request.LANGUAGE_CODE
+    version = request.GET.get('v')
+    if version:
+        snapshot = await sync_to_async(get_reference_snapshot_version)(language, version)
+        if snapshot is None:
+            return JsonResponse({'error': 'Unknown snapshot version'}, status=404)
+    else:
+        snapshot = await sync_to_async(get_reference_snapshot)(language)
+
+    accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    known = parse_known_digests(request.GET.get('known'))
+    if known:
+        body, encoding = encode_body(snapshot.delta_body(known), accept_encoding)
+        etag = '"%s-%s"' % (snapshot.version, hashlib.sha1(body).hexdigest()[:8])
+    else:
+        body, encoding = snapshot.encoded(accept_encoding)
+        etag = '"%s%s"' % (snapshot.version, f'-{encoding}' if encoding else '')
+
+    if etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='application/json; charset=utf-8')
+        if encoding:
+            response['Content-Encoding'] = encoding
+
+    response['ETag'] = etag
+    if version:
+        patch_cache_control(response, public=True, max_age=60 * 60 * 24 * 365, immutable=True)
+    else:
+        patch_cache_control(response, public=True, **settings.CATALOG_CACHE_CONTROL)
+    patch_vary_headers(response, ['Accept-Encoding', 'Accept-Language'])
+    return response
+
+def _parse_coordinate(value, name, limit):
+    """Разбирает широту/долготу из query-параметра; ValueError с понятным текстом"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be a number')
+    if not -limit <= number <= limit:
+        raise ValueError(f'{name} must be between {-limit} and {limit}')
+    return number
+
+
+def _parse_bbox(value):
+    """bbox=south,west,north,east -> кортеж float"""
+    parts = value.split(',')
+    if len(parts) != 4:
+        raise ValueError('bbox must be south,west,north,east')
+    south, north = (_parse_coordinate(parts[i], 'bbox latitude', 90) for i in (0, 2))
+    west, east = (_parse_coordinate(parts[i], 'bbox longitude', 180) for i in (1, 3))
+    if south > north:
+        raise ValueError('bbox south must not exceed north')
+    return south, west, north, east
+
+
+def _bounded_int(value, default, minimum, maximum):
+    try:
+        return min(max(int(value), minimum), maximum) if value is not None else default
+    except (TypeError, ValueError):
+        return default
+
+
+@async_get_view
+@conditional_catalog(Excursion, ExcursionImage, Country, City)
+async def api_geo_nearby(request):
+    """
+    Экскурсии рядом с точкой или в прямоугольнике карты, по возрастанию расстояния.
+
+    ?lat=&lon=&radius=<км> - в радиусе от точки;
+    ?bbox=south,west,north,east[&lat=&lon=] - в прямоугольнике (расстояние от точки или центра);
+    ?limit= - максимум экскурсий.
+    """
+    try:
+        bbox = _parse_bbox(request.GET['bbox']) if request.GET.get('bbox') else None
+        has_point = request.GET.get('lat') is not None or request.GET.get('lon') is not None
+        if bbox is None or has_point:
+            lat = _parse_coordinate(request.GET.get('lat'), 'lat', 90)
+            lon = _parse_coordinate(request.GET.get('lon'), 'lon', 180)
+        radius = float(request.GET.get('radius', settings.GEO_NEARBY_DEFAULT_RADIUS_KM))
+        if not 0 < radius <= settings.GEO_NEARBY_MAX_RADIUS_KM:
+            raise ValueError(f'radius must be between 0 and {settings.GEO_NEARBY_MAX_RADIUS_KM} km')
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    limit = _bounded_int(request.GET.get('limit'), 20, 1, settings.GEO_NEARBY_MAX_LIMIT)
+    language = request.LANGUAGE_CODE
+
+    def build():
+        # Гео-индекс на numpy: загружается воркером при первом гео-запросе, а не при старте
+        from selexia_travel.geo import get_city_geo_index, nearby_excursions
+
+        index = get_city_geo_index()
+        if bbox is not None:
+            cities = index.within_bbox(*bbox, center=(lat, lon) if has_point else None)
+        else:
+            cities = index.within_radius(lat, lon, radius)
+        excursions = nearby_excursions(cities, language, limit)
+        return [
+            {
+                'id': excursion.id,
+                'title': excursion.title,
+                'slug': excursion.slug,
+                'price': float(excursion.price),
+                'currency': excursion.currency,
+                'rating': float(excursion.rating),
+                'image': default_storage.url(excursion.main_image_path) if excursion.main_image_path else None,
+                'city': excursion.city_name,
+                'country': excursion.country_name,
+                'distance_km': excursion.distance_km,
+            }
+            for excursion in excursions
+        ]
+
+    results = await sync_to_async(build)()
+    return JsonResponse({'count': len(results), 'results': results})
+
+
+@async_get_view
+@conditional_catalog(Excursion, City)
+async def api_geo_clusters(request):
+    """
+    Кластеры экскурсий для карты: ?zoom=<0-20>[&bbox=south,west,north,east].
+    Считаются по гео-индексу городов без запросов к экскурсиям.
+    """
+    try:
+        bbox = _parse_bbox(request.GET['bbox']) if request.GET.get('bbox') else None
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    zoom = _bounded_int(request.GET.get('zoom'), 3, 0, 20)
+
+    from selexia_travel.geo import get_city_geo_index
+
+    index = await sync_to_async(get_city_geo_index)()
+    return JsonResponse({'zoom': zoom, 'clusters': index.clusters(zoom, bbox)})
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@throttle_classes([scoped_throttle('favorites')])
 def api_favorites_toggle(request):
-    """API для переключения избранного"""
-    item_id = request.data.get('item_id')
-    item_type = request.data.get('item_type', 'excursion')
-    
-    if not item_id:
-        return Response({'error': 'item_id required'}, status=status.HTTP_400_BAD_REQUEST)
+    """API для переключения избранного (item_type по умолчанию - excursion)"""
+    data = request.data.copy()
+    data.setdefault('item_type', 'excursion')
+    serializer = FavoriteCreateSerializer(data=data)
+    serializer.is_valid(raise_exception=True)
     
     try:
-        if item_type == 'excursion':
-            item = get_object_or_404(Excursion, id=item_id, status='published')
-            # Проверяем, есть ли уже в избранном
-            existing_favorite = Favorite.objects.filter(user=request.user, excursion=item).first()
-            if existing_favorite:
-                existing_favorite.delete()
-                is_favorite = False
-            else:
-                Favorite.objects.create(user=request.user, excursion=item, item_type='excursion')
-                is_favorite = True
-        elif item_type == 'category':
-            item = get_object_or_404(Category, id=item_id)
-            existing_favorite = Favorite.objects.filter(user=request.user, category=item).first()
-            if existing_favorite:
-                existing_favorite.delete()
-                is_favorite = False
-            else:
-                Favorite.objects.create(user=request.user, category=item, item_type='category')
-                is_favorite = True
-        elif item_type == 'country':
-            item = get_object_or_404(Country, id=item_id)
-            existing_favorite = Favorite.objects.filter(user=request.user, country=item).first()
-            if existing_favorite:
-                existing_favorite.delete()
-                is_favorite = False
-            else:
-                Favorite.objects.create(user=request.user, country=item, item_type='country')
-                is_favorite = True
-        else:
-            return Response({'error': 'Неизвестный тип элемента'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        favorites_count = request.user.favorites.count()
-        
+        is_favorite = toggle_favorite(
+            request.user, serializer.validated_data['item_type'], serializer.validated_data['item_id']
+        )
+    except ObjectDoesNotExist:
         return Response({
-            'success': True,
-            'is_favorite': is_favorite,
-            'favorites_count': favorites_count
-        })
-        
-    except Exception as e:
-        return Response({'success': False, 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            'success': False,
+            'error': 'Элемент не найден'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'success': True,
+        'is_favorite': is_favorite,
+        'favorites_count': request.user.favorites.count()
+    })
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@throttle_classes([scoped_throttle('favorites')])
+def api_favorites_sync(request):
+    """
+    Пакетная синхронизация избранного: {"operations": [{"op": "add" | "remove",
+    "item_type": "excursion", "item_id": 1}, ...]} применяется одной транзакцией
+    """
+    serializer = FavoriteSyncSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    
+    result = sync_favorites(request.user, serializer.validated_data['operations'])
+    
+    def items(pairs):
+        return [{'item_type': item_type, 'item_id': item_id} for item_type, item_id in pairs]
+    
+    return Response({
+        'success': True,
+        'added': items(result['added']),
+        'removed': items(result['removed']),
+        'rejected': items(result['rejected']),
+        'favorites_count': request.user.favorites.count()
+    })
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -583,12 +770,17 @@ def api_favorites(request):
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def api_reviews(request):
-    """API для получения отзывов"""
+    """API для получения отзывов: с excursion_id - курсорная лента экскурсии, иначе последние 10"""
     excursion_id = request.GET.get('excursion_id')
     if excursion_id:
-        reviews = Review.objects.filter(excursion_id=excursion_id, is_approved=True)
-    else:
-        reviews = Review.objects.filter(is_approved=True)[:10]
+        if not excursion_id.isdigit():
+            return Response({'error': 'excursion_id must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            return Response(get_review_page(int(excursion_id), request.GET.get('cursor')))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    reviews = Review.objects.filter(is_approved=True).select_related('user', 'excursion')[:10]
     
     data = []
     for review in reviews:
@@ -603,28 +795,74 @@ def api_reviews(request):
     
     return Response(data)
 
+@async_get_view
+async def api_excursion_reviews(request, excursion_id):
+    """
+    Лента одобренных отзывов экскурсии, от новых к старым.
+    ?cursor= - продолжение с next_cursor предыдущей страницы; ?page_size= - размер страницы.
+    """
+    page_size = _bounded_int(request.GET.get('page_size'), None, 1, 50)
+    try:
+        page = await sync_to_async(get_review_page)(excursion_id, request.GET.get('cursor'), page_size)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse(page)
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def api_reviews_moderate(request):
+    """API для массовой модерации отзывов (только для персонала)"""
+    action_name = request.data.get('action')
+    review_ids = request.data.get('ids') or []
+    
+    if action_name not in MODERATION_ACTIONS:
+        return Response({
+            'success': False,
+            'error': f'action должен быть одним из: {", ".join(MODERATION_ACTIONS)}'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    if not isinstance(review_ids, list) or not review_ids:
+        return Response({'success': False, 'error': 'ids required'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        review_ids = [int(review_id) for review_id in review_ids]
+    except (TypeError, ValueError):
+        return Response({'success': False, 'error': 'ids должны быть целыми числами'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    count = moderate_reviews(Review.objects.filter(id__in=review_ids), action_name)
+    
+    return Response({
+        'success': True,
+        'action': action_name,
+        'count': count
+    })
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([scoped_throttle('contact')])
 def api_contact(request):
     """API для отправки контактной формы"""
     # Здесь должна быть логика обработки контактной формы
     return Response({'status': 'success', 'message': 'Message sent successfully'})
 
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def api_stats(request):
+@async_get_view
+@conditional_catalog(Excursion, Country, City, Review, Booking)
+async def api_stats(request):
     """API для получения статистики"""
-    stats = {
-        'excursions_count': Excursion.objects.filter(status='published').count(),
-        'countries_count': Country.objects.count(),
-        'cities_count': City.objects.count(),
-        'reviews_count': Review.objects.filter(is_approved=True).count(),
-        'total_bookings': Booking.objects.count(),
-    }
-    return Response(stats)
+    async def build():
+        return {
+            'excursions_count': await Excursion.objects.filter(status='published').acount(),
+            'countries_count': await Country.objects.acount(),
+            'cities_count': await City.objects.acount(),
+            'reviews_count': await Review.objects.filter(is_approved=True).acount(),
+            'total_bookings': await Booking.objects.acount(),
+        }
+
+    return await _cached_json(request, 'api:stats', build)
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([scoped_throttle('application')])
 def submit_application(request):
     """API для отправки заявки"""
     # Здесь должна быть логика обработки заявки
@@ -632,6 +870,7 @@ def submit_application(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([scoped_throttle('booking')])
 def submit_booking(request):
     """API для отправки бронирования"""
     # Здесь должна быть логика обработки бронирования
@@ -644,29 +883,31 @@ def submit_review(request):
     # Здесь должна быть логика обработки отзыва
     return Response({'status': 'success', 'message': 'Review submitted successfully'})
 
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def search_autocomplete(request):
+@async_get_view
+@rate_limit('search_autocomplete')
+async def search_autocomplete(request):
     """API для автодополнения поиска"""
     query = request.GET.get('q', '')
     if len(query) < 2:
-        return Response([])
-    
+        return JsonResponse([], safe=False)
+
+    language = request.LANGUAGE_CODE
     excursions = Excursion.objects.filter(
         Q(title_ru__icontains=query) | Q(title_en__icontains=query),
         status='published'
-    )[:5]
-    
-    data = []
-    for excursion in excursions:
-        data.append({
+    ).localized(language, 'title').only('id', 'slug')[:5]
+
+    data = [
+        {
             'id': excursion.id,
-            'title': excursion.title_ru if request.LANGUAGE_CODE == 'ru' else excursion.title_en,
+            'title': excursion.title,
             'slug': excursion.slug,
             'type': 'excursion'
-        })
-    
-    return Response(data)
+        }
+        async for excursion in excursions
+    ]
+
+    return JsonResponse(data, safe=False)
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
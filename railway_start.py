@@ -1,113 +1,212 @@
 #!/usr/bin/env python3
 """
 Скрипт для запуска Django приложения на Railway
-Включает проверки окружения и обработку ошибок
+Включает проверки окружения и обработку ошибок.
+
+Все шаги выполняются в одном процессе (Django и settings.py загружаются один раз):
+миграции пропускаются, если план пуст, collectstatic - если исходники статики не менялись.
+Цепочки "БД -> миграции" и "переводы -> статика" независимы и идут параллельно.
 """
 
+import hashlib
+import io
+import json
 import os
 import sys
-import subprocess
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+BASE_DIR = Path(__file__).resolve().parent
+
+COLLECTSTATIC_STAMP = '.collectstatic-stamp.json'
+
+_timings = []
+_timings_lock = threading.Lock()
+
+
+def timed(name, func, *args):
+    """Выполняет шаг и запоминает его длительность"""
+    started = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        with _timings_lock:
+            _timings.append((name, time.perf_counter() - started))
+
+
+def print_timings(total):
+    """Печатает разбивку времени запуска по шагам"""
+    print("⏱️ Время запуска:")
+    for name, seconds in _timings:
+        print(f"   {name:<24} {seconds:6.2f} с")
+    print(f"   {'итого':<24} {total:6.2f} с")
+
+
 def check_environment():
     """Проверяет критические переменные окружения"""
     print("🔍 Проверка переменных окружения...")
-    
+
     required_vars = ['SECRET_KEY', 'DATABASE_URL']
     missing_vars = []
-    
+
     for var in required_vars:
         if not os.environ.get(var):
             missing_vars.append(var)
-    
+
     if missing_vars:
         print(f"❌ Отсутствуют критические переменные: {', '.join(missing_vars)}")
         return False
-    
+
     print("✅ Все критические переменные установлены")
     return True
 
+def setup_django():
+    """Загружает Django один раз для всех шагов"""
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'selexia_travel.settings')
+    import django
+    django.setup()
+
 def check_database():
     """Проверяет подключение к базе данных"""
     print("🔍 Проверка подключения к базе данных...")
-    
+    from django.db import connection
+
     try:
-        result = subprocess.run([
-            sys.executable, 'check_db_connection.py'
-        ], capture_output=True, text=True, timeout=30)
-        
-        if result.returncode == 0:
-            print("✅ База данных доступна")
-            return True
-        else:
-            print(f"❌ Ошибка подключения к БД: {result.stderr}")
-            return False
-            
-    except subprocess.TimeoutExpired:
-        print("⏰ Таймаут проверки базы данных")
-        return False
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+        print(f"✅ База данных доступна ({connection.vendor})")
+        return True
     except Exception as e:
-        print(f"❌ Ошибка проверки БД: {e}")
+        print(f"❌ Ошибка подключения к БД: {e}")
         return False
 
+def pending_migrations():
+    """Миграции, которые еще не применены"""
+    from django.db import connection
+    from django.db.migrations.executor import MigrationExecutor
+
+    executor = MigrationExecutor(connection)
+    return executor.migration_plan(executor.loader.graph.leaf_nodes())
+
 def run_migrations():
-    """Запускает миграции базы данных"""
-    print("🔄 Применение миграций...")
-    
+    """Запускает миграции базы данных (только если есть неприменённые)"""
+    from django.core.management import call_command
+
     try:
-        result = subprocess.run([
-            sys.executable, 'manage.py', 'migrate', '--noinput'
-        ], capture_output=True, text=True, timeout=120)
-        
-        if result.returncode == 0:
-            print("✅ Миграции применены успешно")
+        plan = pending_migrations()
+        if not plan:
+            print("✅ Миграции уже применены")
             return True
-        else:
-            print(f"❌ Ошибка миграций: {result.stderr}")
-            return False
-            
-    except subprocess.TimeoutExpired:
-        print("⏰ Таймаут миграций")
-        return False
+
+        print(f"🔄 Применение миграций: {len(plan)}...")
+        call_command('migrate', interactive=False, verbosity=0)
+        print("✅ Миграции применены успешно")
+        return True
     except Exception as e:
         print(f"❌ Ошибка миграций: {e}")
         return False
 
+def create_cache_table():
+    """Создает таблицу общего кэша (DatabaseCache без REDIS_URL); существующая не трогается"""
+    from django.core.management import call_command
+
+    try:
+        call_command('createcachetable', verbosity=0)
+        print("✅ Таблица кэша готова")
+        return True
+    except Exception as e:
+        print(f"❌ Ошибка создания таблицы кэша: {e}")
+        return False
+
+def compile_translations():
+    """Компилирует переводы (пропускается, если .po файлы не менялись с прошлой сборки)"""
+    print("🌐 Компиляция переводов...")
+    from django.core.management import call_command
+
+    try:
+        call_command('compilemessages_custom', stdout=io.StringIO())
+        print("✅ Переводы актуальны")
+    except Exception as e:
+        print(f"⚠️ Ошибка компиляции переводов: {e}")
+    return True  # Не критично
+
+def static_sources_digest():
+    """Хэш списка исходников статики (путь, размер, mtime) и настроек хранилища"""
+    from django.conf import settings
+    from django.contrib.staticfiles import finders
+
+    entries = []
+    for finder in finders.get_finders():
+        for path, storage in finder.list([]):
+            stat = os.stat(storage.path(path))
+            entries.append(f'{path}|{stat.st_size}|{stat.st_mtime_ns}')
+    entries.sort()
+    entries.append(f"storage={settings.STORAGES['staticfiles']['BACKEND']}|url={settings.STATIC_URL}")
+    return hashlib.sha1('\n'.join(entries).encode('utf-8')).hexdigest()
+
 def collect_static():
-    """Собирает статические файлы"""
-    print("📦 Сбор статических файлов...")
-    
+    """Собирает статические файлы (пропускается, если исходники не менялись)"""
+    from django.conf import settings
+    from django.contrib.staticfiles.storage import staticfiles_storage
+    from django.core.management import call_command
+
     try:
-        result = subprocess.run([
-            sys.executable, 'manage.py', 'collectstatic', '--noinput'
-        ], capture_output=True, text=True, timeout=60)
-        
-        if result.returncode == 0:
-            print("✅ Статические файлы собраны")
+        static_root = Path(settings.STATIC_ROOT)
+        stamp_path = static_root / COLLECTSTATIC_STAMP
+        manifest_name = getattr(staticfiles_storage, 'manifest_name', None)
+        digest = static_sources_digest()
+
+        try:
+            stamp = json.loads(stamp_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            stamp = {}
+        manifest_exists = manifest_name is None or (static_root / manifest_name).exists()
+        if stamp.get('digest') == digest and manifest_exists:
+            print("✅ Статические файлы не менялись")
             return True
-        else:
-            print(f"⚠️ Предупреждение при сборе статики: {result.stderr}")
-            return True  # Не критично
-            
-    except subprocess.TimeoutExpired:
-        print("⏰ Таймаут сбора статики")
+
+        print("📦 Сбор статических файлов...")
+        call_command('collectstatic', interactive=False, verbosity=0)
+        stamp_path.write_text(json.dumps({'digest': digest}), encoding='utf-8')
+        print("✅ Статические файлы собраны")
         return True
     except Exception as e:
         print(f"⚠️ Ошибка сбора статики: {e}")
-        return True
+        return True  # Не критично
 
-def start_gunicorn():
-    """Запускает Gunicorn сервер"""
-    print("🚀 Запуск Gunicorn сервера...")
-    
+def prepare_database():
+    """Цепочка шагов базы данных: подключение, миграции, таблица общего кэша"""
+    from django.db import connections
+
+    try:
+        return (
+            timed('проверка БД', check_database)
+            and timed('миграции', run_migrations)
+            and timed('таблица кэша', create_cache_table)
+        )
+    finally:
+        # Соединение потока подготовки не нужно воркерам Gunicorn
+        connections.close_all()
+
+def prepare_static():
+    """Цепочка шагов статики: переводы попадают в манифест, поэтому собираются до статики"""
+    timed('переводы', compile_translations)
+    timed('статика', collect_static)
+    return True
+
+def gunicorn_command():
+    """Команда запуска Gunicorn"""
     # Получаем порт из переменной окружения
     port = os.environ.get('PORT', '8000')
-    
-    # Команда для запуска Gunicorn
-    cmd = [
+
+    return [
         'gunicorn',
-        'selexia_travel.wsgi:application',
+        'selexia_travel.asgi:application',
+        '--worker-class', 'uvicorn.workers.UvicornWorker',
         '--bind', f'0.0.0.0:{port}',
         '--workers', '2',
         '--timeout', '120',
@@ -119,50 +218,52 @@ def start_gunicorn():
         '--error-logfile', '-',
         '--log-level', 'info'
     ]
-    
-    print(f"🌐 Сервер будет доступен на порту {port}")
+
+def start_gunicorn():
+    """Запускает Gunicorn сервер вместо текущего процесса (сигналы Railway получает сам Gunicorn)"""
+    print("🚀 Запуск Gunicorn сервера...")
+    cmd = gunicorn_command()
+    print(f"🌐 Сервер будет доступен на порту {os.environ.get('PORT', '8000')}")
     print(f"🔧 Команда запуска: {' '.join(cmd)}")
-    
+    sys.stdout.flush()
+
     try:
-        # Запускаем Gunicorn
-        subprocess.run(cmd, check=True)
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Gunicorn завершился с ошибкой: {e}")
-        return False
-    except KeyboardInterrupt:
-        print("\n⚠️ Сервер остановлен пользователем")
-        return True
+        os.execvp(cmd[0], cmd)
     except Exception as e:
-        print(f"❌ Неожиданная ошибка: {e}")
+        print(f"❌ Не удалось запустить Gunicorn: {e}")
         return False
 
 def main():
     """Основная функция"""
     print("🚂 ЗАПУСК SELEXIATRAVEL НА RAILWAY")
     print("=" * 50)
-    
+    started = time.perf_counter()
+
     # 1. Проверяем окружение
     if not check_environment():
         print("❌ Критические проблемы с окружением")
         sys.exit(1)
-    
-    # 2. Проверяем базу данных
-    if not check_database():
-        print("❌ Проблемы с базой данных")
-        sys.exit(1)
-    
-    # 3. Применяем миграции
-    if not run_migrations():
-        print("❌ Ошибка миграций")
+
+    # 2. Загружаем Django (settings.py выполняется один раз)
+    timed('загрузка Django', setup_django)
+
+    # 3. База данных и статика готовятся параллельно
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        database_ready = executor.submit(prepare_database)
+        static_ready = executor.submit(prepare_static)
+        database_ok = database_ready.result()
+        static_ready.result()
+
+    print_timings(time.perf_counter() - started)
+
+    if not database_ok:
+        print("❌ Проблемы с базой данных или миграциями")
         sys.exit(1)
-    
-    # 4. Собираем статические файлы
-    collect_static()
-    
-    # 5. Запускаем сервер
+
+    # 4. Запускаем сервер
     print("\n🎉 Все проверки пройдены! Запускаем сервер...")
     print("=" * 50)
-    
+
     if not start_gunicorn():
         sys.exit(1)
 
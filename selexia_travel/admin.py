@@ -1,15 +1,68 @@
 from django.contrib import admin
+from django.contrib import messages
+from django.contrib.admin.views.main import ChangeList
 from django.contrib.auth.admin import UserAdmin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
-from django.db.models import Count, Avg
+from django.db.models import Count, Avg, Exists, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.utils.translation import gettext_lazy as _
 
 from .models import (
-    User, Country, City, Category, Excursion, ExcursionImage,
+    User, GmailCredentials, Country, City, Category, Excursion, ExcursionImage,
     Review, ReviewImage, Booking, Favorite, Application, UserSettings
 )
+from .moderation import moderate_reviews
+
+
+# Ниже этого размера таблицы точный COUNT(*) дешевле, чем неточность оценки
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор changelist для больших таблиц: без фильтров на PostgreSQL
+    берет оценку числа строк из pg_class вместо COUNT(*) по всей таблице.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                    [queryset.model._meta.db_table]
+                )
+                row = cursor.fetchone()
+            if row and row[0] >= ESTIMATED_COUNT_THRESHOLD:
+                return row[0]
+        return super().count
+
+
+class DeferredFieldsChangeList(ChangeList):
+    """ChangeList, не загружающий тяжелые поля, которых нет в списке (changelist_deferred_fields)"""
+
+    def get_queryset(self, request, *args, **kwargs):
+        queryset = super().get_queryset(request, *args, **kwargs)
+        return queryset.defer(*getattr(self.model_admin, 'changelist_deferred_fields', ()))
+
+
+def count_subquery(queryset, related_field):
+    """
+    Количество строк queryset для каждой строки changelist коррелированным подзапросом.
+    В отличие от Count() через JOIN не требует GROUP BY по всем колонкам
+    и не перемножает строки при нескольких счетчиках.
+    """
+    counts = queryset.filter(**{related_field: OuterRef('pk')}).order_by().values(
+        related_field
+    ).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
 
 
 class ExcursionImageInline(admin.TabularInline):
@@ -45,6 +98,16 @@ class ReviewImageInline(admin.TabularInline):
     image_preview.short_description = _('Превью')
 
 
+class GmailCredentialsInline(admin.StackedInline):
+    """Инлайн для OAuth-токенов Gmail"""
+    model = GmailCredentials
+    extra = 0
+    can_delete = True
+    classes = ('collapse',)
+    readonly_fields = ('updated_at',)
+    verbose_name_plural = _('Gmail интеграция')
+
+
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
     """Админка пользователей"""
@@ -55,9 +118,9 @@ class CustomUserAdmin(UserAdmin):
         (None, {'fields': ('email', 'password')}),
         (_('Персональная информация'), {'fields': ('first_name', 'last_name', 'phone', 'avatar', 'date_of_birth')}),
         (_('Gmail интеграция'), {
-            'fields': ('gmail_access_token', 'gmail_refresh_token', 'gmail_token_expiry', 'gmail_profile_updated'),
+            'fields': ('gmail_profile_updated',),
             'classes': ('collapse',),
-            'description': _('Настройки интеграции с Gmail API')
+            'description': _('Токены Gmail API - в блоке «Gmail интеграция» ниже')
         }),
         (_('Разрешения'), {'fields': ('is_active', 'is_staff', 'is_superuser', 'groups', 'user_permissions')}),
         (_('Важные даты'), {'fields': ('last_login', 'date_joined')}),
@@ -71,10 +134,20 @@ class CustomUserAdmin(UserAdmin):
     search_fields = ('email', 'first_name', 'last_name')
     ordering = ('email',)
     readonly_fields = ('gmail_profile_updated',)
+    inlines = [GmailCredentialsInline]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            has_gmail_credentials=Exists(
+                GmailCredentials.objects.filter(user=OuterRef('pk'), access_token__isnull=False)
+            )
+        )
     
     def gmail_connected(self, obj):
         """Показывает статус подключения Gmail"""
-        if obj.gmail_access_token:
+        if getattr(obj, 'has_gmail_credentials', False):
             return format_html(
                 '<span style="color: green;">✓ Подключен</span>'
             )
@@ -82,12 +155,7 @@ class CustomUserAdmin(UserAdmin):
             '<span style="color: red;">✗ Не подключен</span>'
         )
     gmail_connected.short_description = _('Gmail статус')
-    
-    def get_queryset(self, request):
-        return super().get_queryset(request).annotate(
-            bookings_count=Count('bookings'),
-            reviews_count=Count('reviews')
-        )
+    gmail_connected.admin_order_field = 'has_gmail_credentials'
 
 
 @admin.register(Country)
@@ -99,13 +167,21 @@ class CountryAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('name_en',)}
     readonly_fields = ('cities_count', 'excursions_count')
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            cities_total=count_subquery(City.objects.all(), 'country'),
+            excursions_total=count_subquery(Excursion.objects.filter(status='published'), 'country'),
+        )
+    
     def cities_count(self, obj):
-        return obj.cities.count()
+        return getattr(obj, 'cities_total', 0)
     cities_count.short_description = _('Количество городов')
+    cities_count.admin_order_field = 'cities_total'
     
     def excursions_count(self, obj):
-        return obj.excursions.filter(status='published').count()
+        return getattr(obj, 'excursions_total', 0)
     excursions_count.short_description = _('Количество экскурсий')
+    excursions_count.admin_order_field = 'excursions_total'
 
 
 def make_cities_popular(modeladmin, request, queryset):
@@ -124,10 +200,17 @@ class CityAdmin(admin.ModelAdmin):
     autocomplete_fields = ('country',)
     readonly_fields = ('excursions_count',)
     actions = [make_cities_popular]
+    list_select_related = ('country',)
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            excursions_total=count_subquery(Excursion.objects.filter(status='published'), 'city'),
+        )
     
     def excursions_count(self, obj):
-        return obj.excursions.filter(status='published').count()
+        return getattr(obj, 'excursions_total', 0)
     excursions_count.short_description = _('Количество экскурсий')
+    excursions_count.admin_order_field = 'excursions_total'
 
 
 @admin.register(Category)
@@ -139,9 +222,15 @@ class CategoryAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('name_en',)}
     readonly_fields = ('excursions_count',)
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            excursions_total=count_subquery(Excursion.objects.filter(status='published'), 'category'),
+        )
+    
     def excursions_count(self, obj):
-        return obj.excursions.filter(status='published').count()
+        return getattr(obj, 'excursions_total', 0)
     excursions_count.short_description = _('Количество экскурсий')
+    excursions_count.admin_order_field = 'excursions_total'
 
 
 def make_published(modeladmin, request, queryset):
@@ -157,9 +246,13 @@ make_draft.short_description = _('Перевести в черновики')
 
 
 def make_popular(modeladmin, request, queryset):
-    """Сделать популярными"""
+    """Сделать популярными до следующего пересчета update_popularity: он выставляет is_popular по скору"""
     queryset.update(is_popular=True)
-make_popular.short_description = _('Сделать популярными')
+    modeladmin.message_user(
+        request, _('Флаг «популярная» будет пересчитан при следующем запуске update_popularity'),
+        level=messages.WARNING,
+    )
+make_popular.short_description = _('Сделать популярными (до пересчета популярности)')
 
 
 @admin.register(Excursion)
@@ -177,9 +270,19 @@ class ExcursionAdmin(admin.ModelAdmin):
     search_fields = ('title_ru', 'title_en', 'description_ru', 'description_en')
     prepopulated_fields = {'slug': ('title_en',)}
     autocomplete_fields = ('country', 'city', 'category')
-    readonly_fields = ('views_count', 'rating', 'reviews_count', 'gallery_status')
+    readonly_fields = ('views_count', 'rating', 'reviews_count', 'popularity_score', 'popularity_updated_at', 'gallery_status')
     actions = [make_published, make_draft, make_popular]
     inlines = [ExcursionImageInline]
+    list_select_related = ('city__country', 'country', 'category')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    
+    # Большие текстовые поля не нужны в списке (в форме редактирования грузятся как обычно)
+    changelist_deferred_fields = [
+        f'{field}_{lang}'
+        for field in ('description', 'short_description', 'program', 'included', 'important_info', 'meeting_point')
+        for lang in ('ru', 'en')
+    ]
     
     fieldsets = (
         (_('Основная информация'), {
@@ -205,13 +308,15 @@ class ExcursionAdmin(admin.ModelAdmin):
             'fields': ('status', 'is_popular', 'is_featured')
         }),
         (_('Статистика'), {
-            'fields': ('views_count', 'rating', 'reviews_count', 'gallery_status'),
+            'fields': ('views_count', 'rating', 'reviews_count', 'popularity_score', 'popularity_updated_at', 'gallery_status'),
             'classes': ('collapse',)
         }),
     )
     
     def gallery_status(self, obj):
-        images_count = obj.images.count()
+        images_count = getattr(obj, 'images_count', None)
+        if images_count is None:
+            images_count = obj.images.count() if obj.pk else 0
         if images_count < 6:
             color = 'red'
             status = f'Недостаточно ({images_count}/6)'
@@ -227,13 +332,36 @@ class ExcursionAdmin(admin.ModelAdmin):
             color, status
         )
     gallery_status.short_description = _('Статус галереи')
+    gallery_status.admin_order_field = 'images_count'
     
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related(
-            'city', 'country', 'category'
-        ).annotate(
-            images_count=Count('images')
+        return super().get_queryset(request).annotate(
+            images_count=count_subquery(ExcursionImage.objects.all(), 'excursion')
         )
+    
+    def get_changelist(self, request, **kwargs):
+        return DeferredFieldsChangeList
+
+
+def approve_reviews(modeladmin, request, queryset):
+    """Массовое одобрение отзывов"""
+    count = moderate_reviews(queryset, 'approve')
+    modeladmin.message_user(request, _('Одобрено отзывов: %(count)d') % {'count': count})
+approve_reviews.short_description = _('Одобрить выбранные отзывы')
+
+
+def reject_reviews(modeladmin, request, queryset):
+    """Массовое снятие отзывов с публикации"""
+    count = moderate_reviews(queryset, 'reject')
+    modeladmin.message_user(request, _('Отклонено отзывов: %(count)d') % {'count': count})
+reject_reviews.short_description = _('Отклонить выбранные отзывы')
+
+
+def delete_reviews(modeladmin, request, queryset):
+    """Массовое удаление отзывов с одним пересчетом рейтингов"""
+    count = moderate_reviews(queryset, 'delete')
+    modeladmin.message_user(request, _('Удалено отзывов: %(count)d') % {'count': count})
+delete_reviews.short_description = _('Удалить выбранные отзывы')
 
 
 @admin.register(Review)
@@ -244,6 +372,15 @@ class ReviewAdmin(admin.ModelAdmin):
     search_fields = ('user__email', 'excursion__title_ru', 'text')
     readonly_fields = ('created_at',)
     inlines = [ReviewImageInline]
+    actions = [approve_reviews, reject_reviews, delete_reviews]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    
+    def get_actions(self, request):
+        # Стандартное удаление пересчитывает рейтинг на каждый отзыв - заменено delete_reviews
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
     
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('user', 'excursion')
@@ -267,6 +404,8 @@ class BookingAdmin(admin.ModelAdmin):
     )
     readonly_fields = ('created_at',)
     date_hierarchy = 'date'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         (_('Бронирование'), {
@@ -296,6 +435,8 @@ class ApplicationAdmin(admin.ModelAdmin):
     search_fields = ('name', 'email', 'phone', 'destination')
     readonly_fields = ('created_at',)
     date_hierarchy = 'created_at'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         (_('Контактная информация'), {
@@ -320,6 +461,8 @@ class FavoriteAdmin(admin.ModelAdmin):
     list_filter = ('item_type', 'created_at')
     search_fields = ('user__email', 'user__first_name', 'user__last_name')
     readonly_fields = ('created_at',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     def get_item_name(self, obj):
         if obj.excursion:
@@ -386,18 +529,13 @@ class GalleryStatusFilter(admin.SimpleListFilter):
         )
     
     def queryset(self, request, queryset):
+        # images_count уже аннотирован в ExcursionAdmin.get_queryset
         if self.value() == 'valid':
-            return queryset.annotate(
-                images_count=Count('images')
-            ).filter(images_count__gte=6, images_count__lte=15)
+            return queryset.filter(images_count__gte=6, images_count__lte=15)
         elif self.value() == 'insufficient':
-            return queryset.annotate(
-                images_count=Count('images')
-            ).filter(images_count__lt=6)
+            return queryset.filter(images_count__lt=6)
         elif self.value() == 'excessive':
-            return queryset.annotate(
-                images_count=Count('images')
-            ).filter(images_count__gt=15)
+            return queryset.filter(images_count__gt=15)
 
 
 # Добавляем фильтр в админку экскурсий
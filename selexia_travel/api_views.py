@@ -1,14 +1,21 @@
 from rest_framework import status, generics, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
 from django.shortcuts import get_object_or_404
 from django.db.models import Q, Avg, Count
 from django.contrib.auth import get_user_model
+from django.http import StreamingHttpResponse, Http404
+from django.conf import settings
+import json
 from .models import (
-    Excursion, Category, Country, City, 
+    Excursion, ExcursionImage, Category, Country, City, 
     Booking, Review, Favorite, Application
 )
+from .caching import conditional_catalog
+from .excursion_detail import get_excursion_bundle
 from .serializers import (
     ExcursionSerializer, ExcursionDetailSerializer, CategorySerializer,
     CountrySerializer, CitySerializer, ReviewSerializer, ReviewCreateSerializer,
@@ -287,13 +294,55 @@ class UserProfileUpdateAPIView(generics.UpdateAPIView):
         return self.request.user
 
 # Дополнительные API endpoints
+class NDJSONRenderer(BaseRenderer):
+    """Рендерер для потоковой выдачи в формате NDJSON (одна JSON-запись на строку)"""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        items = data if isinstance(data, list) else [data]
+        return ''.join(json.dumps(item, cls=JSONEncoder, ensure_ascii=False) + '\n' for item in items).encode('utf-8')
+
+
+async def _stream_excursions(excursions, serializer, ndjson, chunk_size):
+    """Асинхронно сериализует экскурсии порциями, не держа весь список в памяти"""
+    encoder = JSONEncoder(ensure_ascii=False)
+    buffer = [] if ndjson else ['[']
+    first = True
+    async for excursion in excursions.aiterator(chunk_size=chunk_size):
+        item = encoder.encode(serializer.to_representation(excursion))
+        if ndjson:
+            buffer.append(item + '\n')
+        else:
+            buffer.append(item if first else ',' + item)
+        first = False
+        if len(buffer) >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+    if not ndjson:
+        buffer.append(']')
+    if buffer:
+        yield ''.join(buffer)
+
+
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
+@renderer_classes([JSONRenderer, NDJSONRenderer])
 def excursions_api(request):
-    """API для получения всех экскурсий (для совместимости)"""
+    """
+    API для получения всех экскурсий (для совместимости).
+
+    Ответ отдается потоком: JSON-массив или NDJSON (?format=ndjson / Accept: application/x-ndjson).
+    Количество записей ограничено settings.LEGACY_EXCURSIONS_API_MAX_ITEMS.
+    Тело - асинхронный итератор, поэтому поток есть только под ASGI (gunicorn + uvicorn).
+    Под WSGI и runserver Django с предупреждением собирает весь ответ в память.
+    """
     excursions = Excursion.objects.filter(status='published').select_related(
-        'category', 'country', 'city'
-    ).prefetch_related('favorites')
+        'category', 'country', 'city', 'city__country'
+    )
     
     # Применяем фильтры
     category = request.query_params.get('category')
@@ -309,24 +358,45 @@ def excursions_api(request):
     if sort == 'price':
         excursions = excursions.order_by('price')
     elif sort == 'rating':
-        excursions = excursions.order_by('-average_rating')
+        excursions = excursions.order_by('-rating')
     else:
         excursions = excursions.order_by('-created_at')
     
-    serializer = ExcursionSerializer(excursions, many=True, context={'request': request})
-    return Response(serializer.data)
+    excursions = excursions[:getattr(settings, 'LEGACY_EXCURSIONS_API_MAX_ITEMS', 1000)]
+    
+    # Избранное и счетчики экскурсий по городам - одним запросом каждое, а не на каждую строку
+    favorite_ids = set()
+    if request.user.is_authenticated:
+        favorite_ids = set(Favorite.objects.filter(
+            user=request.user, excursion__isnull=False
+        ).values_list('excursion_id', flat=True))
+    city_counts = dict(
+        Excursion.objects.filter(status='published').values_list('city_id').annotate(total=Count('id')).order_by()
+    )
+    
+    serializer = ExcursionSerializer(context={
+        'request': request,
+        'favorite_excursion_ids': favorite_ids,
+        'city_excursion_counts': city_counts,
+    })
+    ndjson = request.accepted_renderer.format == 'ndjson'
+    chunk_size = getattr(settings, 'LEGACY_EXCURSIONS_API_CHUNK_SIZE', 200)
+    
+    return StreamingHttpResponse(
+        _stream_excursions(excursions, serializer, ndjson, chunk_size),
+        content_type=NDJSONRenderer.media_type if ndjson else 'application/json'
+    )
 
+@conditional_catalog(Excursion, ExcursionImage, Category, Country, City, Review, Favorite, vary_on_user=True)
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
 def excursion_detail_api(request, slug):
     """API для получения деталей экскурсии (для совместимости)"""
-    excursion = get_object_or_404(
-        Excursion.objects.select_related('category', 'country', 'city')
-        .prefetch_related('reviews', 'favorites'),
-        slug=slug,
-        status='published'
-    )
-    serializer = ExcursionDetailSerializer(excursion, context={'request': request})
+    try:
+        bundle = get_excursion_bundle(request.LANGUAGE_CODE, slug=slug)
+    except Excursion.DoesNotExist:
+        raise Http404('Экскурсия не найдена')
+    serializer = ExcursionDetailSerializer(bundle['excursion'], context={'request': request})
     return Response(serializer.data)
 
 @api_view(['POST'])
@@ -7,4 +7,5 @@ class SelexiaTravelConfig(AppConfig):
     verbose_name = 'SELEXIA Travel'
     
     def ready(self):
-        import selexia_travel.signals
\ No newline at end of file
+        import selexia_travel.signals
+        import selexia_travel.checks
\ No newline at end of file
@@ -0,0 +1,244 @@
+"""
+Условные HTTP-ответы (ETag / Last-Modified / Cache-Control) для JSON каталога
+"""
+
+import asyncio
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+
+CATALOG_VERSION_PREFIX = 'catalog:version:'
+
+# Время последнего изменения моделей, читаемых с реплик (реплики могут отставать)
+CATALOG_LAST_CHANGE_KEY = 'catalog:last_change'
+
+# Поля, изменение которых не влияет на отдаваемые данные каталога
+NON_CATALOG_FIELDS = frozenset({'views_count'})
+
+DEFAULT_CATALOG_CACHE_CONTROL = {
+    'max_age': 60,
+    's_maxage': 300,
+    'stale_while_revalidate': 600,
+}
+
+
+def shared_cache():
+    """Кэш, общий для всех воркеров (settings.SHARED_CACHE): версии каталога и лент"""
+    return caches[getattr(settings, 'SHARED_CACHE', 'default')]
+
+
+def _version_key(model):
+    return f'{CATALOG_VERSION_PREFIX}{model._meta.label_lower}'
+
+
+def _version_timeout():
+    # Истекшая версия создается заново (новый ETag), это лишь холодный кэш клиентов
+    return getattr(settings, 'CATALOG_VERSION_TIMEOUT', 60 * 60 * 24)
+
+
+def bump_catalog_version(*models):
+    """
+    Сдвигает версию семейства моделей (вызывается из сигналов save/delete).
+    Внутри транзакции сдвиг откладывается до коммита, чтобы не закэшировать
+    под новой версией еще не зафиксированные данные.
+    Время изменения для роутера реплик пишут только модели, читаемые с реплик:
+    избранное и бронирования пользователя читаются из основной БД.
+    """
+    from .db_router import REPLICA_READ_MODELS  # db_router импортирует этот модуль
+
+    read_from_replicas = any(model._meta.label_lower in REPLICA_READ_MODELS for model in models)
+
+    def bump():
+        version = time.time_ns()
+        values = {_version_key(model): version for model in models}
+        if read_from_replicas:
+            values[CATALOG_LAST_CHANGE_KEY] = version
+        shared_cache().set_many(values, _version_timeout())
+
+    transaction.on_commit(bump)
+
+
+def catalog_changed_within(seconds):
+    """Менялся ли каталог за последние seconds секунд (по общему кэшу)"""
+    changed_at = shared_cache().get(CATALOG_LAST_CHANGE_KEY)
+    return changed_at is not None and time.time_ns() - changed_at < seconds * 1_000_000_000
+
+
+def _fill_missing_versions(models, versions):
+    now = time.time_ns()
+    return {_version_key(model): now for model in models if _version_key(model) not in versions}
+
+
+def get_catalog_versions(models):
+    """Возвращает версии моделей одним обращением к кэшу"""
+    cache = shared_cache()
+    versions = cache.get_many([_version_key(model) for model in models])
+    missing = _fill_missing_versions(models, versions)
+    if missing:
+        # add, а не set: версию, которую параллельно сдвинул другой воркер, не затираем
+        for key, version in missing.items():
+            if not cache.add(key, version, _version_timeout()):
+                missing[key] = cache.get(key, version)
+        versions.update(missing)
+    return [versions[_version_key(model)] for model in models]
+
+
+async def aget_catalog_versions(models):
+    """Асинхронный вариант get_catalog_versions"""
+    cache = shared_cache()
+    versions = await cache.aget_many([_version_key(model) for model in models])
+    missing = _fill_missing_versions(models, versions)
+    if missing:
+        for key, version in missing.items():
+            if not await cache.aadd(key, version, _version_timeout()):
+                missing[key] = await cache.aget(key, version)
+        versions.update(missing)
+    return [versions[_version_key(model)] for model in models]
+
+
+def _user_marker(request):
+    """Идентификатор пользователя для персонализированных ответов (сессия или токен)"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    authorization = request.META.get('HTTP_AUTHORIZATION')
+    if authorization:
+        return 'auth:' + hashlib.sha1(authorization.encode()).hexdigest()
+    return ''
+
+
+def build_catalog_validators(request, versions, vary_on_user=False, vary_on_accept=False):
+    """
+    Строит слабый ETag и Last-Modified по версиям моделей, пути, query-строке и языку.
+    ETag слабый: в теле есть поля вне версий (views_count), побайтового совпадения он не обещает.
+    Возвращает (etag, last_modified, personalized).
+    """
+    user_marker = _user_marker(request) if vary_on_user else ''
+    parts = [
+        request.path,
+        '&'.join(sorted(request.META.get('QUERY_STRING', '').split('&'))),
+        getattr(request, 'LANGUAGE_CODE', ''),
+        request.META.get('HTTP_ACCEPT', '') if vary_on_accept else '',
+        user_marker,
+    ] + [str(version) for version in versions]
+    etag = 'W/"%s"' % hashlib.sha1('|'.join(parts).encode()).hexdigest()
+    last_modified = max(versions) // 10 ** 9
+    return etag, last_modified, bool(user_marker)
+
+
+def patch_catalog_response(response, etag, last_modified, personalized=False, vary_on_accept=False):
+    """Проставляет валидаторы и Cache-Control для CDN на успешный или 304 ответ"""
+    if response.status_code not in (200, 304):
+        return response
+
+    response.headers.setdefault('ETag', etag)
+    response.headers.setdefault('Last-Modified', http_date(last_modified))
+
+    options = dict(getattr(settings, 'CATALOG_CACHE_CONTROL', DEFAULT_CATALOG_CACHE_CONTROL))
+    if personalized:
+        options.pop('s_maxage', None)
+        patch_cache_control(response, private=True, **options)
+    else:
+        patch_cache_control(response, public=True, **options)
+
+    patch_vary_headers(response, ['Accept-Language', 'Accept'] if vary_on_accept else ['Accept-Language'])
+    return response
+
+
+def conditional_catalog(*models, vary_on_user=False, vary_on_accept=False):
+    """
+    Декоратор для read-only JSON view каталога (sync и async).
+
+    Если клиент прислал актуальный ETag (If-None-Match) или If-Modified-Since,
+    отдает 304 без обращения к ORM. ETag доступен в view как request.catalog_etag.
+    """
+    def decorator(view_func):
+        def evaluate(request, versions):
+            etag, last_modified, personalized = build_catalog_validators(
+                request, versions, vary_on_user=vary_on_user, vary_on_accept=vary_on_accept
+            )
+            request.catalog_etag = etag
+            not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            return etag, last_modified, personalized, not_modified
+
+        if asyncio.iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return await view_func(request, *args, **kwargs)
+                etag, last_modified, personalized, response = evaluate(
+                    request, await aget_catalog_versions(models)
+                )
+                if response is None:
+                    response = await view_func(request, *args, **kwargs)
+                return patch_catalog_response(response, etag, last_modified, personalized, vary_on_accept)
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+            etag, last_modified, personalized, response = evaluate(
+                request, get_catalog_versions(models)
+            )
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+            return patch_catalog_response(response, etag, last_modified, personalized, vary_on_accept)
+        return wrapper
+
+    return decorator
+
+
+class ConditionalCatalogMixin:
+    """
+    Миксин для DRF viewset'ов каталога: условные GET-ответы по версиям моделей.
+
+    catalog_models - модели, от которых зависят данные;
+    catalog_actions - действия с условными ответами (None - все GET-действия).
+    """
+    catalog_models = ()
+    catalog_actions = None
+
+    def before_conditional(self, request, action, *args, **kwargs):
+        """Вызывается для каждого условного GET до проверки ETag (в т.ч. когда ответ - 304)"""
+
+    def dispatch(self, request, *args, **kwargs):
+        action = getattr(self, 'action_map', {}).get(request.method.lower())
+        if request.method not in ('GET', 'HEAD') or (
+            self.catalog_actions is not None and action not in self.catalog_actions
+        ):
+            return super().dispatch(request, *args, **kwargs)
+
+        self.before_conditional(request, action, *args, **kwargs)
+
+        etag, last_modified, personalized = build_catalog_validators(
+            request, get_catalog_versions(self.catalog_models), vary_on_accept=True
+        )
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)
+        return patch_catalog_response(response, etag, last_modified, personalized, vary_on_accept=True)
+
+
+class PrivateResponseMiddleware:
+    """
+    Ответы вошедшим пользователям без своего Cache-Control помечаются private:
+    их не сохраняют общие кэши (CDN) и кэш страниц Service Worker.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated and not response.has_header('Cache-Control'):
+            patch_cache_control(response, private=True)
+        return response
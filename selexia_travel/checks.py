@@ -0,0 +1,31 @@
+"""
+Проверки конфигурации (manage.py check): на Railway кэши, общие для воркеров, не должны
+быть локальными для процесса - иначе лимиты и версии каталога считаются в каждом воркере отдельно
+"""
+
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+
+PROCESS_LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches)
+def check_shared_caches(app_configs, **kwargs):
+    if not getattr(settings, 'RAILWAY_ENVIRONMENT', False):
+        return []
+
+    errors = []
+    for setting_name in ('SHARED_CACHE', 'RATE_LIMIT_CACHE'):
+        alias = getattr(settings, setting_name, 'default')
+        backend = settings.CACHES.get(alias, {}).get('BACKEND')
+        if backend in PROCESS_LOCAL_CACHE_BACKENDS:
+            errors.append(Error(
+                f'{setting_name} = {alias!r} использует {backend}: счетчики и версии не общие для воркеров',
+                hint='Задайте REDIS_URL или кэш в БД (django.core.cache.backends.db.DatabaseCache)',
+                id='selexia_travel.E001',
+            ))
+    return errors
@@ -1,8 +1,14 @@
 from django.conf import settings
-from .models import Category, Country, Excursion
+from django.utils.functional import SimpleLazyObject
+from .models import Category, Country, City, Excursion, ExcursionImage, Review, ReviewImage
+from .caching import get_catalog_versions
 from .forms import NewsletterForm, SearchForm
 
 
+# Модели, от которых зависят кэшируемые фрагменты страниц
+TEMPLATE_CATALOG_MODELS = (Country, City, Category, Excursion, ExcursionImage, Review, ReviewImage)
+
+
 def site_context(request):
     """Глобальный контекст для всех шаблонов"""
     
@@ -85,4 +91,16 @@ def site_context(request):
             'favorites_count': 0,
             'MEDIA_URL': settings.MEDIA_URL,
             'STATIC_URL': settings.STATIC_URL,
-        }
\ No newline at end of file
+        }
+
+
+def catalog_version(request):
+    """
+    Версия каталога для ключей фрагментного кэша шаблонов ({% cache %}).
+    Вычисляется лениво - только если шаблон действительно использует кэш.
+    """
+    return {
+        'catalog_version': SimpleLazyObject(
+            lambda: '-'.join(str(version) for version in get_catalog_versions(TEMPLATE_CATALOG_MODELS))
+        ),
+    }
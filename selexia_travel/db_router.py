@@ -0,0 +1,142 @@
+"""
+Чтение каталога с реплик БД: роутер и middleware "прочитай свою запись".
+
+Реплики задаются переменной DATABASE_REPLICA_URLS (см. settings.REPLICA_DATABASES).
+На реплики уходят только чтения моделей каталога вне транзакций; записи,
+бронирования, избранное, пользователи и сессии всегда идут в default.
+"""
+
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .caching import catalog_changed_within
+
+
+# Модели, которые можно читать с реплики (label_lower)
+REPLICA_READ_MODELS = frozenset({
+    'selexia_travel.country',
+    'selexia_travel.city',
+    'selexia_travel.category',
+    'selexia_travel.excursion',
+    'selexia_travel.excursionimage',
+    'selexia_travel.excursionneighbor',
+    'selexia_travel.review',
+    'selexia_travel.reviewimage',
+})
+
+PRIMARY_COOKIE_NAME = 'db_primary_until'
+DEFAULT_STICKY_SECONDS = 10
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_use_primary = ContextVar('use_primary_database', default=False)
+
+
+def replica_aliases():
+    return getattr(settings, 'REPLICA_DATABASES', ())
+
+
+def sticky_seconds():
+    return getattr(settings, 'REPLICA_STICKY_SECONDS', DEFAULT_STICKY_SECONDS)
+
+
+@contextmanager
+def use_primary():
+    """Все чтения внутри блока идут в основную БД"""
+    token = _use_primary.set(True)
+    try:
+        yield
+    finally:
+        _use_primary.reset(token)
+
+
+class ReplicaRouter:
+    """Чтение каталога - со случайной реплики, все остальное - из default"""
+
+    def db_for_read(self, model, **hints):
+        replicas = replica_aliases()
+        if not replicas or _use_primary.get():
+            return DEFAULT_DB_ALIAS
+        if model._meta.label_lower not in REPLICA_READ_MODELS:
+            return DEFAULT_DB_ALIAS
+        # Внутри транзакции на основной БД читаем ее же (select_for_update, только что записанные строки)
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики - копии default, объекты из них взаимозаменяемы
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплики в продакшене получают схему репликацией; локально их можно мигрировать явно
+        return None
+
+
+def _should_use_primary(request):
+    if request.method not in SAFE_METHODS:
+        return True
+    try:
+        if float(request.COOKIES.get(PRIMARY_COOKIE_NAME, 0)) > time.time():
+            return True
+    except ValueError:
+        pass
+    # Реплика могла еще не получить только что измененный каталог: не кэшируем ее отставание
+    return catalog_changed_within(sticky_seconds())
+
+
+def _mark_primary(request, response):
+    if request.method not in SAFE_METHODS and response.status_code < 500:
+        response.set_cookie(
+            PRIMARY_COOKIE_NAME, str(int(time.time()) + sticky_seconds()),
+            max_age=sticky_seconds(), httponly=True, samesite='Lax',
+            secure=getattr(settings, 'SESSION_COOKIE_SECURE', False),
+        )
+    return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Запросы с записью (POST и т.п.) читают из основной БД и ставят короткую cookie,
+    после которой GET этого пользователя еще REPLICA_STICKY_SECONDS читают из основной БД.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not replica_aliases():
+            return self.get_response(request)
+        token = _use_primary.set(_should_use_primary(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _use_primary.reset(token)
+        return _mark_primary(request, response)
+
+    async def __acall__(self, request):
+        if not replica_aliases():
+            return await self.get_response(request)
+        token = _use_primary.set(_should_use_primary(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _use_primary.reset(token)
+        return _mark_primary(request, response)
@@ -0,0 +1,80 @@
+"""
+Пакет данных детальной страницы экскурсии: один загрузчик с фиксированным числом запросов
+для всех детальных эндпоинтов (HTML, Vue, JSON API), кэш по (slug, язык) с версиями каталога
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .caching import get_catalog_versions
+from .models import Category, City, Country, Excursion, ExcursionImage, Review, ReviewImage
+from .recommendations import get_similar_excursions, similar_card_data
+from .review_feed import get_review_page
+
+
+# Модели, изменение которых меняет пакет (таблица похожих при пересчете сдвигает версию Excursion)
+DETAIL_CATALOG_MODELS = (Excursion, ExcursionImage, Country, City, Category, Review, ReviewImage)
+
+DEFAULT_CACHE_TIMEOUT = 60 * 10
+SIMILAR_EXCURSIONS_LIMIT = 6
+
+
+def _rating_histogram(excursion):
+    """Количество одобренных отзывов по оценкам 1-5 одним агрегирующим запросом"""
+    counts = Review.objects.filter(excursion=excursion, is_approved=True).aggregate(
+        **{f'rating_{rating}': Count('id', filter=Q(rating=rating)) for rating in range(1, 6)}
+    )
+    total = sum(counts.values())
+    return total, {
+        rating: {
+            'count': counts[f'rating_{rating}'],
+            'percentage': counts[f'rating_{rating}'] * 100 / total if total else 0,
+        }
+        for rating in range(1, 6)
+    }
+
+
+def load_excursion_bundle(language, **lookup):
+    """
+    Собирает пакет без кэша: экскурсия с географией и категорией (1 запрос),
+    изображения по порядку (1), гистограмма рейтинга (1), похожие экскурсии (1)
+    и первая страница отзывов (своим кэшем; 2 запроса при промахе).
+    lookup - slug= или pk=. Excursion.DoesNotExist, если опубликованной экскурсии нет.
+    """
+    excursion = Excursion.objects.filter(status='published').select_related(
+        'city__country', 'country', 'category'
+    ).prefetch_related('images').get(**lookup)
+
+    reviews_total, rating_breakdown = _rating_histogram(excursion)
+    similar = get_similar_excursions(excursion, language, limit=SIMILAR_EXCURSIONS_LIMIT)
+
+    return {
+        'excursion': excursion,
+        'images': list(excursion.images.all()),
+        'reviews': get_review_page(excursion.pk)['results'] if reviews_total else [],
+        'reviews_total': reviews_total,
+        'rating_breakdown': rating_breakdown,
+        'similar_excursions': similar,
+        'similar_excursions_data': similar_card_data(similar),
+    }
+
+
+def get_excursion_bundle(language, slug=None, pk=None):
+    """
+    Пакет детальной страницы по slug или pk из кэша. Ключ включает версии моделей каталога,
+    поэтому любое их изменение дает новый ключ без явной инвалидации.
+    Просмотры (views_count) в кэшированном пакете могут отставать - они не сдвигают версию.
+    """
+    lookup = {'slug': slug} if slug is not None else {'pk': pk}
+    versions = get_catalog_versions(DETAIL_CATALOG_MODELS)
+    key = 'excursion_detail:{}:{}:{}'.format(
+        '&'.join(f'{field}={value}' for field, value in lookup.items()),
+        language,
+        '.'.join(str(version) for version in versions),
+    )
+    bundle = cache.get(key)
+    if bundle is None:
+        bundle = load_excursion_bundle(language, **lookup)
+        cache.set(key, bundle, getattr(settings, 'EXCURSION_DETAIL_CACHE_TIMEOUT', DEFAULT_CACHE_TIMEOUT))
+    return bundle
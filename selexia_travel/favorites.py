@@ -0,0 +1,103 @@
+"""
+Избранное: переключение одной записью в БД и пакетная синхронизация операций из SPA.
+Повторы исключают уникальные ограничения Favorite (user + элемент), поэтому
+параллельные клики не создают дублей и не требуют чтения перед записью.
+"""
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from .caching import bump_catalog_version
+from .models import Category, Country, Excursion, Favorite
+
+
+# Тип элемента -> поле Favorite; типы совпадают с Favorite.ITEM_TYPE_CHOICES
+FAVORITE_ITEM_TYPES = ('excursion', 'category', 'country')
+
+DEFAULT_SYNC_MAX_OPERATIONS = 200
+
+
+def _item_queryset(item_type):
+    """Элементы, которые можно добавить в избранное (экскурсии - только опубликованные)"""
+    if item_type == 'excursion':
+        return Excursion.objects.filter(status='published')
+    if item_type == 'category':
+        return Category.objects.all()
+    if item_type == 'country':
+        return Country.objects.all()
+    raise ValueError(f'Неизвестный тип элемента: {item_type}')
+
+
+def toggle_favorite(user, item_type, item_id):
+    """
+    Переключает элемент в избранном пользователя и возвращает, в избранном ли он теперь.
+    Удаление - DELETE по пользователю и элементу; добавление - проверка элемента и INSERT,
+    конфликт с уже вставленной параллельным запросом записью игнорируется.
+    bulk_create не отправляет post_save, поэтому версия Favorite (ETag) сдвигается здесь.
+    ValueError - неизвестный тип, DoesNotExist модели элемента - элемента нет.
+    """
+    items = _item_queryset(item_type)
+    deleted, _ = Favorite.objects.filter(user=user, **{f'{item_type}_id': item_id}).delete()
+    if deleted:
+        return False
+
+    if not items.filter(pk=item_id).exists():
+        raise items.model.DoesNotExist
+    Favorite.objects.bulk_create(
+        [Favorite(user=user, item_type=item_type, **{f'{item_type}_id': item_id})],
+        ignore_conflicts=True,
+    )
+    bump_catalog_version(Favorite)
+    return True
+
+
+def sync_favorites(user, operations):
+    """
+    Применяет пакет операций [{'op': 'add' | 'remove', 'item_type', 'item_id'}, ...] в порядке кликов.
+    Для каждого элемента действует последняя операция. В одной транзакции: один DELETE
+    для всех удалений и один INSERT для всех добавлений; несуществующие элементы пропускаются.
+    Возвращает {'added': [...], 'removed': [...], 'rejected': [...]} с парами (тип, id).
+    """
+    final = {}
+    for operation in operations:
+        final[(operation['item_type'], operation['item_id'])] = operation['op']
+
+    to_remove = {item_type: [] for item_type in FAVORITE_ITEM_TYPES}
+    to_add = {item_type: [] for item_type in FAVORITE_ITEM_TYPES}
+    for (item_type, item_id), op in final.items():
+        (to_add if op == 'add' else to_remove)[item_type].append(item_id)
+
+    # Существование добавляемых элементов - по запросу на тип, в котором есть добавления
+    rejected = []
+    for item_type, ids in to_add.items():
+        if ids:
+            existing = set(_item_queryset(item_type).filter(pk__in=ids).values_list('pk', flat=True))
+            rejected += [(item_type, item_id) for item_id in ids if item_id not in existing]
+            to_add[item_type] = [item_id for item_id in ids if item_id in existing]
+
+    removals = Q()
+    for item_type, ids in to_remove.items():
+        if ids:
+            removals |= Q(**{f'{item_type}_id__in': ids})
+
+    with transaction.atomic():
+        if removals:
+            Favorite.objects.filter(removals, user=user).delete()
+        Favorite.objects.bulk_create([
+            Favorite(user=user, item_type=item_type, **{f'{item_type}_id': item_id})
+            for item_type, ids in to_add.items()
+            for item_id in ids
+        ], ignore_conflicts=True)
+        if any(to_add.values()):
+            bump_catalog_version(Favorite)
+
+    return {
+        'added': [(item_type, item_id) for item_type, ids in to_add.items() for item_id in ids],
+        'removed': [(item_type, item_id) for item_type, ids in to_remove.items() for item_id in ids],
+        'rejected': rejected,
+    }
+
+
+def sync_max_operations():
+    return getattr(settings, 'FAVORITES_SYNC_MAX_OPERATIONS', DEFAULT_SYNC_MAX_OPERATIONS)
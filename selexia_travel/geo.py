@@ -0,0 +1,233 @@
+"""
+Гео-индекс городов: поиск экскурсий рядом / в прямоугольнике карты и кластеры для карты
+"""
+
+import math
+import threading
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Q
+
+from .caching import get_catalog_versions
+from .models import City, Excursion
+
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+DEFAULT_GRID_CELL_DEGREES = 1.0
+
+# Ячеек кластера на тайл карты 256px: примерно кластер на 64px
+CLUSTER_CELLS_PER_TILE = 4
+
+
+def haversine_km(lat, lon, lats, lons):
+    """Расстояние по дуге большого круга от точки до массива точек (градусы -> км)"""
+    lat, lon = math.radians(lat), math.radians(lon)
+    lats, lons = np.radians(lats), np.radians(lons)
+    a = (
+        np.sin((lats - lat) / 2) ** 2
+        + math.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _lon_in_range(lons, west, east):
+    """Маска долгот в диапазоне с учетом перехода через 180-й меридиан"""
+    if west <= east:
+        return (lons >= west) & (lons <= east)
+    return (lons >= west) | (lons <= east)
+
+
+class CityGeoIndex:
+    """
+    Регулярная сетка по координатам городов, у которых есть опубликованные экскурсии.
+
+    Запрос радиуса или прямоугольника просматривает только ячейки, которые
+    он покрывает, а точные расстояния считаются векторно по кандидатам.
+    """
+
+    def __init__(self, rows, cell_degrees=DEFAULT_GRID_CELL_DEGREES):
+        self.cell = cell_degrees
+        self.lon_cells = math.ceil(360 / cell_degrees)
+        self.ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.slugs = [row[1] for row in rows]
+        self.lats = np.array([row[2] for row in rows], dtype=np.float64)
+        self.lons = np.array([row[3] for row in rows], dtype=np.float64)
+        self.counts = np.array([row[4] for row in rows], dtype=np.int64)
+        self._counts_by_id = {row[0]: row[4] for row in rows}
+
+        cells = {}
+        for position, key in enumerate(zip(self._lat_cell(self.lats).tolist(), self._lon_cell(self.lons).tolist())):
+            cells.setdefault(key, []).append(position)
+        self.cells = {key: np.array(positions, dtype=np.int64) for key, positions in cells.items()}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _lat_cell(self, lats):
+        return np.floor(np.asarray(lats) / self.cell).astype(np.int64)
+
+    def _lon_cell(self, lons):
+        return np.floor(np.asarray(lons) / self.cell).astype(np.int64) % self.lon_cells
+
+    def _candidates(self, south, west, north, east):
+        """Позиции городов в ячейках, покрывающих прямоугольник"""
+        lat_cells = range(int(self._lat_cell(south)), int(self._lat_cell(north)) + 1)
+        first = int(self._lon_cell(west))
+        if west <= east:
+            lon_span = int(math.floor(east / self.cell)) - int(math.floor(west / self.cell)) + 1
+        else:
+            # Прямоугольник пересекает 180-й меридиан
+            lon_span = int(math.floor(east / self.cell)) + self.lon_cells - int(math.floor(west / self.cell)) + 1
+        lon_span = min(lon_span, self.lon_cells)
+        if len(lat_cells) * lon_span >= len(self.cells):
+            return np.arange(len(self.ids))
+
+        lon_cells = [(first + step) % self.lon_cells for step in range(lon_span)]
+        parts = [
+            self.cells[(lat_cell, lon_cell)]
+            for lat_cell in lat_cells for lon_cell in lon_cells
+            if (lat_cell, lon_cell) in self.cells
+        ]
+        return np.concatenate(parts) if parts else np.array([], dtype=np.int64)
+
+    def within_radius(self, lat, lon, radius_km):
+        """[(city_id, расстояние км)] в радиусе, по возрастанию расстояния"""
+        lat_span = radius_km / KM_PER_DEGREE
+        cos_lat = math.cos(math.radians(lat))
+        lon_span = 180.0 if cos_lat < 1e-6 else min(radius_km / (KM_PER_DEGREE * cos_lat), 180.0)
+        south, north = max(lat - lat_span, -90.0), min(lat + lat_span, 90.0)
+        if lon_span >= 180.0 or south <= -90.0 or north >= 90.0:
+            west, east = -180.0, 180.0
+        else:
+            west = (lon - lon_span + 180.0) % 360.0 - 180.0
+            east = (lon + lon_span + 180.0) % 360.0 - 180.0
+
+        candidates = self._candidates(south, west, north, east)
+        distances = haversine_km(lat, lon, self.lats[candidates], self.lons[candidates])
+        inside = distances <= radius_km
+        candidates, distances = candidates[inside], distances[inside]
+        order = np.argsort(distances, kind='stable')
+        return [(int(self.ids[i]), float(d)) for i, d in zip(candidates[order], distances[order])]
+
+    def within_bbox(self, south, west, north, east, center=None):
+        """[(city_id, расстояние км от центра)] в прямоугольнике, по возрастанию расстояния"""
+        candidates = self._candidates(south, west, north, east)
+        lats, lons = self.lats[candidates], self.lons[candidates]
+        inside = (lats >= south) & (lats <= north) & _lon_in_range(lons, west, east)
+        candidates = candidates[inside]
+
+        if center is None:
+            center_lon = (west + ((east - west) % 360.0) / 2 + 180.0) % 360.0 - 180.0
+            center = ((south + north) / 2, center_lon)
+        distances = haversine_km(center[0], center[1], self.lats[candidates], self.lons[candidates])
+        order = np.argsort(distances, kind='stable')
+        return [(int(self.ids[i]), float(d)) for i, d in zip(candidates[order], distances[order])]
+
+    def excursions_count(self, city_id):
+        """Количество опубликованных экскурсий города"""
+        return self._counts_by_id.get(city_id, 0)
+
+    def clusters(self, zoom, bbox=None):
+        """
+        Кластеры для карты: города группируются в ячейки, размер которых зависит от zoom.
+        Центр кластера - среднее координат, взвешенное количеством экскурсий.
+        """
+        positions = np.arange(len(self.ids))
+        if bbox is not None:
+            south, west, north, east = bbox
+            positions = self._candidates(south, west, north, east)
+            lats, lons = self.lats[positions], self.lons[positions]
+            positions = positions[(lats >= south) & (lats <= north) & _lon_in_range(lons, west, east)]
+        if not len(positions):
+            return []
+
+        cell = 360.0 / (2 ** zoom) / CLUSTER_CELLS_PER_TILE
+        keys = np.stack([
+            np.floor(self.lats[positions] / cell),
+            np.floor(self.lons[positions] / cell),
+        ], axis=1)
+        unique_keys, groups = np.unique(keys, axis=0, return_inverse=True)
+        groups = groups.reshape(-1)
+
+        weights = self.counts[positions].astype(np.float64)
+        totals = np.bincount(groups, weights=weights, minlength=len(unique_keys))
+        lat_sums = np.bincount(groups, weights=weights * self.lats[positions], minlength=len(unique_keys))
+        lon_sums = np.bincount(groups, weights=weights * self.lons[positions], minlength=len(unique_keys))
+        cities = np.bincount(groups, minlength=len(unique_keys))
+
+        result = []
+        for group in np.argsort(-totals, kind='stable'):
+            cluster = {
+                'lat': round(float(lat_sums[group] / totals[group]), 5),
+                'lon': round(float(lon_sums[group] / totals[group]), 5),
+                'count': int(totals[group]),
+                'cities': int(cities[group]),
+            }
+            if cities[group] == 1:
+                cluster['city'] = self.slugs[int(positions[groups == group][0])]
+            result.append(cluster)
+        return result
+
+
+def nearby_excursions(city_distances, language, limit):
+    """
+    Опубликованные экскурсии городов по возрастанию расстояния, затем по популярности.
+    Запрашиваются только ближайшие города, в которых набирается limit экскурсий.
+    """
+    index = get_city_geo_index()
+    distances = {}
+    total = 0
+    for city_id, distance in city_distances:
+        if total >= limit:
+            break
+        distances[city_id] = distance
+        total += index.excursions_count(city_id)
+    if not distances:
+        return []
+
+    excursions = list(
+        Excursion.objects.filter(status='published', city_id__in=distances).localized(
+            language, 'title', related=('city', 'country')
+        ).only(
+            'id', 'slug', 'price', 'currency', 'rating', 'city_id', 'popularity_score'
+        ).with_main_image()
+    )
+    excursions.sort(key=lambda excursion: (distances[excursion.city_id], -excursion.popularity_score))
+    for excursion in excursions:
+        excursion.distance_km = round(distances[excursion.city_id], 1)
+    return excursions[:limit]
+
+
+_index = None
+_index_versions = None
+_index_lock = threading.Lock()
+
+
+def _build_index():
+    rows = City.objects.filter(
+        latitude__isnull=False, longitude__isnull=False
+    ).annotate(
+        published_total=Count('excursions', filter=Q(excursions__status='published'))
+    ).filter(published_total__gt=0).values_list('id', 'slug', 'latitude', 'longitude', 'published_total')
+    return CityGeoIndex(
+        [(pk, slug, float(lat), float(lon), total) for pk, slug, lat, lon, total in rows],
+        cell_degrees=getattr(settings, 'GEO_GRID_CELL_DEGREES', DEFAULT_GRID_CELL_DEGREES),
+    )
+
+
+def get_city_geo_index():
+    """
+    Индекс текущего процесса. Пересобирается, когда меняется версия City
+    или Excursion (координаты городов, публикация экскурсий).
+    """
+    global _index, _index_versions
+    versions = get_catalog_versions((City, Excursion))
+    if _index is not None and _index_versions == versions:
+        return _index
+    with _index_lock:
+        if _index is None or _index_versions != versions:
+            _index = _build_index()
+            _index_versions = versions
+    return _index
@@ -4,15 +4,71 @@
 
 import os
 import json
-import requests
-from datetime import datetime, timedelta
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
 from django.conf import settings
+from django.db.models import Q
 from django.utils import timezone
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+
+from .caching import shared_cache
+from .models import GmailCredentials
+
+# Клиентские библиотеки Google импортируются внутри методов: модуль нужен лишь
+# немногим запросам Gmail, и воркерам (--preload) незачем держать их в памяти
+
+DEFAULT_API_ROOT_URL = 'https://gmail.googleapis.com/'
+DEFAULT_TOKEN_URI = 'https://oauth2.googleapis.com/token'
+DEFAULT_MESSAGES_CACHE_TIMEOUT = 60 * 5
+
+# Gmail не рекомендует batch-запросы больше 50 вложенных запросов
+DEFAULT_BATCH_SIZE = 50
+
+# Для списка писем нужны только эти заголовки: format=metadata не передает тело письма
+MESSAGE_METADATA_HEADERS = ('Subject', 'From', 'Date')
+
+# Токен, истекающий раньше чем через этот запас, обновляем заранее
+TOKEN_EXPIRY_MARGIN = timedelta(minutes=1)
+
+# Обновление токена одного пользователя - только в одном потоке процесса (полосы блокировок по user_id).
+# Между процессами повтор возможен (не больше одного на процесс): запись условная и не затирает
+# более свежий токен
+_REFRESH_LOCKS = tuple(threading.Lock() for _ in range(64))
+
+
+def api_root_url():
+    """Корень Gmail API (в тестах - адрес локальной подмены Gmail)"""
+    return getattr(settings, 'GMAIL_API_ROOT_URL', DEFAULT_API_ROOT_URL)
+
+
+def token_uri():
+    return getattr(settings, 'GMAIL_TOKEN_URI', DEFAULT_TOKEN_URI)
+
+
+def messages_cache_key(user_id):
+    return f'gmail:messages:{user_id}'
+
+
+def invalidate_gmail_messages(user_id):
+    """Сбрасывает кэш писем пользователя во всех воркерах (подключение и отключение Gmail)"""
+    shared_cache().delete(messages_cache_key(user_id))
+
+
+def _as_utc_naive(value):
+    """google-auth сравнивает expiry с наивным UTC"""
+    if value is not None and timezone.is_aware(value):
+        return timezone.make_naive(value, dt_timezone.utc)
+    return value
+
+
+def _message_summary(message):
+    headers = {header['name']: header['value'] for header in message.get('payload', {}).get('headers', [])}
+    return {
+        'id': message['id'],
+        'subject': headers.get('Subject', ''),
+        'sender': headers.get('From', ''),
+        'date': headers.get('Date', ''),
+        'snippet': message.get('snippet', ''),
+    }
 
 
 class GmailProfileUpdater:
@@ -29,23 +85,40 @@ class GmailProfileUpdater:
         self.credentials_file = getattr(settings, 'GMAIL_CREDENTIALS_FILE', 'credentials.json')
         self.token_file = getattr(settings, 'GMAIL_TOKEN_FILE', 'token.json')
         
+    def _credentials(self, stored):
+        """OAuth-учетные данные google-auth из сохраненных токенов"""
+        from google.oauth2.credentials import Credentials
+
+        return Credentials(
+            token=stored.access_token,
+            refresh_token=stored.refresh_token,
+            token_uri=token_uri(),
+            client_id=settings.GMAIL_CLIENT_ID,
+            client_secret=settings.GMAIL_CLIENT_SECRET,
+            scopes=self.SCOPES,
+            expiry=_as_utc_naive(stored.token_expiry),
+        )
+    
     def get_gmail_service(self, user):
         """Получает сервис Gmail для пользователя"""
         try:
+            from googleapiclient.discovery import build
+
             if user.needs_gmail_refresh():
                 if not self.refresh_user_token(user):
                     return None
             
-            credentials = Credentials(
-                token=user.gmail_access_token,
-                refresh_token=user.gmail_refresh_token,
-                token_uri="https://oauth2.googleapis.com/token",
-                client_id=settings.GMAIL_CLIENT_ID,
-                client_secret=settings.GMAIL_CLIENT_SECRET,
-                scopes=self.SCOPES
-            )
+            stored = user.get_gmail_credentials()
+            if not stored:
+                return None
             
-            service = build('gmail', 'v1', credentials=credentials)
+            # Описание API встроено в библиотеку (static discovery): сеть нужна только самим запросам
+            service = build(
+                'gmail', 'v1',
+                credentials=self._credentials(stored),
+                client_options={'api_endpoint': api_root_url()},
+                cache_discovery=False,
+            )
             return service
             
         except Exception as e:
@@ -54,6 +127,8 @@ class GmailProfileUpdater:
     
     def get_user_profile(self, user):
         """Получает профиль пользователя из Gmail"""
+        from googleapiclient.errors import HttpError
+
         try:
             service = self.get_gmail_service(user)
             if not service:
@@ -62,9 +137,6 @@ class GmailProfileUpdater:
             # Получаем профиль пользователя
             profile = service.users().getProfile(userId='me').execute()
             
-            # Получаем дополнительную информацию о пользователе
-            user_info = service.users().getProfile(userId='me').execute()
-            
             return {
                 'email': profile.get('emailAddress'),
                 'name': profile.get('name'),
@@ -111,79 +183,108 @@ class GmailProfileUpdater:
             return False
     
     def refresh_user_token(self, user):
-        """Обновляет токен доступа пользователя"""
+        """
+        Обновляет токен доступа пользователя. Параллельные запросы одного пользователя
+        не обновляют токен повторно: они ждут первый и используют его результат.
+        Запрос к Google идет вне транзакции и без блокировки строки в БД.
+        """
         try:
-            if not user.gmail_refresh_token:
-                return False
-            
-            credentials = Credentials(
-                token=user.gmail_access_token,
-                refresh_token=user.gmail_refresh_token,
-                token_uri="https://oauth2.googleapis.com/token",
-                client_id=settings.GMAIL_CLIENT_ID,
-                client_secret=settings.GMAIL_CLIENT_SECRET,
-                scopes=self.SCOPES
-            )
-            
-            # Обновляем токен
-            if credentials and credentials.expired and credentials.refresh_token:
-                credentials.refresh(Request())
+            from google.auth.transport.requests import Request
+
+            with _REFRESH_LOCKS[user.pk % len(_REFRESH_LOCKS)]:
+                stored = GmailCredentials.objects.filter(user=user).first()
+                if not stored or not stored.refresh_token:
+                    return False
                 
-                # Сохраняем новый токен
-                user.gmail_access_token = credentials.token
-                user.gmail_token_expiry = timezone.now() + timedelta(hours=1)
-                user.save(update_fields=['gmail_access_token', 'gmail_token_expiry'])
+                # Пока ждали блокировку, токен мог обновить параллельный запрос
+                if stored.token_expiry and stored.token_expiry - TOKEN_EXPIRY_MARGIN > timezone.now():
+                    user.gmail_credentials = stored
+                    return True
                 
-                print(f"Токен пользователя {user.email} обновлен")
-                return True
+                credentials = self._credentials(stored)
+                credentials.refresh(Request())
+                token_expiry = (
+                    timezone.make_aware(credentials.expiry, dt_timezone.utc) if credentials.expiry
+                    else timezone.now() + timedelta(hours=1)
+                )
+                
+                # Сохраняем новый токен одним UPDATE, если другой процесс не сохранил более свежий
+                updated = GmailCredentials.objects.filter(
+                    Q(token_expiry__isnull=True) | Q(token_expiry__lt=token_expiry), pk=stored.pk
+                ).update(access_token=credentials.token, token_expiry=token_expiry, updated_at=timezone.now())
+                if updated:
+                    stored.access_token = credentials.token
+                    stored.token_expiry = token_expiry
+                else:
+                    stored.refresh_from_db(fields=['access_token', 'token_expiry'])
+                user.gmail_credentials = stored
             
-            return False
+            print(f"Токен пользователя {user.email} обновлен")
+            return True
             
         except Exception as e:
             print(f"Ошибка при обновлении токена: {e}")
             return False
     
+    def _fetch_message_headers(self, service, message_ids):
+        """
+        Заголовки и сниппеты писем batch-запросами (до GMAIL_BATCH_SIZE писем за один HTTP-запрос)
+        вместо отдельного запроса на каждое письмо. Письма, которые не удалось получить, пропускаются.
+        """
+        from googleapiclient.http import BatchHttpRequest
+
+        fetched = {}
+
+        def collect(request_id, response, exception):
+            if exception is not None:
+                print(f'Ошибка Gmail API для письма {request_id}: {exception}')
+            else:
+                fetched[request_id] = response
+
+        batch_size = getattr(settings, 'GMAIL_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+        messages = service.users().messages()
+        for start in range(0, len(message_ids), batch_size):
+            # batch_uri явно: библиотека берет его из встроенного описания API, а не из api_endpoint
+            batch = BatchHttpRequest(callback=collect, batch_uri=f'{api_root_url()}batch/gmail/v1')
+            for message_id in message_ids[start:start + batch_size]:
+                batch.add(messages.get(
+                    userId='me',
+                    id=message_id,
+                    format='metadata',
+                    metadataHeaders=list(MESSAGE_METADATA_HEADERS),
+                    fields='id,snippet,payload/headers',
+                ), request_id=message_id)
+            batch.execute()
+
+        return [_message_summary(fetched[message_id]) for message_id in message_ids if message_id in fetched]
+    
     def get_gmail_messages(self, user, max_results=10):
-        """Получает последние сообщения Gmail пользователя"""
+        """
+        Получает последние сообщения Gmail пользователя: список id и один batch-запрос заголовков.
+        Результат кэшируется на GMAIL_MESSAGES_CACHE_TIMEOUT; запрос меньшего числа писем берется из кэша.
+        """
+        from googleapiclient.errors import HttpError
+
+        cache = shared_cache()
+        key = messages_cache_key(user.pk)
+        cached = cache.get(key)
+        if cached is not None and cached['max_results'] >= max_results:
+            return cached['messages'][:max_results]
+
         try:
             service = self.get_gmail_service(user)
             if not service:
                 return []
             
-            # Получаем список сообщений
+            # Получаем список сообщений (только id)
             results = service.users().messages().list(
                 userId='me', 
-                maxResults=max_results
+                maxResults=max_results,
+                fields='messages/id'
             ).execute()
             
-            messages = results.get('messages', [])
-            
-            if not messages:
-                return []
-            
-            # Получаем детали сообщений
-            detailed_messages = []
-            for message in messages:
-                msg = service.users().messages().get(
-                    userId='me', 
-                    id=message['id']
-                ).execute()
-                
-                # Извлекаем заголовки
-                headers = msg['payload']['headers']
-                subject = next((h['value'] for h in headers if h['name'] == 'Subject'), '')
-                sender = next((h['value'] for h in headers if h['name'] == 'From'), '')
-                date = next((h['value'] for h in headers if h['name'] == 'Date'), '')
-                
-                detailed_messages.append({
-                    'id': message['id'],
-                    'subject': subject,
-                    'sender': sender,
-                    'date': date,
-                    'snippet': msg.get('snippet', '')
-                })
-            
-            return detailed_messages
+            message_ids = [message['id'] for message in results.get('messages', [])]
+            messages = self._fetch_message_headers(service, message_ids) if message_ids else []
             
         except HttpError as error:
             print(f'Ошибка Gmail API: {error}')
@@ -192,6 +293,12 @@ class GmailProfileUpdater:
             print(f"Ошибка при получении сообщений Gmail: {e}")
             return []
 
+        cache.set(
+            key, {'max_results': max_results, 'messages': messages},
+            getattr(settings, 'GMAIL_MESSAGES_CACHE_TIMEOUT', DEFAULT_MESSAGES_CACHE_TIMEOUT)
+        )
+        return messages
+
 
 class GmailOAuthHelper:
     """Помощник для OAuth аутентификации Gmail"""
@@ -203,6 +310,8 @@ class GmailOAuthHelper:
     def get_authorization_url(self):
         """Получает URL для авторизации Gmail"""
         try:
+            from google_auth_oauthlib.flow import InstalledAppFlow
+
             if not os.path.exists(self.credentials_file):
                 print(f"Файл {self.credentials_file} не найден")
                 return None
@@ -0,0 +1,107 @@
+"""
+Аудит импорта при загрузке воркера: запускает отдельный интерпретатор с -X importtime,
+импортирует то же, что Gunicorn с --preload (ASGI-приложение и URLconf), и собирает
+время импорта по модулям и пакетам, пиковую память и список загруженных "тяжелых" модулей
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+
+
+# Модули, которые веб-воркер не должен загружать при старте (нужны редким запросам и командам)
+DEFAULT_FORBIDDEN_MODULES = (
+    'PIL',
+    'numpy',
+    'googleapiclient',
+    'google_auth_oauthlib',
+    'google.oauth2',
+)
+
+RESULT_MARKER = 'IMPORT_AUDIT_RESULT:'
+
+# __import__ вместо importlib.import_module: -X importtime не видит импорты через importlib,
+# поэтому settings и models (их грузит сам Django) учитываются только в общем времени загрузки
+_CHILD_SCRIPT = '''
+import json, resource, sys, time
+started = time.perf_counter()
+for name in sys.argv[1:]:
+    __import__(name)
+from django.urls import get_resolver
+get_resolver().url_patterns
+print({marker!r} + json.dumps({{
+    'boot_seconds': time.perf_counter() - started,
+    'modules': sorted(sys.modules),
+    'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}}))
+'''
+
+
+def boot_modules():
+    """Что импортирует воркер при старте: ASGI-приложение (django.setup) и URLconf"""
+    return ['selexia_travel.asgi', settings.ROOT_URLCONF]
+
+
+def forbidden_modules():
+    return tuple(getattr(settings, 'IMPORT_AUDIT_FORBIDDEN_MODULES', DEFAULT_FORBIDDEN_MODULES))
+
+
+def parse_importtime(stderr):
+    """
+    Строки "import time: self [us] | cumulative | imported package" в список
+    (модуль, глубина вложенности, собственное время, накопленное время) в микросекундах
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+            self_us, cumulative_us = int(self_us), int(cumulative_us)
+        except ValueError:
+            continue  # заголовок таблицы
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        entries.append((name.strip(), depth, self_us, cumulative_us))
+    return entries
+
+
+def run_import_audit(modules=None):
+    """
+    Импортирует modules в чистом интерпретаторе и возвращает отчет:
+    entries (см. parse_importtime), packages {пакет верхнего уровня: собственное время},
+    boot_seconds (вся загрузка, включая settings и models), max_rss_kb
+    и loaded_forbidden - загруженные модули из IMPORT_AUDIT_FORBIDDEN_MODULES.
+    """
+    modules = list(modules or boot_modules())
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'selexia_travel.settings')}
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _CHILD_SCRIPT.format(marker=RESULT_MARKER), *modules],
+        capture_output=True, text=True, env=env, cwd=str(settings.BASE_DIR),
+    )
+    result_line = next(
+        (line for line in reversed(process.stdout.splitlines()) if line.startswith(RESULT_MARKER)), None
+    )
+    if process.returncode != 0 or result_line is None:
+        errors = [line for line in process.stderr.splitlines() if not line.startswith('import time:')]
+        raise RuntimeError('Не удалось выполнить аудит импорта:\n' + '\n'.join(errors[-20:]))
+
+    result = json.loads(result_line[len(RESULT_MARKER):])
+    entries = parse_importtime(process.stderr)
+
+    packages = {}
+    for name, _depth, self_us, _cumulative_us in entries:
+        package = name.split('.', 1)[0]
+        packages[package] = packages.get(package, 0) + self_us
+
+    loaded = set(result['modules'])
+    return {
+        'modules': modules,
+        'entries': entries,
+        'packages': packages,
+        'boot_seconds': result['boot_seconds'],
+        'max_rss_kb': result['max_rss_kb'],
+        'loaded_forbidden': [name for name in forbidden_modules() if name in loaded],
+    }
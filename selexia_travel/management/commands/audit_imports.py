@@ -0,0 +1,80 @@
+"""
+Аудит времени импорта при старте воркера (аналог python -X importtime с агрегацией).
+С порогами работает как регрессионная проверка: код выхода 1, если старт стал тяжелее.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from selexia_travel.import_audit import run_import_audit
+
+
+class Command(BaseCommand):
+    help = 'Показывает накопленное время импорта по модулям и пакетам при загрузке воркера'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--module', '-m',
+            action='append',
+            dest='modules',
+            help='Модуль для импорта (можно несколько); по умолчанию ASGI-приложение и URLconf'
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=25,
+            help='Сколько самых дорогих модулей и пакетов показать'
+        )
+        parser.add_argument(
+            '--max-boot-ms',
+            type=float,
+            dest='max_boot_ms',
+            help='Порог времени загрузки воркера (импорт приложения и URLconf), мс'
+        )
+        parser.add_argument(
+            '--max-rss-mb',
+            type=float,
+            dest='max_rss_mb',
+            help='Порог пиковой памяти процесса после загрузки, МБ'
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Ошибка, если загружен модуль из IMPORT_AUDIT_FORBIDDEN_MODULES или превышен порог'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('🔍 Аудит импорта при старте воркера...')
+        try:
+            report = run_import_audit(options['modules'])
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        top = options['top']
+        self.stdout.write(f"\n📦 Модули: {', '.join(report['modules'])}")
+
+        self.stdout.write(f'\n⏱️ Модули по накопленному времени (топ {top}):')
+        for name, depth, self_us, cumulative_us in sorted(report['entries'], key=lambda entry: -entry[3])[:top]:
+            self.stdout.write(f'   {cumulative_us / 1000:8.1f} мс  (своё {self_us / 1000:6.1f})  {name}')
+
+        self.stdout.write(f'\n📊 Пакеты по собственному времени (топ {top}):')
+        for package, self_us in sorted(report['packages'].items(), key=lambda item: -item[1])[:top]:
+            self.stdout.write(f'   {self_us / 1000:8.1f} мс  {package}')
+
+        boot_ms = report['boot_seconds'] * 1000
+        rss_mb = report['max_rss_kb'] / 1024
+        self.stdout.write(f'\n📈 Загрузка воркера: {boot_ms:.1f} мс, пиковая память: {rss_mb:.1f} МБ')
+
+        problems = []
+        if report['loaded_forbidden']:
+            problems.append(f"загружены тяжелые модули: {', '.join(report['loaded_forbidden'])}")
+        if options['max_boot_ms'] is not None and boot_ms > options['max_boot_ms']:
+            problems.append(f"время загрузки {boot_ms:.1f} мс > {options['max_boot_ms']} мс")
+        if options['max_rss_mb'] is not None and rss_mb > options['max_rss_mb']:
+            problems.append(f"память {rss_mb:.1f} МБ > {options['max_rss_mb']} МБ")
+
+        for problem in problems:
+            self.stdout.write(self.style.WARNING(f'⚠️ {problem.capitalize()}'))
+        if problems and (options['check'] or options['max_boot_ms'] is not None or options['max_rss_mb'] is not None):
+            raise CommandError('Регрессия времени старта воркера')
+        if not problems:
+            self.stdout.write(self.style.SUCCESS('✅ Старт воркера в пределах порогов'))
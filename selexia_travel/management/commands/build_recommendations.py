@@ -0,0 +1,29 @@
+"""
+Пакетный расчет похожих экскурсий (запускать по расписанию, например раз в сутки)
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from selexia_travel.recommendations import rebuild_neighbor_table
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает таблицу похожих экскурсий (ExcursionNeighbor)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--neighbors', '-k',
+            type=int,
+            dest='neighbors',
+            help='Количество похожих экскурсий на каждую (по умолчанию RECOMMENDATION_NEIGHBORS_COUNT)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('🧭 Расчет похожих экскурсий...')
+        started = time.monotonic()
+        count = rebuild_neighbor_table(k=options['neighbors'])
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Сохранено связей: {count} за {time.monotonic() - started:.2f} с'
+        ))
@@ -1,17 +1,18 @@
 """
 Кастомная команда Django для компиляции переводов без GNU gettext
-Использует babel для компиляции .po файлов в .mo
+Использует babel: все домены локали (django, messages, models, ui, vue)
+сливаются в один django.mo, строки фронтенда - в JSON-каталог static/i18n/<lang>.json
 """
 
 from django.core.management.base import BaseCommand
 from django.conf import settings
 from pathlib import Path
-from babel.messages.pofile import read_po
-from babel.messages.mofile import write_mo
+
+from selexia_travel.translations import build_locale
 
 
 class Command(BaseCommand):
-    help = 'Компилирует .po файлы в .mo файлы используя babel (без GNU gettext)'
+    help = 'Компилирует .po файлы в один .mo и JSON-каталог на язык используя babel (без GNU gettext)'
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -25,6 +26,12 @@ class Command(BaseCommand):
             dest='all',
             help='Компилирует файлы для всех локалей'
         )
+        parser.add_argument(
+            '--force', '-f',
+            action='store_true',
+            dest='force',
+            help='Пересобирает переводы, даже если .po файлы не менялись'
+        )
 
     def handle(self, *args, **options):
         self.stdout.write('🚀 Начинаю компиляцию переводов...')
@@ -35,6 +42,7 @@ class Command(BaseCommand):
             return
         
         success_count = 0
+        skipped_count = 0
         total_count = 0
         
         for locale_path in locale_paths:
@@ -55,38 +63,33 @@ class Command(BaseCommand):
             
             for locale in locales_to_compile:
                 lc_messages_dir = locale_path / locale / 'LC_MESSAGES'
-                if lc_messages_dir.exists():
-                    po_file = lc_messages_dir / 'django.po'
-                    mo_file = lc_messages_dir / 'django.mo'
-                    
-                    if po_file.exists():
-                        total_count += 1
-                        if self._compile_po_to_mo(po_file, mo_file):
-                            success_count += 1
+                if lc_messages_dir.exists() and any(lc_messages_dir.glob('*.po')):
+                    total_count += 1
+                    result = self._compile_locale(lc_messages_dir, locale, options['force'])
+                    if result is not None:
+                        success_count += 1
+                        skipped_count += int(result)
         
         self.stdout.write(f"\n📊 Результат компиляции:")
-        self.stdout.write(f"✅ Успешно: {success_count}/{total_count}")
+        self.stdout.write(f"✅ Успешно: {success_count}/{total_count} (без изменений: {skipped_count})")
         
         if success_count == total_count:
             self.stdout.write(self.style.SUCCESS('🎉 Все переводы успешно скомпилированы!'))
         else:
             self.stdout.write(self.style.WARNING('⚠️ Некоторые переводы не удалось скомпилировать'))
 
-    def _compile_po_to_mo(self, po_file_path, mo_file_path):
-        """Компилирует .po файл в .mo файл"""
+    def _compile_locale(self, lc_messages_dir, locale, force):
+        """Собирает локаль; возвращает True если пропущена, False если собрана, None при ошибке"""
         try:
-            # Читаем .po файл
-            with open(po_file_path, 'r', encoding='utf-8') as f:
-                catalog = read_po(f)
-            
-            # Записываем .mo файл
-            with open(mo_file_path, 'wb') as f:
-                write_mo(f, catalog)
-            
-            self.stdout.write(f"✅ Скомпилирован: {po_file_path} -> {mo_file_path}")
-            return True
+            json_path, skipped = build_locale(lc_messages_dir, locale, force=force)
         except Exception as e:
             self.stdout.write(
-                self.style.ERROR(f"❌ Ошибка компиляции {po_file_path}: {e}")
+                self.style.ERROR(f"❌ Ошибка компиляции {lc_messages_dir}: {e}")
             )
-            return False
+            return None
+
+        if skipped:
+            self.stdout.write(f"⏭️ Без изменений: {lc_messages_dir}")
+        else:
+            self.stdout.write(f"✅ Скомпилирован: {lc_messages_dir} -> django.mo, {json_path}")
+        return skipped
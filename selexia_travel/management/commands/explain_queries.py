@@ -0,0 +1,52 @@
+"""
+Планы и время типовых запросов каталога, кабинета и лент (см. query_plans.py).
+Используется для проверки индексов: до и после миграции планы сравниваются в DATABASE_INDEXES.md.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from selexia_travel.query_plans import QUERY_SHAPES, explain_query_shapes
+
+
+class Command(BaseCommand):
+    help = 'Показывает EXPLAIN и время выполнения типовых запросов каталога'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--shape', '-s',
+            action='append',
+            dest='shapes',
+            help=f"Запрос (можно несколько): {', '.join(QUERY_SHAPES)}; по умолчанию все"
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Сколько раз выполнить каждый запрос для замера (медиана и минимум)'
+        )
+        parser.add_argument(
+            '--no-plan',
+            action='store_true',
+            dest='no_plan',
+            help='Только таблица времени, без планов'
+        )
+
+    def handle(self, *args, **options):
+        unknown = [name for name in options['shapes'] or [] if name not in QUERY_SHAPES]
+        if unknown:
+            raise CommandError(f"Неизвестные запросы: {', '.join(unknown)}")
+
+        self.stdout.write(f'🔍 Планы запросов ({connection.vendor})...')
+        results = explain_query_shapes(options['shapes'], options['repeat'])
+
+        if not options['no_plan']:
+            for name, plan, _median, _best, _rows in results:
+                self.stdout.write(f'\n📋 {name}')
+                for line in plan.splitlines():
+                    self.stdout.write(f'   {line}')
+
+        self.stdout.write(f"\n⏱️ Время, мс (повторов: {options['repeat']}):")
+        self.stdout.write(f"   {'запрос':<22} {'медиана':>9} {'минимум':>9} {'строк':>7}")
+        for name, _plan, median, best, rows in results:
+            self.stdout.write(f'   {name:<22} {median:9.2f} {best:9.2f} {rows:7}')
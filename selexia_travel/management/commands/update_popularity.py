@@ -0,0 +1,59 @@
+"""
+Периодический пересчет популярности экскурсий.
+Расписание: cron-сервис Railway (`python manage.py update_popularity`, раз в час)
+или процесс worker из Procfile (`--every 60`), см. RAILWAY_DEPLOYMENT.md
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from selexia_travel.popularity import update_popularity_scores
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает затухающий скор популярности экскурсий и флаг is_popular'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            dest='batch_size',
+            help='Размер пакета bulk_update'
+        )
+        parser.add_argument(
+            '--every',
+            type=float,
+            default=None,
+            metavar='MINUTES',
+            help='Не завершаться: пересчитывать каждые MINUTES минут (процесс worker)'
+        )
+
+    def handle(self, *args, **options):
+        if options['every'] is None:
+            self.update(options['batch_size'])
+            return
+
+        interval = options['every'] * 60
+        self.stdout.write(f'⏰ Пересчет популярности каждые {options["every"]:g} мин')
+        while True:
+            started = time.monotonic()
+            try:
+                self.update(options['batch_size'])
+            except Exception as e:
+                # Ошибка одного запуска (например, недоступная БД) не останавливает процесс
+                self.stderr.write(f'❌ Ошибка пересчета популярности: {e}')
+            finally:
+                # Соединение не держим открытым до следующего запуска
+                connections.close_all()
+            time.sleep(max(interval - (time.monotonic() - started), 0))
+
+    def update(self, batch_size):
+        self.stdout.write('📈 Пересчет популярности экскурсий...')
+        started = time.monotonic()
+        count = update_popularity_scores(batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Обновлено экскурсий: {count} за {time.monotonic() - started:.2f} с'
+        ))
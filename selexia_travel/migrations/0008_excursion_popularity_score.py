@@ -0,0 +1,49 @@
+# Generated by Django 4.2.10 on 2026-10-19 12:27
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def seed_popularity(apps, schema_editor):
+    """Начальный скор - накопленные просмотры (до первого запуска update_popularity)"""
+    Excursion = apps.get_model('selexia_travel', 'Excursion')
+    Excursion.objects.update(
+        popularity_score=F('views_count'),
+        trending_views=F('views_count'),
+        views_count_scored=F('views_count'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('selexia_travel', '0007_add_gmail_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='excursion',
+            name='popularity_score',
+            field=models.FloatField(default=0, verbose_name='Скор популярности'),
+        ),
+        migrations.AddField(
+            model_name='excursion',
+            name='popularity_updated_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Скор пересчитан'),
+        ),
+        migrations.AddField(
+            model_name='excursion',
+            name='trending_views',
+            field=models.FloatField(default=0, verbose_name='Затухающие просмотры'),
+        ),
+        migrations.AddField(
+            model_name='excursion',
+            name='views_count_scored',
+            field=models.PositiveIntegerField(default=0, verbose_name='Просмотры на момент расчета'),
+        ),
+        migrations.AddIndex(
+            model_name='excursion',
+            index=models.Index(fields=['status', '-popularity_score'], name='excursion_status_popularity'),
+        ),
+        migrations.RunPython(seed_popularity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.10 on 2026-10-19 12:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('selexia_travel', '0008_excursion_popularity_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExcursionNeighbor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='Позиция')),
+                ('score', models.FloatField(verbose_name='Сходство')),
+                ('excursion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbors', to='selexia_travel.excursion', verbose_name='Экскурсия')),
+                ('neighbor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbor_of', to='selexia_travel.excursion', verbose_name='Похожая экскурсия')),
+            ],
+            options={
+                'verbose_name': 'Похожая экскурсия',
+                'verbose_name_plural': 'Похожие экскурсии',
+                'ordering': ['excursion', 'rank'],
+                'indexes': [models.Index(fields=['excursion', 'rank'], name='selexia_tra_excursi_663062_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='excursionneighbor',
+            constraint=models.UniqueConstraint(fields=('excursion', 'neighbor'), name='unique_excursion_neighbor'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.10 on 2026-10-19 12:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('selexia_travel', '0009_excursion_neighbor'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['excursion', 'is_approved', '-created_at', '-id'], name='review_excursion_feed'),
+        ),
+    ]
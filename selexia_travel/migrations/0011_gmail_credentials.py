@@ -0,0 +1,67 @@
+# Generated by Django 4.2.10 on 2026-10-19 12:41
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def move_tokens_to_credentials(apps, schema_editor):
+    """Переносит Gmail-токены подключенных пользователей в GmailCredentials"""
+    User = apps.get_model('selexia_travel', 'User')
+    GmailCredentials = apps.get_model('selexia_travel', 'GmailCredentials')
+    users = User.objects.exclude(
+        gmail_access_token__isnull=True, gmail_refresh_token__isnull=True
+    ).values_list('pk', 'gmail_access_token', 'gmail_refresh_token', 'gmail_token_expiry')
+    GmailCredentials.objects.bulk_create([
+        GmailCredentials(user_id=pk, access_token=access, refresh_token=refresh, token_expiry=expiry)
+        for pk, access, refresh, expiry in users.iterator()
+    ], batch_size=500)
+
+
+def move_tokens_to_user(apps, schema_editor):
+    """Обратный перенос токенов в поля User"""
+    User = apps.get_model('selexia_travel', 'User')
+    GmailCredentials = apps.get_model('selexia_travel', 'GmailCredentials')
+    for credentials in GmailCredentials.objects.iterator():
+        User.objects.filter(pk=credentials.user_id).update(
+            gmail_access_token=credentials.access_token,
+            gmail_refresh_token=credentials.refresh_token,
+            gmail_token_expiry=credentials.token_expiry,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('selexia_travel', '0010_review_feed_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GmailCredentials',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='gmail_credentials', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('access_token', models.TextField(blank=True, null=True, verbose_name='Gmail Access Token')),
+                ('refresh_token', models.TextField(blank=True, null=True, verbose_name='Gmail Refresh Token')),
+                ('token_expiry', models.DateTimeField(blank=True, null=True, verbose_name='Gmail Token Expiry')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+            ],
+            options={
+                'verbose_name': 'Gmail токены',
+                'verbose_name_plural': 'Gmail токены',
+            },
+        ),
+        migrations.RunPython(move_tokens_to_credentials, move_tokens_to_user),
+        migrations.RemoveField(
+            model_name='user',
+            name='gmail_access_token',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='gmail_refresh_token',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='gmail_token_expiry',
+        ),
+    ]
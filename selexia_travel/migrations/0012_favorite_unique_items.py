@@ -0,0 +1,38 @@
+# Generated by Django 4.2.10 on 2026-10-19 12:59
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_favorites(apps, schema_editor):
+    """Удаляет повторы избранного (остается самая ранняя запись), иначе ограничения не создать"""
+    Favorite = apps.get_model('selexia_travel', 'Favorite')
+    for field in ('excursion', 'category', 'country'):
+        duplicates = Favorite.objects.filter(**{f'{field}__isnull': False}).values('user', field).annotate(
+            keep_id=Min('id'), total=Count('id')
+        ).filter(total__gt=1)
+        for row in duplicates.iterator():
+            Favorite.objects.filter(user_id=row['user'], **{field: row[field]}).exclude(pk=row['keep_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('selexia_travel', '0011_gmail_credentials'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_favorites, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='favorite',
+            constraint=models.UniqueConstraint(condition=models.Q(('excursion__isnull', False)), fields=('user', 'excursion'), name='favorite_unique_user_excursion'),
+        ),
+        migrations.AddConstraint(
+            model_name='favorite',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', False)), fields=('user', 'category'), name='favorite_unique_user_category'),
+        ),
+        migrations.AddConstraint(
+            model_name='favorite',
+            constraint=models.UniqueConstraint(condition=models.Q(('country__isnull', False)), fields=('user', 'country'), name='favorite_unique_user_country'),
+        ),
+    ]
@@ -0,0 +1,210 @@
+# Generated by Django 4.2.10 on 2026-10-19 13:02
+
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+# На PostgreSQL индексы строятся и удаляются CONCURRENTLY: без блокировки записи в таблицы каталога,
+# бронирований и отзывов на время миграции. Остальные СУБД (SQLite локально) - обычные AddIndex / RemoveIndex
+
+class AddIndexConcurrentlyOnPostgres(AddIndexConcurrently):
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
+
+
+class RemoveIndexConcurrentlyOnPostgres(RemoveIndexConcurrently):
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.RemoveIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.RemoveIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    # CREATE / DROP INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ('selexia_travel', '0012_favorite_unique_items'),
+    ]
+
+    operations = [
+        RemoveIndexConcurrentlyOnPostgres(
+            model_name='booking',
+            name='selexia_tra_user_id_04d151_idx',
+        ),
+        RemoveIndexConcurrentlyOnPostgres(
+            model_name='booking',
+            name='selexia_tra_excursi_96f109_idx',
+        ),
+        RemoveIndexConcurrentlyOnPostgres(
+            model_name='booking',
+            name='selexia_tra_status_08ba36_idx',
+        ),
+        RemoveIndexConcurrentlyOnPostgres(
+            model_name='booking',
+            name='selexia_tra_date_68bcd5_idx',
+        ),
+        RemoveIndexConcurrentlyOnPostgres(
+            model_name='booking',
+            name='selexia_tra_created_222d23_idx',
+        ),
+        RemoveIndexConcurrentlyOnPostgres(
+            model_name='excursion',
+            name='selexia_tra_slug_cc2e9b_idx',
+        ),
+        RemoveIndexConcurrentlyOnPostgres(
+            model_name='excursion',
+            name='selexia_tra_price_73531c_idx',
+        ),
+        RemoveIndexConcurrentlyOnPostgres(
+            model_name='excursion',
+            name='selexia_tra_city_id_2c8d65_idx',
+        ),
+        RemoveIndexConcurrentlyOnPostgres(
+            model_name='excursion',
+            name='selexia_tra_status_5b489e_idx',
+        ),
+        RemoveIndexConcurrentlyOnPostgres(
+            model_name='excursion',
+            name='selexia_tra_is_popu_a89448_idx',
+        ),
+        RemoveIndexConcurrentlyOnPostgres(
+            model_name='excursion',
+            name='selexia_tra_is_feat_14b67b_idx',
+        ),
+        RemoveIndexConcurrentlyOnPostgres(
+            model_name='excursion',
+            name='selexia_tra_rating_fccf88_idx',
+        ),
+        RemoveIndexConcurrentlyOnPostgres(
+            model_name='excursion',
+            name='selexia_tra_views_c_c9c2af_idx',
+        ),
+        RemoveIndexConcurrentlyOnPostgres(
+            model_name='excursion',
+            name='selexia_tra_created_2891d5_idx',
+        ),
+        RemoveIndexConcurrentlyOnPostgres(
+            model_name='excursion',
+            name='excursion_status_popularity',
+        ),
+        RemoveIndexConcurrentlyOnPostgres(
+            model_name='favorite',
+            name='selexia_tra_user_id_d7e9bf_idx',
+        ),
+        RemoveIndexConcurrentlyOnPostgres(
+            model_name='favorite',
+            name='selexia_tra_item_ty_b692c7_idx',
+        ),
+        RemoveIndexConcurrentlyOnPostgres(
+            model_name='favorite',
+            name='selexia_tra_excursi_0930fa_idx',
+        ),
+        RemoveIndexConcurrentlyOnPostgres(
+            model_name='favorite',
+            name='selexia_tra_categor_8a7fa8_idx',
+        ),
+        RemoveIndexConcurrentlyOnPostgres(
+            model_name='favorite',
+            name='selexia_tra_country_8572e4_idx',
+        ),
+        RemoveIndexConcurrentlyOnPostgres(
+            model_name='favorite',
+            name='selexia_tra_created_840733_idx',
+        ),
+        RemoveIndexConcurrentlyOnPostgres(
+            model_name='review',
+            name='selexia_tra_excursi_b9e478_idx',
+        ),
+        RemoveIndexConcurrentlyOnPostgres(
+            model_name='review',
+            name='selexia_tra_user_id_5e5b80_idx',
+        ),
+        RemoveIndexConcurrentlyOnPostgres(
+            model_name='review',
+            name='selexia_tra_rating_705130_idx',
+        ),
+        RemoveIndexConcurrentlyOnPostgres(
+            model_name='review',
+            name='selexia_tra_is_appr_86512a_idx',
+        ),
+        RemoveIndexConcurrentlyOnPostgres(
+            model_name='review',
+            name='selexia_tra_created_5f0266_idx',
+        ),
+        RemoveIndexConcurrentlyOnPostgres(
+            model_name='review',
+            name='review_excursion_feed',
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='booking',
+            index=models.Index(fields=['user', '-created_at'], name='booking_user_newest'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='booking',
+            index=models.Index(fields=['user', 'status'], name='booking_user_status'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='excursion',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['-popularity_score'], name='excursion_pub_popularity'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='excursion',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['price'], name='excursion_pub_price'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='excursion',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['-rating', '-reviews_count'], name='excursion_pub_rating'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='excursion',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['-created_at'], name='excursion_pub_newest'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='excursion',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['country', '-popularity_score'], name='excursion_pub_country'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='excursion',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['city', '-popularity_score'], name='excursion_pub_city'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='excursion',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['category', '-popularity_score'], name='excursion_pub_category'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='excursion',
+            index=models.Index(condition=models.Q(('status', 'published'), ('is_popular', True)), fields=['-created_at'], name='excursion_pub_popular_block'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='favorite',
+            index=models.Index(fields=['user', '-created_at'], name='favorite_user_newest'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='review',
+            index=models.Index(condition=models.Q(('is_approved', True)), fields=['excursion', '-created_at', '-id'], name='review_excursion_feed'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='review',
+            index=models.Index(condition=models.Q(('is_approved', True)), fields=['-created_at'], name='review_approved_newest'),
+        ),
+    ]
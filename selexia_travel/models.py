@@ -5,7 +5,6 @@ from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 from django.urls import reverse
 from django.utils.text import slugify
-from PIL import Image
 import os
 from django.utils import timezone
 
@@ -70,10 +69,7 @@ class User(AbstractUser):
     date_of_birth = models.DateField(blank=True, null=True, verbose_name=_('Дата рождения'))
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Дата регистрации'))
     
-    # Gmail интеграция
-    gmail_access_token = models.TextField(blank=True, null=True, verbose_name=_('Gmail Access Token'))
-    gmail_refresh_token = models.TextField(blank=True, null=True, verbose_name=_('Gmail Refresh Token'))
-    gmail_token_expiry = models.DateTimeField(blank=True, null=True, verbose_name=_('Gmail Token Expiry'))
+    # Gmail интеграция (OAuth-токены хранятся в GmailCredentials)
     gmail_profile_updated = models.DateTimeField(blank=True, null=True, verbose_name=_('Последнее обновление профиля Gmail'))
     
     USERNAME_FIELD = 'email'
@@ -113,9 +109,40 @@ class User(AbstractUser):
         """Проверяет, оставлял ли пользователь отзыв на экскурсию"""
         return self.reviews.filter(excursion=excursion).exists()
     
+    def get_gmail_credentials(self):
+        """OAuth-токены Gmail или None, если аккаунт не подключен"""
+        try:
+            return self.gmail_credentials
+        except GmailCredentials.DoesNotExist:
+            return None
+    
+    def set_gmail_credentials(self, access_token, refresh_token, token_expiry):
+        """Сохраняет OAuth-токены Gmail"""
+        credentials, _ = GmailCredentials.objects.update_or_create(
+            user=self,
+            defaults={
+                'access_token': access_token,
+                'refresh_token': refresh_token,
+                'token_expiry': token_expiry,
+            }
+        )
+        self.gmail_credentials = credentials
+        # Письма прежнего подключения (другого ящика) не показываем
+        from .gmail_integration import invalidate_gmail_messages
+        invalidate_gmail_messages(self.pk)
+        return credentials
+    
+    def clear_gmail_credentials(self):
+        """Удаляет OAuth-токены Gmail"""
+        GmailCredentials.objects.filter(user=self).delete()
+        self._state.fields_cache.pop('gmail_credentials', None)
+        from .gmail_integration import invalidate_gmail_messages
+        invalidate_gmail_messages(self.pk)
+    
     def update_from_gmail(self):
         """Обновляет профиль пользователя из Gmail"""
-        if not self.gmail_access_token:
+        credentials = self.get_gmail_credentials()
+        if not credentials or not credentials.access_token:
             return False
         
         try:
@@ -132,13 +159,15 @@ class User(AbstractUser):
     
     def needs_gmail_refresh(self):
         """Проверяет, нужно ли обновить Gmail токен"""
-        if not self.gmail_token_expiry:
+        credentials = self.get_gmail_credentials()
+        if not credentials or not credentials.token_expiry:
             return True
-        return timezone.now() >= self.gmail_token_expiry
+        return timezone.now() >= credentials.token_expiry
     
     def refresh_gmail_token(self):
         """Обновляет Gmail токен"""
-        if not self.gmail_refresh_token:
+        credentials = self.get_gmail_credentials()
+        if not credentials or not credentials.refresh_token:
             return False
         
         try:
@@ -151,6 +180,25 @@ class User(AbstractUser):
             return False
 
 
+class GmailCredentials(models.Model):
+    """OAuth-токены Gmail пользователя (отдельно от User, чтобы не читать их при каждой аутентификации)"""
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True,
+        related_name='gmail_credentials', verbose_name=_('Пользователь')
+    )
+    access_token = models.TextField(blank=True, null=True, verbose_name=_('Gmail Access Token'))
+    refresh_token = models.TextField(blank=True, null=True, verbose_name=_('Gmail Refresh Token'))
+    token_expiry = models.DateTimeField(blank=True, null=True, verbose_name=_('Gmail Token Expiry'))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_('Дата обновления'))
+    
+    class Meta:
+        verbose_name = _('Gmail токены')
+        verbose_name_plural = _('Gmail токены')
+    
+    def __str__(self):
+        return f"Gmail: {self.user_id}"
+
+
 class Country(models.Model):
     """Модель страны"""
     name_ru = models.CharField(max_length=100, verbose_name=_('Название (рус)'))
@@ -260,6 +308,76 @@ class Category(models.Model):
         return self.excursions.filter(status='published').count()
 
 
+def language_suffix(language):
+    """Суффикс переводимых колонок для языка запроса ('ru' или 'en')"""
+    return 'ru' if language == 'ru' else 'en'
+
+
+# Условия частичных индексов: каталог и ленты читают только опубликованное и одобренное
+PUBLISHED = models.Q(status='published')
+APPROVED = models.Q(is_approved=True)
+
+
+class ExcursionQuerySet(models.QuerySet):
+    """QuerySet экскурсий с проекцией переводимых колонок на один язык"""
+
+    # Поля, хранящиеся в двух колонках: <поле>_ru и <поле>_en
+    TRANSLATED_FIELDS = (
+        'title', 'description', 'short_description',
+        'program', 'included', 'important_info', 'meeting_point',
+    )
+
+    def localized(self, language, *fields, related=()):
+        """
+        Загружает переводимые поля только на языке запроса под нейтральными именами.
+
+        Excursion.objects.localized('en', 'title', 'short_description', related=('city',))
+        читает из БД title_en и short_description_en (доступны как .title и
+        .short_description) и city__name_en (как .city_name); остальные колонки
+        обоих языков откладываются через defer(). Без fields - title и short_description.
+        """
+        suffix = language_suffix(language)
+        fields = fields or ('title', 'short_description')
+        unknown = set(fields) - set(self.TRANSLATED_FIELDS)
+        if unknown:
+            raise ValueError(f'Неизвестные переводимые поля: {", ".join(sorted(unknown))}')
+
+        annotations = {field: models.F(f'{field}_{suffix}') for field in fields}
+        annotations.update({
+            f'{relation}_name': models.F(f'{relation}__name_{suffix}') for relation in related
+        })
+        return self.defer(*[
+            f'{field}_{lang}' for field in self.TRANSLATED_FIELDS for lang in ('ru', 'en')
+        ]).annotate(**annotations)
+
+    def in_section(self, **slugs):
+        """
+        Фильтр раздела каталога по слагам: in_section(country='turkey', city='antalya').
+        Слаг заранее переводится в id, чтобы условие было равенством константе:
+        тогда страница берется из индекса (раздел, -popularity_score) без сортировки,
+        а при фильтре через JOIN по слагу БД сортирует весь раздел.
+        """
+        queryset = self
+        for field, slug in slugs.items():
+            if not slug:
+                continue
+            related = self.model._meta.get_field(field).related_model
+            # Слаг города уникален только в пределах страны - id может быть несколько
+            ids = list(related.objects.filter(slug=slug).values_list('pk', flat=True))
+            if len(ids) == 1:
+                queryset = queryset.filter(**{f'{field}_id': ids[0]})
+            else:
+                queryset = queryset.filter(**{f'{field}_id__in': ids})
+        return queryset
+
+    def with_main_image(self):
+        """Добавляет путь главного изображения (main_image_path) подзапросом вместо prefetch"""
+        main_image = ExcursionImage.objects.filter(
+            excursion=models.OuterRef('pk')
+        ).order_by('order', 'created_at').values('image')[:1]
+        return self.annotate(main_image_path=models.Subquery(main_image))
+
+
 class Excursion(models.Model):
     """Модель экскурсии"""
     STATUS_CHOICES = [
@@ -311,23 +429,36 @@ class Excursion(models.Model):
     is_popular = models.BooleanField(default=False, verbose_name=_('Популярная'))
     is_featured = models.BooleanField(default=False, verbose_name=_('Рекомендуемая'))
     
+    # Популярность (пересчитывается командой update_popularity, см. popularity.py)
+    popularity_score = models.FloatField(default=0, verbose_name=_('Скор популярности'))
+    trending_views = models.FloatField(default=0, verbose_name=_('Затухающие просмотры'))
+    views_count_scored = models.PositiveIntegerField(default=0, verbose_name=_('Просмотры на момент расчета'))
+    popularity_updated_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Скор пересчитан'))
+    
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Создано'))
     updated_at = models.DateTimeField(auto_now=True, verbose_name=_('Обновлено'))
     
+    objects = ExcursionQuerySet.as_manager()
+    
     class Meta:
         verbose_name = _('Экскурсия')
         verbose_name_plural = _('Экскурсии')
         ordering = ['-created_at']
+        # Каталог читает только опубликованные экскурсии, поэтому индексы частичные и повторяют
+        # сортировки каталога. slug (уникальный) и FK индексируются сами; views_count растет
+        # на каждом просмотре и в индексы не входит. Планы запросов: DATABASE_INDEXES.md
         indexes = [
-            models.Index(fields=['slug']),
-            models.Index(fields=['price']),
-            models.Index(fields=['city']),
-            models.Index(fields=['status']),
-            models.Index(fields=['is_popular']),
-            models.Index(fields=['is_featured']),
-            models.Index(fields=['rating']),
-            models.Index(fields=['views_count']),
-            models.Index(fields=['created_at']),
+            models.Index(fields=['-popularity_score'], condition=PUBLISHED, name='excursion_pub_popularity'),
+            models.Index(fields=['price'], condition=PUBLISHED, name='excursion_pub_price'),
+            models.Index(fields=['-rating', '-reviews_count'], condition=PUBLISHED, name='excursion_pub_rating'),
+            models.Index(fields=['-created_at'], condition=PUBLISHED, name='excursion_pub_newest'),
+            models.Index(fields=['country', '-popularity_score'], condition=PUBLISHED, name='excursion_pub_country'),
+            models.Index(fields=['city', '-popularity_score'], condition=PUBLISHED, name='excursion_pub_city'),
+            models.Index(fields=['category', '-popularity_score'], condition=PUBLISHED, name='excursion_pub_category'),
+            # Блок популярных на главной
+            models.Index(
+                fields=['-created_at'], condition=PUBLISHED & models.Q(is_popular=True), name='excursion_pub_popular_block'
+            ),
         ]
     
     def __str__(self):
@@ -337,10 +468,6 @@ class Excursion(models.Model):
         if not self.slug:
             self.slug = slugify(self.title_en or self.title_ru)
         
-        # Автоматическое определение популярности
-        if self.views_count >= 100:
-            self.is_popular = True
-        
         super().save(*args, **kwargs)
     
     def get_absolute_url(self):
@@ -393,8 +520,10 @@ class ExcursionImage(models.Model):
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
         
-        # Автоматическая обработка изображения
+        # Автоматическая обработка изображения (PIL загружается только при сохранении изображений)
         if self.image:
+            from PIL import Image
+
             img = Image.open(self.image.path)
             
             # Изменяем размер до 1200x800
@@ -404,6 +533,28 @@ class ExcursionImage(models.Model):
                 img.save(self.image.path, optimize=True, quality=85)
 
 
+class ExcursionNeighbor(models.Model):
+    """Похожая экскурсия (предрасчитывается командой build_recommendations)"""
+    excursion = models.ForeignKey(Excursion, on_delete=models.CASCADE, related_name='neighbors', verbose_name=_('Экскурсия'))
+    neighbor = models.ForeignKey(Excursion, on_delete=models.CASCADE, related_name='neighbor_of', verbose_name=_('Похожая экскурсия'))
+    rank = models.PositiveSmallIntegerField(verbose_name=_('Позиция'))
+    score = models.FloatField(verbose_name=_('Сходство'))
+    
+    class Meta:
+        verbose_name = _('Похожая экскурсия')
+        verbose_name_plural = _('Похожие экскурсии')
+        ordering = ['excursion', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['excursion', 'neighbor'], name='unique_excursion_neighbor'),
+        ]
+        indexes = [
+            models.Index(fields=['excursion', 'rank']),
+        ]
+    
+    def __str__(self):
+        return f"{self.excursion_id} -> {self.neighbor_id} ({self.score:.3f})"
+
+
 class Review(models.Model):
     """Модель отзывов"""
     excursion = models.ForeignKey(Excursion, on_delete=models.CASCADE, related_name='reviews', verbose_name=_('Экскурсия'))
@@ -418,12 +569,12 @@ class Review(models.Model):
         verbose_name_plural = _('Отзывы')
         ordering = ['-created_at']
         unique_together = ['user', 'excursion']  # Один пользователь - один отзыв на экскурсию
+        # Читаются только одобренные отзывы; user и excursion покрыты unique_together и FK
         indexes = [
-            models.Index(fields=['excursion']),
-            models.Index(fields=['user']),
-            models.Index(fields=['rating']),
-            models.Index(fields=['is_approved']),
-            models.Index(fields=['created_at']),
+            # Лента отзывов экскурсии: курсор по (created_at, id)
+            models.Index(fields=['excursion', '-created_at', '-id'], condition=APPROVED, name='review_excursion_feed'),
+            # Последние отзывы на главной и в API
+            models.Index(fields=['-created_at'], condition=APPROVED, name='review_approved_newest'),
         ]
     
     def __str__(self):
@@ -465,12 +616,10 @@ class Booking(models.Model):
         verbose_name = _('Бронирование')
         verbose_name_plural = _('Бронирования')
         ordering = ['-created_at']
+        # Бронирования читаются по пользователю: список по дате и счетчики по статусам в кабинете
         indexes = [
-            models.Index(fields=['user']),
-            models.Index(fields=['excursion']),
-            models.Index(fields=['status']),
-            models.Index(fields=['date']),
-            models.Index(fields=['created_at']),
+            models.Index(fields=['user', '-created_at'], name='booking_user_newest'),
+            models.Index(fields=['user', 'status'], name='booking_user_status'),
         ]
     
     def clean(self):
@@ -526,13 +675,17 @@ class Favorite(models.Model):
         verbose_name = _('Избранное')
         verbose_name_plural = _('Избранные')
         ordering = ['-created_at']
+        # (user, элемент) покрывают уникальные ограничения ниже; список - по дате добавления
         indexes = [
-            models.Index(fields=['user']),
-            models.Index(fields=['item_type']),
-            models.Index(fields=['excursion']),
-            models.Index(fields=['category']),
-            models.Index(fields=['country']),
-            models.Index(fields=['created_at']),
+            models.Index(fields=['user', '-created_at'], name='favorite_user_newest'),
+        ]
+        # Один элемент - не больше одной записи у пользователя (гонки двойного клика гасит БД)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', field], condition=models.Q(**{f'{field}__isnull': False}),
+                name=f'favorite_unique_user_{field}',
+            )
+            for field in ('excursion', 'category', 'country')
         ]
     
     def clean(self):
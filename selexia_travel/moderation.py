@@ -0,0 +1,74 @@
+"""
+Массовая модерация отзывов с отложенным пересчетом рейтингов экскурсий
+"""
+
+from django.db import transaction
+from django.db.models import Avg, Count
+
+from .models import Excursion, Review
+from .signals import suppress_review_signals
+from .caching import bump_catalog_version
+from .review_feed import invalidate_review_feed
+
+
+MODERATION_ACTIONS = ('approve', 'reject', 'delete')
+
+
+def recalculate_excursion_ratings(excursion_ids):
+    """Пересчитывает рейтинг и количество отзывов для набора экскурсий одним агрегирующим запросом"""
+    excursion_ids = set(excursion_ids)
+    if not excursion_ids:
+        return 0
+
+    stats = {
+        row['excursion_id']: row
+        for row in Review.objects.filter(
+            excursion_id__in=excursion_ids,
+            is_approved=True
+        ).values('excursion_id').annotate(
+            avg_rating=Avg('rating'),
+            total=Count('id')
+        ).order_by()
+    }
+
+    excursions = list(
+        Excursion.objects.filter(pk__in=excursion_ids).only('id', 'rating', 'reviews_count')
+    )
+    for excursion in excursions:
+        row = stats.get(excursion.pk)
+        excursion.rating = round(row['avg_rating'], 2) if row and row['avg_rating'] else 0
+        excursion.reviews_count = row['total'] if row else 0
+
+    Excursion.objects.bulk_update(excursions, ['rating', 'reviews_count'])
+    bump_catalog_version(Excursion)
+    return len(excursions)
+
+
+def moderate_reviews(queryset, action):
+    """
+    Применяет действие модерации (approve / reject / delete) ко всем отзывам queryset.
+
+    Выполняется в одной транзакции без посылки почты и пересчета рейтинга
+    на каждую строку; рейтинги затронутых экскурсий пересчитываются один раз.
+    Возвращает количество обработанных отзывов.
+    """
+    if action not in MODERATION_ACTIONS:
+        raise ValueError(f'Неизвестное действие модерации: {action}')
+
+    with transaction.atomic(), suppress_review_signals():
+        excursion_ids = set(queryset.values_list('excursion_id', flat=True))
+
+        if action == 'approve':
+            count = queryset.update(is_approved=True)
+        elif action == 'reject':
+            count = queryset.update(is_approved=False)
+        else:
+            _, deleted = queryset.delete()
+            count = deleted.get(Review._meta.label, 0)
+
+        recalculate_excursion_ratings(excursion_ids)
+
+    # queryset.update() не шлет post_save, версию отзывов и ленты сдвигаем явно
+    bump_catalog_version(Review)
+    invalidate_review_feed(*excursion_ids)
+    return count
@@ -0,0 +1,108 @@
+"""
+Расчет популярности экскурсий: затухающий во времени скор по просмотрам,
+бронированиям, избранному и рейтингу (пересчитывается периодической командой update_popularity)
+"""
+
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .caching import bump_catalog_version
+from .models import Booking, Excursion, Favorite
+
+
+DEFAULT_POPULARITY_WEIGHTS = {
+    'views': 1.0,
+    'bookings': 25.0,
+    'favorites': 8.0,
+    'rating': 5.0,
+}
+DEFAULT_HALF_LIFE_DAYS = 7
+DEFAULT_POPULAR_LIMIT = 12
+
+# События старше HALF_LIFE * WINDOW_HALF_LIVES весят меньше 1/256 и не учитываются
+WINDOW_HALF_LIVES = 8
+
+
+def _weights():
+    return {**DEFAULT_POPULARITY_WEIGHTS, **getattr(settings, 'POPULARITY_WEIGHTS', {})}
+
+
+def _half_life():
+    return timedelta(days=getattr(settings, 'POPULARITY_HALF_LIFE_DAYS', DEFAULT_HALF_LIFE_DAYS))
+
+
+def decay_factor(age, half_life):
+    """Вес события возрастом age: 1 для нового, 1/2 через half_life"""
+    return 0.5 ** (max(age.total_seconds(), 0) / half_life.total_seconds())
+
+
+def _decayed_counts(queryset, now, half_life):
+    """Сумма затухающих весов событий по экскурсиям: {excursion_id: вес}"""
+    totals = {}
+    since = now - half_life * WINDOW_HALF_LIVES
+    for excursion_id, created_at in queryset.filter(created_at__gte=since).values_list(
+        'excursion_id', 'created_at'
+    ).iterator():
+        totals[excursion_id] = totals.get(excursion_id, 0.0) + decay_factor(now - created_at, half_life)
+    return totals
+
+
+def update_popularity_scores(now=None, batch_size=500):
+    """
+    Пересчитывает popularity_score всех опубликованных экскурсий.
+
+    Просмотры хранятся только счетчиком, поэтому их вклад накапливается
+    инкрементально: trending_views затухает с прошлого пересчета и пополняется
+    приростом views_count. Бронирования и избранное берутся с датами и затухают
+    по возрасту. is_popular выставляется первым POPULAR_EXCURSIONS_LIMIT по скору
+    (флаг, поставленный вручную действием админки make_popular, при этом перезаписывается).
+    Возвращает количество обновленных экскурсий.
+    """
+    now = now or timezone.now()
+    half_life = _half_life()
+    weights = _weights()
+
+    bookings = _decayed_counts(Booking.objects.exclude(status='cancelled'), now, half_life)
+    favorites = _decayed_counts(Favorite.objects.filter(excursion__isnull=False), now, half_life)
+
+    excursions = list(Excursion.objects.filter(status='published').only(
+        'id', 'views_count', 'rating', 'reviews_count', 'is_popular',
+        'popularity_score', 'trending_views', 'views_count_scored', 'popularity_updated_at',
+    ))
+
+    for excursion in excursions:
+        previous = excursion.popularity_updated_at
+        decay = decay_factor(now - previous, half_life) if previous else 1.0
+        new_views = max(excursion.views_count - excursion.views_count_scored, 0)
+
+        excursion.trending_views = excursion.trending_views * decay + new_views
+        excursion.views_count_scored = excursion.views_count
+        excursion.popularity_updated_at = now
+        excursion.popularity_score = round(
+            weights['views'] * excursion.trending_views
+            + weights['bookings'] * bookings.get(excursion.pk, 0.0)
+            + weights['favorites'] * favorites.get(excursion.pk, 0.0)
+            + weights['rating'] * float(excursion.rating) * math.log1p(excursion.reviews_count),
+            4
+        )
+
+    limit = getattr(settings, 'POPULAR_EXCURSIONS_LIMIT', DEFAULT_POPULAR_LIMIT)
+    ranked = sorted(excursions, key=lambda excursion: excursion.popularity_score, reverse=True)
+    popular_ids = {excursion.pk for excursion in ranked[:limit] if excursion.popularity_score > 0}
+    for excursion in excursions:
+        excursion.is_popular = excursion.pk in popular_ids
+
+    with transaction.atomic():
+        Excursion.objects.bulk_update(
+            excursions,
+            ['popularity_score', 'trending_views', 'views_count_scored', 'popularity_updated_at', 'is_popular'],
+            batch_size=batch_size,
+        )
+        # bulk_update не шлет сигналы: порядок "популярных" изменился, сдвигаем версию каталога
+        bump_catalog_version(Excursion)
+
+    return len(excursions)
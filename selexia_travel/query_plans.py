@@ -0,0 +1,100 @@
+"""
+Типовые запросы каталога, кабинета и лент в том виде, в каком их строят views,
+для проверки планов (EXPLAIN) и замера времени. По ним подобраны индексы моделей.
+"""
+
+import statistics
+import time
+
+from django.db import connection
+from django.db.models import Count
+
+from .models import Booking, Excursion, Favorite, Review, User
+
+
+def _sample_parameters():
+    """Самые наполненные страна, город, категория, экскурсия и пользователь - худший случай для плана"""
+    def top(queryset, field):
+        row = queryset.values(field).annotate(total=Count('id')).order_by('-total').first()
+        return row[field] if row else None
+
+    published = Excursion.objects.filter(status='published')
+    return {
+        'country': top(published, 'country__slug'),
+        'city': top(published, 'city__slug'),
+        'category': top(published, 'category__slug'),
+        'excursion': top(Review.objects.filter(is_approved=True), 'excursion_id'),
+        'user': top(Booking.objects.all(), 'user_id') or User.objects.values_list('id', flat=True).first(),
+    }
+
+
+def _catalog():
+    return Excursion.objects.filter(status='published').select_related('city', 'country', 'category')
+
+
+# Имя -> построитель запроса по параметрам _sample_parameters; страница каталога - 12 карточек
+QUERY_SHAPES = {
+    'catalog_popular': lambda p: _catalog().order_by('-popularity_score')[:12],
+    'catalog_price': lambda p: _catalog().order_by('price')[:12],
+    'catalog_rating': lambda p: _catalog().order_by('-rating', '-reviews_count')[:12],
+    'catalog_newest': lambda p: _catalog().order_by('-created_at')[:12],
+    'catalog_country': lambda p: _catalog().in_section(country=p['country']).order_by('-popularity_score')[:12],
+    'catalog_city': lambda p: _catalog().in_section(city=p['city']).order_by('-popularity_score')[:12],
+    'catalog_category': lambda p: _catalog().in_section(category=p['category']).order_by('-popularity_score')[:12],
+    'catalog_city_price': lambda p: _catalog().in_section(city=p['city']).order_by('price')[:12],
+    'home_popular': lambda p: _catalog().filter(is_popular=True)[:6],
+    'reviews_feed': lambda p: Review.objects.filter(
+        excursion_id=p['excursion'], is_approved=True
+    ).select_related('user').order_by('-created_at', '-id')[:10],
+    'reviews_latest': lambda p: Review.objects.filter(is_approved=True).select_related('user', 'excursion')[:10],
+    'bookings_list': lambda p: Booking.objects.filter(user_id=p['user']).select_related('excursion')[:10],
+    'bookings_by_status': lambda p: Booking.objects.filter(user_id=p['user'], status='confirmed'),
+    'favorites_list': lambda p: Favorite.objects.filter(user_id=p['user']).select_related('excursion')[:10],
+    'favorite_exists': lambda p: Favorite.objects.filter(user_id=p['user'], excursion_id=p['excursion']),
+}
+
+# Запросы-счетчики выполняются через count(), остальные - выборкой строк
+COUNT_SHAPES = frozenset({'bookings_by_status', 'favorite_exists'})
+
+
+def _compile(queryset, counted):
+    sql, params = queryset.query.sql_with_params()
+    if counted:
+        sql = f'SELECT COUNT(*) FROM ({sql}) counted'
+    return sql, params
+
+
+def _execute(sql, params, counted):
+    """Выполняет готовый SQL без сборки объектов моделей - замеряется работа БД, а не ORM"""
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    return rows[0][0] if counted else len(rows)
+
+
+def explain_query_shapes(names=None, repeat=20):
+    """
+    Для каждого запроса возвращает (имя, план, медиана и минимум времени в мс, число строк).
+    План - вывод QuerySet.explain() текущей БД (EXPLAIN QUERY PLAN в SQLite, EXPLAIN в PostgreSQL).
+    """
+    parameters = _sample_parameters()
+    results = []
+    for name in names or QUERY_SHAPES:
+        build = QUERY_SHAPES[name]
+        counted = name in COUNT_SHAPES
+        plan = (build(parameters).order_by() if counted else build(parameters)).explain()
+
+        # Запрос строится заново на каждом повторе: в замер входят вспомогательные запросы
+        # (in_section) и выполнение SQL, но не компиляция SQL в ORM
+        timings = []
+        rows = 0
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            queryset = build(parameters)
+            built = time.perf_counter()
+            sql, params = _compile(queryset.order_by() if counted else queryset, counted)
+            executed = time.perf_counter()
+            rows = _execute(sql, params, counted)
+            timings.append((built - started + time.perf_counter() - executed) * 1000)
+        results.append((name, plan, statistics.median(timings), min(timings), rows))
+    return results
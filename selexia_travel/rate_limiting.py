@@ -0,0 +1,193 @@
+"""
+Ограничение частоты запросов: бюджеты по эндпоинтам (settings.RATE_LIMITS) и счетчики
+в общем для всех воркеров кэше RATE_LIMIT_CACHE. Один механизм используют декоратор
+rate_limit (функциональные и async views) и throttle-класс DRF; сверх бюджета - 429 с Retry-After.
+
+Бюджет - "<число>/<s|m|h|d>" на IP (анонимы) или на пользователя (вошедшие).
+Счет - скользящее окно по двум соседним окнам фиксированной длины: в кэше нужны только
+атомарные add/incr, а всплеск на границе окон не удваивает бюджет.
+"""
+
+import math
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, JsonResponse
+from django.utils.translation import gettext as _
+from rest_framework.throttling import BaseThrottle
+
+
+DEFAULT_RATE_LIMITS = {
+    'api': {'ip': '300/m', 'user': '600/m'},
+}
+
+RATE_UNITS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+
+
+def parse_rate(rate):
+    """'60/m' -> (60, 60): число запросов и длина окна в секундах"""
+    count, unit = rate.split('/')
+    return int(count), RATE_UNITS[unit.strip()[0]]
+
+
+def scope_budgets(scope):
+    return getattr(settings, 'RATE_LIMITS', DEFAULT_RATE_LIMITS).get(scope) or DEFAULT_RATE_LIMITS.get(scope, {})
+
+
+def rate_limit_cache():
+    return caches[getattr(settings, 'RATE_LIMIT_CACHE', 'default')]
+
+
+def client_ip(request):
+    """
+    IP клиента. За доверенными прокси (RATE_LIMIT_TRUSTED_PROXIES) берется адрес, который
+    добавил в X-Forwarded-For последний из них: более левые клиент может подделать.
+    """
+    proxies = getattr(settings, 'RATE_LIMIT_TRUSTED_PROXIES', 0)
+    if proxies:
+        forwarded = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _subject(request, budgets):
+    """(вид, идентификатор, бюджет): вошедшие считаются по пользователю, если для него есть бюджет"""
+    user = getattr(request, 'user', None)
+    if 'user' in budgets and user is not None and user.is_authenticated:
+        return 'user', user.pk, budgets['user']
+    if 'ip' in budgets:
+        return 'ip', client_ip(request), budgets['ip']
+    return None
+
+
+def _window(scope, subject, now):
+    kind, ident, rate = subject
+    limit, period = parse_rate(rate)
+    window, offset = divmod(now, period)
+    prefix = f'ratelimit:{scope}:{kind}:{ident}'
+    return limit, period, offset, f'{prefix}:{int(window)}', f'{prefix}:{int(window) - 1}'
+
+
+def _retry_after(limit, period, offset, current, previous):
+    """
+    None, если оценка (доля прошлого окна + текущее окно) в пределах бюджета,
+    иначе через сколько секунд оценка опустится до бюджета
+    """
+    if previous * (1 - offset / period) + current <= limit:
+        return None
+    if current > limit:
+        # Ждем следующего окна, где текущий счетчик станет "прошлым" и затухнет до бюджета
+        wait = period - offset + period * (1 - limit / current)
+    else:
+        wait = period * (1 - (limit - current) / previous) - offset
+    return max(1, math.ceil(wait))
+
+
+def check_rate_limit(request, scope):
+    """Засчитывает запрос в бюджет scope: None - в пределах бюджета, иначе Retry-After в секундах"""
+    if not getattr(settings, 'RATE_LIMIT_ENABLED', True):
+        return None
+    subject = _subject(request, scope_budgets(scope))
+    if subject is None:
+        return None
+
+    cache = rate_limit_cache()
+    limit, period, offset, key, previous_key = _window(scope, subject, time.time())
+    cache.add(key, 0, period * 2)
+    try:
+        current = cache.incr(key)
+    except ValueError:  # ключ истек между add и incr
+        cache.set(key, 1, period * 2)
+        current = 1
+    return _retry_after(limit, period, offset, current, cache.get(previous_key, 0))
+
+
+async def acheck_rate_limit(request, scope):
+    """check_rate_limit для async views"""
+    if not getattr(settings, 'RATE_LIMIT_ENABLED', True):
+        return None
+    budgets = scope_budgets(scope)
+    if 'user' in budgets:
+        # request.user загружается лениво и синхронно
+        subject = await sync_to_async(_subject)(request, budgets)
+    else:
+        subject = _subject(request, budgets)
+    if subject is None:
+        return None
+
+    cache = rate_limit_cache()
+    limit, period, offset, key, previous_key = _window(scope, subject, time.time())
+    await cache.aadd(key, 0, period * 2)
+    try:
+        current = await cache.aincr(key)
+    except ValueError:
+        await cache.aset(key, 1, period * 2)
+        current = 1
+    return _retry_after(limit, period, offset, current, await cache.aget(previous_key, 0))
+
+
+def rate_limited_response(request, retry_after):
+    """429 с Retry-After: JSON для API и AJAX, текст для обычных форм"""
+    message = _('Слишком много запросов. Повторите через %(seconds)s с.') % {'seconds': retry_after}
+    wants_json = (
+        request.path.startswith('/api/')
+        or request.headers.get('x-requested-with') == 'XMLHttpRequest'
+        or 'application/json' in request.headers.get('accept', '')
+    )
+    if wants_json:
+        response = JsonResponse({'error': message, 'retry_after': retry_after}, status=429)
+    else:
+        response = HttpResponse(message, status=429, content_type='text/plain; charset=utf-8')
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def rate_limit(scope, methods=None):
+    """
+    Декоратор view (sync и async): сверх бюджета scope отвечает 429.
+    methods - засчитываемые методы (например, только POST у форм); по умолчанию все.
+    """
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                if methods is None or request.method in methods:
+                    retry_after = await acheck_rate_limit(request, scope)
+                    if retry_after is not None:
+                        return rate_limited_response(request, retry_after)
+                return await view_func(request, *args, **kwargs)
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if methods is None or request.method in methods:
+                retry_after = check_rate_limit(request, scope)
+                if retry_after is not None:
+                    return rate_limited_response(request, retry_after)
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class RateLimitThrottle(BaseThrottle):
+    """
+    Throttle DRF на общем лимитере. Бюджет - атрибут view rate_limit_scope или scope класса
+    ('api' - общий бюджет по умолчанию для всех DRF views). Retry-After выставляет DRF по wait().
+    """
+    scope = 'api'
+
+    def allow_request(self, request, view):
+        self.retry_after = check_rate_limit(request, getattr(view, 'rate_limit_scope', self.scope))
+        return self.retry_after is None
+
+    def wait(self):
+        return self.retry_after
+
+
+def scoped_throttle(scope):
+    """Throttle-класс с бюджетом scope для @throttle_classes у функциональных DRF views"""
+    return type(f'RateLimitThrottle[{scope}]', (RateLimitThrottle,), {'scope': scope})
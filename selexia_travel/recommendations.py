@@ -0,0 +1,221 @@
+"""
+Похожие экскурсии: пакетный расчет соседей (NumPy, совместные интересы - в SQL) и выдача готовых карточек одним запросом
+"""
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+
+from .caching import bump_catalog_version
+from .models import Booking, Excursion, ExcursionNeighbor, Favorite
+
+
+def _numpy():
+    """numpy нужен только команде build_recommendations: веб-воркеры его не загружают"""
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError('Для расчета рекомендаций требуется numpy')
+    return numpy
+
+
+DEFAULT_RECOMMENDATION_WEIGHTS = {
+    'category': 3.0,
+    'city': 2.0,
+    'country': 1.0,
+    'price': 1.5,
+    'co_interest': 4.0,
+    'popularity': 0.1,
+}
+DEFAULT_NEIGHBORS_COUNT = 8
+
+# Ячеек матрицы сходства (float32) в одном блоке строк: память блока ~ BLOCK_CELLS x 4 байта
+BLOCK_CELLS = 4_000_000
+
+
+def _weights():
+    return {**DEFAULT_RECOMMENDATION_WEIGHTS, **getattr(settings, 'RECOMMENDATION_WEIGHTS', {})}
+
+
+def _interest_sql():
+    """Интересы (пользователь, экскурсия): избранное и неотмененные бронирования опубликованных экскурсий"""
+    return f"""
+        WITH interest AS (
+            SELECT f.user_id, f.excursion_id
+            FROM {Favorite._meta.db_table} f
+            JOIN {Excursion._meta.db_table} e ON e.id = f.excursion_id
+            WHERE e.status = %s
+            UNION
+            SELECT b.user_id, b.excursion_id
+            FROM {Booking._meta.db_table} b
+            JOIN {Excursion._meta.db_table} e ON e.id = b.excursion_id
+            WHERE e.status = %s AND b.status <> %s
+        )
+    """
+
+
+def _co_interest(np, index):
+    """
+    Совместные интересы, посчитанные в БД (самосоединение по пользователю), без матрицы
+    пользователь x экскурсия. Возвращает пары (строки, столбцы, число общих пользователей),
+    отсортированные по строке, и норму столбцов - sqrt(числа пользователей экскурсии,
+    у которых есть хотя бы одна другая экскурсия).
+    """
+    params = ['published', 'published', 'cancelled']
+    pairs = []
+    users = np.zeros(len(index), dtype=np.float32)
+    with connection.cursor() as cursor:
+        cursor.execute(_interest_sql() + """
+            SELECT a.excursion_id, b.excursion_id, COUNT(*)
+            FROM interest a JOIN interest b ON a.user_id = b.user_id AND a.excursion_id <> b.excursion_id
+            GROUP BY a.excursion_id, b.excursion_id
+        """, params)
+        for left, right, count in cursor.fetchall():
+            if left in index and right in index:
+                pairs.append((index[left], index[right], count))
+
+        cursor.execute(_interest_sql() + """
+            SELECT a.excursion_id, COUNT(DISTINCT a.user_id)
+            FROM interest a JOIN interest b ON a.user_id = b.user_id AND a.excursion_id <> b.excursion_id
+            GROUP BY a.excursion_id
+        """, params)
+        for excursion_id, count in cursor.fetchall():
+            if excursion_id in index:
+                users[index[excursion_id]] = count
+
+    pairs.sort()
+    rows, columns, counts = (np.array(values, dtype=dtype) for values, dtype in zip(
+        zip(*pairs) if pairs else ((), (), ()), (np.int64, np.int64, np.float32)
+    ))
+    norm = np.sqrt(users)
+    norm[norm == 0] = 1.0
+    return rows, columns, counts, norm
+
+
+def compute_neighbors(k=None):
+    """
+    Считает top-K похожих для каждой опубликованной экскурсии.
+
+    Сходство - взвешенная сумма: совпадение категории, города и страны,
+    близость цены (exp(-|Δ log цены|)), косинус совместных интересов
+    (избранное и бронирования одних пользователей) и небольшой вклад популярности.
+    Матрица считается блоками строк в float32 (не больше BLOCK_CELLS ячеек),
+    совместные интересы приходят из БД разреженными парами.
+    Возвращает {excursion_id: [(neighbor_id, score), ...]}.
+    """
+    np = _numpy()
+
+    k = k or getattr(settings, 'RECOMMENDATION_NEIGHBORS_COUNT', DEFAULT_NEIGHBORS_COUNT)
+    weights = _weights()
+
+    rows = list(Excursion.objects.filter(status='published').values_list(
+        'id', 'category_id', 'city_id', 'country_id', 'price', 'popularity_score'
+    ).order_by('id'))
+    if len(rows) < 2:
+        return {}
+
+    ids = np.array([row[0] for row in rows])
+    category = np.array([row[1] for row in rows])
+    city = np.array([row[2] for row in rows])
+    country = np.array([row[3] for row in rows])
+    log_price = np.log1p(np.array([float(row[4]) for row in rows], dtype=np.float64)).astype(np.float32)
+    popularity = np.array([row[5] for row in rows], dtype=np.float64)
+    popularity = popularity / popularity.max() if popularity.max() > 0 else popularity
+    popularity = (weights['popularity'] * popularity).astype(np.float32)
+
+    pair_rows, pair_columns, pair_counts, interest_norm = _co_interest(
+        np, {excursion_id: i for i, excursion_id in enumerate(ids.tolist())}
+    )
+    pair_scores = weights['co_interest'] * pair_counts / (interest_norm[pair_rows] * interest_norm[pair_columns])
+
+    total = len(ids)
+    k = min(k, total - 1)
+    block_size = max(1, BLOCK_CELLS // total)
+    neighbors = {}
+    for start in range(0, total, block_size):
+        block = slice(start, min(start + block_size, total))
+        # Все слагаемые добавляются на месте: кроме блока - одна временная float32 и маска
+        scores = np.broadcast_to(popularity, (block.stop - block.start, total)).copy()
+        for field, values in (('category', category), ('city', city), ('country', country)):
+            np.add(scores, np.float32(weights[field]), out=scores, where=values[block, None] == values[None, :])
+        price = np.subtract(log_price[block, None], log_price[None, :])
+        np.abs(price, out=price)
+        np.negative(price, out=price)
+        np.exp(price, out=price)
+        price *= np.float32(weights['price'])
+        scores += price
+        del price
+
+        low, high = np.searchsorted(pair_rows, [block.start, block.stop])
+        scores[pair_rows[low:high] - block.start, pair_columns[low:high]] += pair_scores[low:high]
+
+        # Экскурсия не рекомендует сама себя
+        scores[np.arange(scores.shape[0]), np.arange(block.start, block.stop)] = -np.inf
+
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        for row, columns in enumerate(top):
+            ordered = columns[np.argsort(-scores[row, columns], kind='stable')]
+            neighbors[int(ids[block.start + row])] = [
+                (int(ids[column]), round(float(scores[row, column]), 4)) for column in ordered
+            ]
+    return neighbors
+
+
+def rebuild_neighbor_table(k=None, batch_size=1000):
+    """Пересчитывает таблицу ExcursionNeighbor целиком; возвращает количество записей"""
+    neighbors = compute_neighbors(k)
+    records = [
+        ExcursionNeighbor(excursion_id=excursion_id, neighbor_id=neighbor_id, rank=rank, score=score)
+        for excursion_id, items in neighbors.items()
+        for rank, (neighbor_id, score) in enumerate(items)
+    ]
+    with transaction.atomic():
+        ExcursionNeighbor.objects.all().delete()
+        ExcursionNeighbor.objects.bulk_create(records, batch_size=batch_size)
+        # bulk_create не шлет сигналы: блоки похожих на страницах экскурсий должны обновиться
+        bump_catalog_version(Excursion)
+    return len(records)
+
+
+def _card_queryset(language):
+    """Экскурсии с полями карточки и путем главного изображения (без отдельного запроса картинок)"""
+    return Excursion.objects.filter(status='published').localized(
+        language, 'title', related=('city', 'country')
+    ).only(
+        'id', 'slug', 'price', 'currency', 'rating', 'duration', 'duration_unit'
+    ).with_main_image()
+
+
+def get_similar_excursions(excursion, language, limit=4):
+    """
+    Похожие экскурсии для карточек одним запросом: из таблицы соседей,
+    а для еще не рассчитанных экскурсий - популярные той же категории.
+    """
+    similar = list(
+        _card_queryset(language).filter(neighbor_of__excursion=excursion).order_by('neighbor_of__rank')[:limit]
+    )
+    if similar:
+        return similar
+    return list(
+        _card_queryset(language).filter(category_id=excursion.category_id).exclude(
+            pk=excursion.pk
+        ).order_by('-popularity_score')[:limit]
+    )
+
+
+def similar_card_data(excursions):
+    """Данные карточек похожих экскурсий для JS-карусели"""
+    return [
+        {
+            'id': excursion.id,
+            'title': excursion.title,
+            'url': excursion.get_absolute_url(),
+            'image': default_storage.url(excursion.main_image_path) if excursion.main_image_path else None,
+            'location': f'{excursion.city_name}, {excursion.country_name}',
+            'rating': float(excursion.rating),
+            'price': f'{excursion.price:.0f} {excursion.currency}',
+            'duration': excursion.duration,
+            'duration_unit': excursion.duration_unit,
+        }
+        for excursion in excursions
+    ]
@@ -0,0 +1,210 @@
+"""
+Снимок справочных данных (страны, города, категории) для старта SPA одним запросом
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .caching import get_catalog_versions
+from .models import Country, City, Category
+
+try:
+    import brotli
+except ImportError:  # brotli опционален, без него отдаем gzip
+    brotli = None
+
+
+REFERENCE_MODELS = (Country, City, Category)
+REFERENCE_CACHE_TIMEOUT = 60 * 60 * 24  # сутки, актуальность обеспечивает версия в ключе
+POPULAR_CITIES_LIMIT = 8
+
+
+def _dumps(data):
+    """Компактная сериализация JSON"""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+
+
+def _digest(data):
+    return hashlib.sha1(_dumps(data).encode('utf-8')).hexdigest()[:16]
+
+
+def _localized(obj, field, language):
+    return getattr(obj, f'{field}_ru' if language == 'ru' else f'{field}_en')
+
+
+def _image_url(obj):
+    return obj.image.url if obj.image else None
+
+
+def build_reference_payload(language):
+    """Собирает справочник тремя запросами к БД; версия - хэш содержимого"""
+    cities_by_country = {}
+    popular_cities = []
+    for city in City.objects.select_related('country').only(
+        'id', 'name_ru', 'name_en', 'slug', 'image', 'is_popular', 'country__slug'
+    ):
+        cities_by_country.setdefault(city.country.slug, []).append({
+            'id': city.id,
+            'name': _localized(city, 'name', language),
+            'slug': city.slug,
+            'image': _image_url(city),
+            'is_popular': city.is_popular,
+        })
+        if city.is_popular and len(popular_cities) < POPULAR_CITIES_LIMIT:
+            popular_cities.append(city.id)
+
+    countries = [
+        {
+            'id': country.id,
+            'name': _localized(country, 'name', language),
+            'slug': country.slug,
+            'image': _image_url(country),
+            'is_popular': country.is_popular,
+            'cities_count': len(cities_by_country.get(country.slug, [])),
+        }
+        for country in Country.objects.only('id', 'name_ru', 'name_en', 'slug', 'image', 'is_popular')
+    ]
+
+    categories = [
+        {
+            'id': category.id,
+            'name': _localized(category, 'name', language),
+            'slug': category.slug,
+            'image': _image_url(category),
+            'icon': category.icon,
+            'color': category.color,
+            'is_featured': category.is_featured,
+        }
+        for category in Category.objects.only(
+            'id', 'name_ru', 'name_en', 'slug', 'image', 'icon', 'color', 'is_featured'
+        )
+    ]
+
+    payload = {
+        'language': language,
+        'countries': countries,
+        'categories': categories,
+        'popular_cities': popular_cities,
+        'cities': {
+            slug: {'digest': _digest(items), 'items': items}
+            for slug, items in cities_by_country.items()
+        },
+    }
+    payload['version'] = _digest(payload)
+    return payload
+
+
+class ReferenceSnapshot:
+    """Предсериализованный снимок справочника: JSON + сжатые варианты"""
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.version = payload['version']
+        self.body = _dumps(payload).encode('utf-8')
+        self.gzip = gzip.compress(self.body, compresslevel=9, mtime=0)
+        self.brotli = brotli.compress(self.body, quality=11) if brotli else None
+
+    def encoded(self, accept_encoding):
+        """Возвращает (тело, Content-Encoding) под Accept-Encoding клиента"""
+        if self.brotli is not None and 'br' in accept_encoding:
+            return self.brotli, 'br'
+        if 'gzip' in accept_encoding:
+            return self.gzip, 'gzip'
+        return self.body, None
+
+    def delta_body(self, known_digests):
+        """
+        JSON снимка без списков городов, которые у клиента уже есть в актуальной версии.
+        known_digests - {slug страны: digest}, вместо совпавших списков отдается только digest.
+        """
+        payload = dict(self.payload)
+        payload['cities'] = {
+            slug: {'digest': entry['digest']} if known_digests.get(slug) == entry['digest'] else entry
+            for slug, entry in self.payload['cities'].items()
+        }
+        return _dumps(payload).encode('utf-8')
+
+
+def encode_body(body, accept_encoding):
+    """Сжимает тело ответа на лету (для дельт, которые не кэшируются)"""
+    if brotli is not None and 'br' in accept_encoding:
+        return brotli.compress(body, quality=5), 'br'
+    if 'gzip' in accept_encoding:
+        return gzip.compress(body, compresslevel=6, mtime=0), 'gzip'
+    return body, None
+
+
+def parse_known_digests(value):
+    """Разбирает параметр known=slug:digest,slug:digest"""
+    known = {}
+    for part in (value or '').split(','):
+        slug, _, digest = part.partition(':')
+        if slug and digest:
+            known[slug.strip()] = digest.strip()
+    return known
+
+
+def _snapshot_dir():
+    return Path(getattr(settings, 'REFERENCE_SNAPSHOT_DIR', settings.BASE_DIR / 'cache' / 'reference'))
+
+
+def _snapshot_path(language, version):
+    return _snapshot_dir() / f'reference-{language}-{version}.json'
+
+
+def _write_to_disk(snapshot, language):
+    """Сохраняет снимок на диск (для версионированных URL после перезапуска/вытеснения из кэша)"""
+    try:
+        path = _snapshot_path(language, snapshot.version)
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.write_bytes(snapshot.body)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"⚠️ Не удалось сохранить снимок справочника на диск: {e}")
+
+
+def _read_from_disk(language, version):
+    try:
+        body = _snapshot_path(language, version).read_bytes()
+    except OSError:
+        return None
+    return ReferenceSnapshot(json.loads(body))
+
+
+def get_reference_snapshot(language):
+    """
+    Текущий снимок справочника. Пересобирается только при изменении
+    Country/City/Category (версии моделей входят в ключ кэша).
+    """
+    versions = get_catalog_versions(REFERENCE_MODELS)
+    cache_key = f"reference:snapshot:{language}:{'-'.join(str(v) for v in versions)}"
+    snapshot = cache.get(cache_key)
+    if snapshot is None:
+        snapshot = ReferenceSnapshot(build_reference_payload(language))
+        cache.set(cache_key, snapshot, REFERENCE_CACHE_TIMEOUT)
+        cache.set(f'reference:version:{language}:{snapshot.version}', snapshot, REFERENCE_CACHE_TIMEOUT)
+        _write_to_disk(snapshot, language)
+    return snapshot
+
+
+def get_reference_snapshot_version(language, version):
+    """Снимок конкретной версии: из кэша, затем с диска; None если версия неизвестна"""
+    if not re.fullmatch(r'[0-9a-f]{16}', version or ''):
+        return None
+    cache_key = f'reference:version:{language}:{version}'
+    snapshot = cache.get(cache_key)
+    if snapshot is None:
+        snapshot = _read_from_disk(language, version)
+        if snapshot is not None:
+            cache.set(cache_key, snapshot, REFERENCE_CACHE_TIMEOUT)
+    return snapshot
@@ -0,0 +1,100 @@
+"""
+Связи пользователя с экскурсиями (бронирования, отзыв, избранное) одним запросом,
+с запоминанием на время запроса
+"""
+
+from django.db.models import CharField, F, Value
+
+from .models import Booking, Favorite, Review
+
+
+# Статусы бронирования, дающие право оставить отзыв
+REVIEWABLE_BOOKING_STATUSES = ('confirmed', 'completed')
+
+# Приоритет статусов, когда у пользователя несколько бронирований одной экскурсии
+BOOKING_STATUS_PRIORITY = ('completed', 'confirmed', 'pending', 'cancelled')
+
+_REQUEST_ATTRIBUTE = '_excursion_relationships'
+
+
+def _empty_relationship():
+    return {
+        'booking_status': None,
+        'has_booking': False,
+        'has_reviewed': False,
+        'is_favorite': False,
+        'can_review': False,
+    }
+
+
+def _booking_rank(status):
+    return BOOKING_STATUS_PRIORITY.index(status) if status in BOOKING_STATUS_PRIORITY else len(BOOKING_STATUS_PRIORITY)
+
+
+def load_relationships(user, excursion_ids):
+    """
+    {excursion_id: связь} для пользователя одним UNION ALL запросом:
+    booking_status - самый значимый статус бронирования, has_booking - есть
+    подтвержденное или завершенное бронирование, has_reviewed, is_favorite и can_review.
+    """
+    excursion_ids = set(excursion_ids)
+    relationships = {excursion_id: _empty_relationship() for excursion_id in excursion_ids}
+    if not excursion_ids or not user.is_authenticated:
+        return relationships
+
+    def rows(queryset, kind, status=None):
+        return queryset.filter(user=user, excursion_id__in=excursion_ids).order_by().annotate(
+            kind=Value(kind, output_field=CharField()),
+            relation_status=status if status is not None else Value('', output_field=CharField()),
+        ).values_list('excursion_id', 'kind', 'relation_status')
+
+    combined = rows(Booking.objects, 'booking', F('status')).union(
+        rows(Review.objects, 'review'),
+        rows(Favorite.objects, 'favorite'),
+        all=True,
+    )
+
+    for excursion_id, kind, status in combined:
+        relationship = relationships[excursion_id]
+        if kind == 'booking':
+            current = relationship['booking_status']
+            if current is None or _booking_rank(status) < _booking_rank(current):
+                relationship['booking_status'] = status
+            relationship['has_booking'] |= status in REVIEWABLE_BOOKING_STATUSES
+        elif kind == 'review':
+            relationship['has_reviewed'] = True
+        else:
+            relationship['is_favorite'] = True
+
+    for relationship in relationships.values():
+        relationship['can_review'] = relationship['has_booking'] and not relationship['has_reviewed']
+    return relationships
+
+
+def get_relationships(request, excursion_ids):
+    """
+    Связи текущего пользователя с экскурсиями. Результат запоминается на request,
+    повторные вызовы в рамках запроса запрашивают только новые экскурсии.
+    """
+    cached = getattr(request, _REQUEST_ATTRIBUTE, None)
+    if cached is None:
+        cached = {}
+        setattr(request, _REQUEST_ATTRIBUTE, cached)
+
+    missing = set(excursion_ids) - cached.keys()
+    if missing:
+        cached.update(load_relationships(request.user, missing))
+    return {excursion_id: cached[excursion_id] for excursion_id in excursion_ids}
+
+
+def get_relationship(request, excursion_id):
+    """Связь текущего пользователя с одной экскурсией"""
+    return get_relationships(request, [excursion_id])[excursion_id]
+
+
+def forget_relationships(request, *excursion_ids):
+    """Сбрасывает запомненные связи после изменения (бронирование, отзыв, избранное)"""
+    cached = getattr(request, _REQUEST_ATTRIBUTE, None)
+    if cached:
+        for excursion_id in excursion_ids:
+            cached.pop(excursion_id, None)
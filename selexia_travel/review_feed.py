@@ -0,0 +1,144 @@
+"""
+Лента отзывов экскурсии: курсорная пагинация, данные авторов и фото за два запроса,
+кэш первой страницы. Ключ страницы включает версию ленты экскурсии из общего кэша
+(SHARED_CACHE), ее сдвигают сигналы Review / ReviewImage и модерация - во всех воркерах сразу
+"""
+
+import base64
+import binascii
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .caching import shared_cache
+from .models import Review, ReviewImage
+
+
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 50
+DEFAULT_CACHE_TIMEOUT = 60 * 60
+
+
+def default_page_size():
+    return getattr(settings, 'REVIEW_FEED_PAGE_SIZE', DEFAULT_PAGE_SIZE)
+
+
+def _cache_timeout():
+    return getattr(settings, 'REVIEW_FEED_CACHE_TIMEOUT', DEFAULT_CACHE_TIMEOUT)
+
+
+def _version_key(excursion_id):
+    return f'reviews:version:{excursion_id}'
+
+
+def _feed_version(excursion_id):
+    """Версия ленты экскурсии; при отсутствии создается (add - не затирая сдвиг из другого воркера)"""
+    cache = shared_cache()
+    key = _version_key(excursion_id)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(key, version, _cache_timeout()):
+            version = cache.get(key, version)
+    return version
+
+
+def _first_page_key(excursion_id, version):
+    return f'reviews:first_page:{excursion_id}:{version}'
+
+
+def encode_cursor(review):
+    raw = f'{review.created_at.isoformat()}|{review.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Курсор -> (created_at, id); ValueError для поврежденного курсора"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, review_id = raw.rsplit('|', 1)
+        created_at = parse_datetime(created_at)
+        review_id = int(review_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError('Invalid cursor')
+    if created_at is None:
+        raise ValueError('Invalid cursor')
+    return created_at, review_id
+
+
+def _serialize(reviews, images_by_review):
+    return [
+        {
+            'id': review.pk,
+            'rating': review.rating,
+            'text': review.text,
+            'created_at': review.created_at,
+            'user': {
+                'name': review.user.full_name,
+                'avatar': review.user.avatar.url if review.user.avatar else None,
+            },
+            'images': images_by_review.get(review.pk, []),
+        }
+        for review in reviews
+    ]
+
+
+def _build_page(excursion_id, cursor, page_size):
+    """
+    Страница отзывов от новых к старым по (created_at, id).
+    Ровно два запроса: отзывы с авторами (select_related) и фото всех отзывов страницы.
+    """
+    reviews = Review.objects.filter(excursion_id=excursion_id, is_approved=True).select_related('user').only(
+        'id', 'rating', 'text', 'created_at',
+        'user__first_name', 'user__last_name', 'user__username', 'user__avatar',
+    ).order_by('-created_at', '-id')
+    if cursor:
+        created_at, review_id = decode_cursor(cursor)
+        reviews = reviews.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=review_id))
+
+    reviews = list(reviews[:page_size + 1])
+    has_next = len(reviews) > page_size
+    reviews = reviews[:page_size]
+
+    images_by_review = {}
+    if reviews:
+        for review_id, image in ReviewImage.objects.filter(
+            review_id__in=[review.pk for review in reviews]
+        ).order_by('created_at', 'id').values_list('review_id', 'image'):
+            images_by_review.setdefault(review_id, []).append(default_storage.url(image))
+
+    return {
+        'results': _serialize(reviews, images_by_review),
+        'next_cursor': encode_cursor(reviews[-1]) if has_next else None,
+    }
+
+
+def get_review_page(excursion_id, cursor=None, page_size=None):
+    """
+    Страница ленты отзывов экскурсии. Первая страница стандартного размера
+    кэшируется до изменения отзывов этой экскурсии.
+    """
+    page_size = min(max(page_size or default_page_size(), 1), MAX_PAGE_SIZE)
+    if cursor or page_size != default_page_size():
+        return _build_page(excursion_id, cursor, page_size)
+
+    key = _first_page_key(excursion_id, _feed_version(excursion_id))
+    page = cache.get(key)
+    if page is None:
+        page = _build_page(excursion_id, None, page_size)
+        cache.set(key, page, _cache_timeout())
+    return page
+
+
+def invalidate_review_feed(*excursion_ids):
+    """Сдвигает версии лент после коммита транзакции: старые первые страницы больше не читаются"""
+    keys = [_version_key(excursion_id) for excursion_id in excursion_ids if excursion_id]
+    if keys:
+        transaction.on_commit(
+            lambda: shared_cache().set_many(dict.fromkeys(keys, time.time_ns()), _cache_timeout())
+        )
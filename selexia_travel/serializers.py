@@ -26,12 +26,19 @@ class CountrySerializer(serializers.ModelSerializer):
 class CitySerializer(serializers.ModelSerializer):
     """Сериализатор для городов"""
     country = CountrySerializer(read_only=True)
-    excursions_count = serializers.ReadOnlyField()
+    excursions_count = serializers.SerializerMethodField()
     
     class Meta:
         model = City
         fields = ['id', 'name_ru', 'name_en', 'country', 'slug', 'latitude', 'longitude', 'image', 'excursions_count', 'created_at']
 
+    def get_excursions_count(self, obj):
+        # При массовой выдаче счетчики заранее посчитаны одним запросом и лежат в контексте
+        counts = self.context.get('city_excursion_counts')
+        if counts is not None:
+            return counts.get(obj.pk, 0)
+        return obj.excursions_count
+
 class ExcursionSerializer(serializers.ModelSerializer):
     """Сериализатор для экскурсий"""
     category = CategorySerializer(read_only=True)
@@ -61,6 +68,9 @@ class ExcursionSerializer(serializers.ModelSerializer):
     def get_is_favorite(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
+            favorite_ids = self.context.get('favorite_excursion_ids')
+            if favorite_ids is not None:
+                return obj.pk in favorite_ids
             return obj.favorites.filter(user=request.user).exists()
         return False
 
@@ -0,0 +1,74 @@
+"""
+Генерация Service Worker из манифеста статики
+"""
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.urls import reverse
+
+
+# Статика сторонних приложений (админка, DRF) в Service Worker не попадает
+IGNORED_PREFIXES = ('admin/', 'rest_framework/')
+
+_context_cache = None
+
+
+def get_static_asset_urls():
+    """
+    Словарь {исходное имя: URL} всех статических файлов и строка для версии.
+    После collectstatic URL берутся из манифеста и содержат хэш содержимого.
+    """
+    hashed_files = getattr(staticfiles_storage, 'hashed_files', None)
+    if hashed_files and not settings.DEBUG:
+        assets = {
+            name: staticfiles_storage.url(name) for name in hashed_files
+            if not name.startswith(IGNORED_PREFIXES)
+        }
+        return assets, '|'.join(sorted(assets.values()))
+
+    # Разработка без collectstatic: исходные имена, версия по времени изменения файлов
+    assets = {}
+    stamps = []
+    for finder in finders.get_finders():
+        for path, storage in finder.list([]):
+            path = path.replace('\\', '/')
+            if path in assets or path.startswith(IGNORED_PREFIXES):
+                continue
+            assets[path] = staticfiles_storage.url(path)
+            stamps.append(f'{path}:{storage.get_modified_time(path).timestamp()}')
+    return assets, '|'.join(sorted(stamps))
+
+
+def build_service_worker_context():
+    """Контекст шаблона sw.js: версия, список предзагрузки и все актуальные URL статики"""
+    global _context_cache
+    if _context_cache is not None and not settings.DEBUG:
+        return _context_cache
+
+    assets, version_source = get_static_asset_urls()
+    precache = [
+        assets[name] for name in getattr(settings, 'SERVICE_WORKER_PRECACHE', [])
+        if name in assets
+    ]
+    context = {
+        'version': hashlib.sha1(version_source.encode('utf-8')).hexdigest()[:12],
+        'precache_urls': json.dumps(precache),
+        'asset_urls': json.dumps(sorted(assets.values())),
+        'static_url': settings.STATIC_URL,
+        'api_cache_prefixes': json.dumps(getattr(settings, 'SERVICE_WORKER_API_CACHE_PREFIXES', [])),
+        'api_cache_max_entries': int(getattr(settings, 'SERVICE_WORKER_API_CACHE_MAX_ENTRIES', 50)),
+        'image_cache_prefixes': json.dumps([
+            f'{settings.MEDIA_URL}{prefix}' for prefix in getattr(settings, 'SERVICE_WORKER_IMAGE_CACHE_PREFIXES', [])
+        ]),
+        'image_cache_max_bytes': int(getattr(settings, 'SERVICE_WORKER_IMAGE_CACHE_MAX_BYTES', 30 * 1024 * 1024)),
+        'bootstrap_url': reverse('api_bootstrap'),
+        'page_cache_paths': json.dumps(getattr(settings, 'SERVICE_WORKER_PAGE_CACHE_PATHS', ['/'])),
+        'page_cache_max_entries': int(getattr(settings, 'SERVICE_WORKER_PAGE_CACHE_MAX_ENTRIES', 20)),
+        'logout_url': reverse('account_logout'),
+    }
+    _context_cache = context
+    return context
@@ -28,6 +28,14 @@ DEBUG = config('DEBUG', default=True, cast=bool)
 
 ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='localhost,127.0.0.1', cast=Csv())
 
+# Провайдеры соцвхода. vk и mailru кнопок в шаблонах не имеют, но остаются в списке: без
+# провайдера allauth падает на уже сохраненных SocialAccount / SocialApp с этим provider.
+# Убирать провайдер из SOCIALACCOUNT_ENABLED_PROVIDERS можно только после удаления его записей
+# (админка «Социальные аккаунты» и «Социальные приложения»)
+SOCIALACCOUNT_ENABLED_PROVIDERS = config(
+    'SOCIALACCOUNT_ENABLED_PROVIDERS', default='google,facebook,vk,mailru,yandex', cast=Csv()
+)
+
 # Application definition
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -42,11 +50,7 @@ INSTALLED_APPS = [
     'allauth',
     'allauth.account',
     'allauth.socialaccount',
-    'allauth.socialaccount.providers.google',
-    'allauth.socialaccount.providers.facebook',
-    'allauth.socialaccount.providers.vk',
-    'allauth.socialaccount.providers.mailru',
-    'allauth.socialaccount.providers.yandex',
+    *[f'allauth.socialaccount.providers.{provider}' for provider in SOCIALACCOUNT_ENABLED_PROVIDERS],
     'crispy_forms',
     'crispy_bootstrap5',
     'rest_framework',
@@ -59,7 +63,9 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'selexia_travel.db_router.ReplicaRoutingMiddleware',
     'django.middleware.locale.LocaleMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -67,6 +73,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
+    'selexia_travel.caching.PrivateResponseMiddleware',
 ]
 
 ROOT_URLCONF = 'selexia_travel.urls'
@@ -75,15 +82,23 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'selexia_travel.context_processors.catalog_version',
                 # 'selexia_travel.context_processors.site_context',  # Временно отключен для отладки
             ],
+            # Скомпилированные шаблоны держим в памяти процесса (home.html и
+            # excursion_detail.html не парсятся заново на каждый запрос)
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -155,6 +170,29 @@ except Exception as e:
         }
     }
 
+# Реплики только для чтения каталога (через запятую): DATABASE_REPLICA_URLS=postgresql://...,postgresql://...
+# Локально: DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3 (копия db.sqlite3 или migrate --database replica_1)
+REPLICA_DATABASES = []
+for _index, _replica_url in enumerate(
+    url.strip() for url in config('DATABASE_REPLICA_URLS', default='').split(',') if url.strip()
+):
+    _alias = f'replica_{_index + 1}'
+    DATABASES[_alias] = dj_database_url.parse(_replica_url, conn_max_age=600, conn_health_checks=True)
+    if 'postgresql' in _replica_url:
+        DATABASES[_alias]['OPTIONS'] = {
+            'connect_timeout': 10,
+            'sslmode': 'require',
+            'application_name': 'selexia_travel_replica',
+        }
+    # В тестах реплика - зеркало default
+    DATABASES[_alias]['TEST'] = {'MIRROR': 'default'}
+    REPLICA_DATABASES.append(_alias)
+
+DATABASE_ROUTERS = ['selexia_travel.db_router.ReplicaRouter']
+
+# Сколько секунд после своей записи (или изменения каталога) пользователь читает из основной БД
+REPLICA_STICKY_SECONDS = 10
+
 # Логирование настроек базы данных
 print(f"🔍 Настройки БД:")
 print(f"   DATABASE_URL: {'Установлен' if config('DATABASE_URL', default='') else 'Не установлен'}")
@@ -163,6 +201,7 @@ print(f"   DB_NAME: {config('DB_NAME', default='Не установлен')}")
 print(f"   DB_HOST: {config('DB_HOST', default='Не установлен')}")
 print(f"   DB_PORT: {config('DB_PORT', default='Не установлен')}")
 print(f"   Текущий ENGINE: {DATABASES['default']['ENGINE']}")
+print(f"   Реплики для чтения: {', '.join(REPLICA_DATABASES) or 'нет'}")
 
 # Дополнительные настройки PostgreSQL
 try:
@@ -238,6 +277,49 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+# Хэшированные имена + предсжатые .gz/.br копии (собираются collectstatic, отдаются whitenoise)
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'selexia_travel.storage.SelexiaStaticFilesStorage',
+    },
+}
+
+# Файлы, которые Service Worker (/sw.js) кэширует при установке
+SERVICE_WORKER_PRECACHE = [
+    'css/style.css',
+    'css/base.css',
+    'css/home.css',
+    'js/main.js',
+    'js/base.js',
+    'js/home.js',
+    'images/SelexiaLogo.svg',
+]
+
+# Service Worker: API каталога по схеме stale-while-revalidate (LRU по числу записей)
+SERVICE_WORKER_API_CACHE_PREFIXES = [
+    '/api/bootstrap/',
+    '/api/countries/',
+    '/api/categories/',
+    '/api/cities/',
+    '/api/cities-home/',
+    '/api/excursions/',
+]
+SERVICE_WORKER_API_CACHE_MAX_ENTRIES = 50
+
+# Service Worker: HTML для просмотра без сети - только публичные разделы ('/' - только главная),
+# ответы с Cache-Control: private (все страницы вошедших, см. PrivateResponseMiddleware) не сохраняются
+SERVICE_WORKER_PAGE_CACHE_PATHS = [
+    '/', '/catalog/', '/excursion/', '/country/', '/about/', '/contact/', '/faq/', '/terms/', '/privacy/',
+]
+SERVICE_WORKER_PAGE_CACHE_MAX_ENTRIES = 20
+
+# Service Worker: изображения экскурсий из MEDIA (вытеснение по суммарному объему)
+SERVICE_WORKER_IMAGE_CACHE_PREFIXES = ['excursions/', 'countries/', 'cities/', 'categories/']
+SERVICE_WORKER_IMAGE_CACHE_MAX_BYTES = 30 * 1024 * 1024
+
 # Добавляем Vue.js директорию только если она существует
 vue_dist_dir = BASE_DIR / 'static' / 'dist'
 if vue_dist_dir.exists():
@@ -273,6 +355,9 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'selexia_travel.rate_limiting.RateLimitThrottle',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_RENDERER_CLASSES': [
@@ -320,6 +405,104 @@ CACHES = {
     }
 }
 
+# Общий для всех воркеров кэш: версии каталога и лент отзывов (ETag, ключи кэша).
+# При REDIS_URL - Redis, без него на Railway - таблица в БД (createcachetable в railway_start.py),
+# локально - память процесса (runserver - один процесс)
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES['shared'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    }
+elif RAILWAY_ENVIRONMENT:
+    CACHES['shared'] = {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'selexia_shared_cache',
+    }
+else:
+    CACHES['shared'] = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'selexia-shared',
+    }
+SHARED_CACHE = 'shared'
+
+# Ограничение частоты запросов (selexia_travel/rate_limiting.py).
+# Счетчики общие для всех воркеров (SHARED_CACHE); на Railway кэш процесса не допускает
+# manage.py check (selexia_travel/checks.py). В таблице БД incr не атомарен - при всплесках
+# счет может немного занижаться, точный счет - с REDIS_URL
+RATE_LIMIT_CACHE = SHARED_CACHE
+RATE_LIMIT_ENABLED = config('RATE_LIMIT_ENABLED', default=True, cast=bool)
+# Бюджеты по эндпоинтам: "<число>/<s|m|h|d>" на IP (анонимы) и на пользователя (вошедшие)
+RATE_LIMITS = {
+    'api': {'ip': '300/m', 'user': '600/m'},  # все DRF views без своего бюджета
+    'search_autocomplete': {'ip': '60/m', 'user': '120/m'},
+    'application': {'ip': '10/h'},  # заявка отправляет письма синхронно
+    'contact': {'ip': '10/h'},
+    'booking': {'ip': '30/h', 'user': '20/h'},
+    'favorites': {'ip': '60/m', 'user': '60/m'},
+    'auth_login': {'ip': '10/m'},
+    'auth_signup': {'ip': '10/h'},
+    'auth_password_reset': {'ip': '5/h'},
+}
+# Сколько прокси добавляют адрес в X-Forwarded-For (Railway - один): IP клиента - N-й с конца
+RATE_LIMIT_TRUSTED_PROXIES = 1 if RAILWAY_ENVIRONMENT else 0
+
+# HTTP-кэширование JSON каталога (ETag / Last-Modified / Cache-Control)
+CATALOG_VERSION_TIMEOUT = 60 * 60 * 24  # время жизни версии семейства моделей (в SHARED_CACHE), сек
+CATALOG_CACHE_CONTROL = {
+    'max_age': 60,
+    's_maxage': 300,
+    'stale_while_revalidate': 600,
+}
+
+# Потоковая выдача legacy excursions_api
+LEGACY_EXCURSIONS_API_MAX_ITEMS = 1000
+LEGACY_EXCURSIONS_API_CHUNK_SIZE = 200
+
+# Скор популярности экскурсий (команда update_popularity: cron-сервис Railway раз в час
+# или процесс worker из Procfile, см. RAILWAY_DEPLOYMENT.md)
+POPULARITY_WEIGHTS = {
+    'views': 1.0,
+    'bookings': 25.0,
+    'favorites': 8.0,
+    'rating': 5.0,
+}
+POPULARITY_HALF_LIFE_DAYS = 7
+POPULAR_EXCURSIONS_LIMIT = 12
+
+# Гео-поиск экскурсий (/api/geo/nearby/, /api/geo/clusters/)
+GEO_GRID_CELL_DEGREES = 1.0
+GEO_NEARBY_DEFAULT_RADIUS_KM = 50
+GEO_NEARBY_MAX_RADIUS_KM = 500
+GEO_NEARBY_MAX_LIMIT = 100
+
+# Лента отзывов экскурсии (/api/excursions/<id>/reviews/): первая страница кэшируется
+REVIEW_FEED_PAGE_SIZE = 10
+REVIEW_FEED_CACHE_TIMEOUT = 60 * 60
+
+# Пакетная синхронизация избранного (/api/favorites/sync/): максимум операций в запросе
+FAVORITES_SYNC_MAX_OPERATIONS = 200
+
+# Пакет детальной страницы экскурсии (ключ версионируется каталогом, таймаут - страховка)
+EXCURSION_DETAIL_CACHE_TIMEOUT = 60 * 10
+
+# Похожие экскурсии (команда build_recommendations, запускается по расписанию)
+RECOMMENDATION_NEIGHBORS_COUNT = 8
+RECOMMENDATION_WEIGHTS = {
+    'category': 3.0,
+    'city': 2.0,
+    'country': 1.0,
+    'price': 1.5,
+    'co_interest': 4.0,
+    'popularity': 0.1,
+}
+
+# Снимки справочника (страны/города/категории) для /api/bootstrap/
+REFERENCE_SNAPSHOT_DIR = BASE_DIR / 'cache' / 'reference'
+
+# Модули, которые не должны загружаться при старте воркера (проверка: manage.py audit_imports --check)
+IMPORT_AUDIT_FORBIDDEN_MODULES = ('PIL', 'numpy', 'googleapiclient', 'google_auth_oauthlib', 'google.oauth2')
+
 # Session настройки
 SESSION_COOKIE_AGE = 86400 * 30  # 30 дней
 SESSION_COOKIE_SECURE = not DEBUG
@@ -597,6 +780,12 @@ GMAIL_CLIENT_ID = config('GMAIL_CLIENT_ID', default='your-gmail-client-id.apps.g
 GMAIL_CLIENT_SECRET = config('GMAIL_CLIENT_SECRET', default='your-gmail-client-secret')
 GMAIL_CREDENTIALS_FILE = config('GMAIL_CREDENTIALS_FILE', default='credentials.json')
 GMAIL_TOKEN_FILE = config('GMAIL_TOKEN_FILE', default='token.json')
+# Адреса Gmail API и OAuth (переопределяются для локальной подмены Gmail в тестах)
+GMAIL_API_ROOT_URL = config('GMAIL_API_ROOT_URL', default='https://gmail.googleapis.com/')
+GMAIL_TOKEN_URI = config('GMAIL_TOKEN_URI', default='https://oauth2.googleapis.com/token')
+# Письма пользователя кэшируются, заголовки загружаются batch-запросами по GMAIL_BATCH_SIZE
+GMAIL_MESSAGES_CACHE_TIMEOUT = 60 * 5
+GMAIL_BATCH_SIZE = 50
 
 # Проверка критических переменных окружения
 print(f"🔍 Проверка переменных окружения:")
@@ -1,18 +1,44 @@
-from django.db.models.signals import post_save, post_delete, pre_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.db.models import Avg, Count
 from django.core.mail import send_mail
 from django.conf import settings
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
+from contextlib import contextmanager
+import threading
 
-from .models import Review, Booking, Application, User, Excursion
+from .models import Review, ReviewImage, Booking, Application, User, Excursion, ExcursionImage, Country, City, Category, Favorite
+from .caching import bump_catalog_version, NON_CATALOG_FIELDS
+from .review_feed import invalidate_review_feed
+
+
+_review_signals_state = threading.local()
+
+
+@contextmanager
+def suppress_review_signals():
+    """Отключает пересчет рейтинга и уведомления по отзывам на время массовых операций"""
+    previous = getattr(_review_signals_state, 'suppressed', False)
+    _review_signals_state.suppressed = True
+    try:
+        yield
+    finally:
+        _review_signals_state.suppressed = previous
+
+
+def review_signals_suppressed():
+    """Проверяет, отключены ли сигналы отзывов в текущем потоке"""
+    return getattr(_review_signals_state, 'suppressed', False)
 
 
 @receiver(post_save, sender=Review)
 @receiver(post_delete, sender=Review)
 def update_excursion_rating(sender, instance, **kwargs):
     """Обновление рейтинга экскурсии при изменении отзывов"""
+    if review_signals_suppressed():
+        return
+    
     excursion = instance.excursion
     
     # Пересчитываем рейтинг и количество отзывов
@@ -25,6 +51,25 @@ def update_excursion_rating(sender, instance, **kwargs):
     excursion.save(update_fields=['rating', 'reviews_count'])
 
 
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_review_feed_on_review_change(sender, instance, **kwargs):
+    """Сброс кэша первой страницы ленты отзывов экскурсии"""
+    if review_signals_suppressed():
+        return
+    invalidate_review_feed(instance.excursion_id)
+
+
+@receiver(post_save, sender=ReviewImage)
+@receiver(post_delete, sender=ReviewImage)
+def invalidate_review_feed_on_image_change(sender, instance, **kwargs):
+    """Фото отзыва входят в ленту: сбрасываем кэш экскурсии этого отзыва"""
+    if review_signals_suppressed():
+        return
+    excursion_id = Review.objects.filter(pk=instance.review_id).values_list('excursion_id', flat=True).first()
+    invalidate_review_feed(excursion_id)
+
+
 @receiver(post_save, sender=Booking)
 def send_booking_confirmation_email(sender, instance, created, **kwargs):
     """Отправка email подтверждения бронирования"""
@@ -129,16 +174,12 @@ def send_welcome_email(sender, instance, created, **kwargs):
         )
 
 
-@receiver(pre_save, sender=Excursion)
-def update_excursion_popularity(sender, instance, **kwargs):
-    """Автоматическое обновление популярности экскурсии"""
-    if instance.views_count >= 100:
-        instance.is_popular = True
-
-
 @receiver(post_save, sender=Review)
 def send_review_notification(sender, instance, created, **kwargs):
     """Уведомление о новом отзыве"""
+    if review_signals_suppressed():
+        return
+    
     if created:
         subject = f'Новый отзыв для экскурсии: {instance.excursion.title_ru}'
         html_message = render_to_string('emails/review_notification.html', {
@@ -153,4 +194,27 @@ def send_review_notification(sender, instance, created, **kwargs):
             recipient_list=[settings.DEFAULT_FROM_EMAIL],
             html_message=html_message,
             fail_silently=True,
-        )
\ No newline at end of file
+        )
+
+
+# Favorite - для ответов с is_favorite (vary_on_user); bulk_create в favorites.py сдвигает версию сам
+CATALOG_VERSIONED_MODELS = (Country, City, Category, Excursion, ExcursionImage, Review, ReviewImage, Booking, Favorite)
+
+
+def bump_catalog_version_on_change(sender, instance, **kwargs):
+    """Сдвигает версию каталога (для ETag) при сохранении или удалении объекта"""
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) <= NON_CATALOG_FIELDS:
+        return
+    bump_catalog_version(sender)
+
+
+for _model in CATALOG_VERSIONED_MODELS:
+    post_save.connect(
+        bump_catalog_version_on_change, sender=_model,
+        dispatch_uid=f'catalog_version_save_{_model._meta.label_lower}'
+    )
+    post_delete.connect(
+        bump_catalog_version_on_change, sender=_model,
+        dispatch_uid=f'catalog_version_delete_{_model._meta.label_lower}'
+    )
@@ -0,0 +1,15 @@
+"""
+Хранилище статики: хэши в именах файлов и предсжатые .gz/.br копии
+"""
+
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+class SelexiaStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    collectstatic кладет рядом с каждым файлом его хэшированную копию
+    (style.3f2a...css) и сжатые .gz/.br версии; whitenoise отдает хэшированные
+    файлы с Cache-Control: immutable и выбирает сжатую версию по Accept-Encoding.
+    """
+    # Файлы, которых нет в манифесте (например, до collectstatic), отдаются по исходному имени
+    manifest_strict = False
@@ -0,0 +1,110 @@
+"""
+Локальная подмена Gmail API и OAuth для тестов: выдача токенов, список писем и batch-запросы.
+Адрес подставляется в GMAIL_API_ROOT_URL и GMAIL_TOKEN_URI.
+"""
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeGmailHandler(BaseHTTPRequestHandler):
+    server_version = 'FakeGmail/1.0'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, body, content_type='application/json', status=200):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, data, status=200):
+        self._send(json.dumps(data).encode(), status=status)
+
+    def do_GET(self):
+        fake = self.server.fake
+        if self.path.startswith('/gmail/v1/users/me/messages?'):
+            fake.count('list')
+            total = int(re.search(r'maxResults=(\d+)', self.path).group(1))
+            return self._json({'messages': [{'id': f'm{number}'} for number in range(total)]})
+        if '/messages/' in self.path:
+            fake.count('get')
+            return self._json(fake.message(self.path.split('/messages/', 1)[1].split('?', 1)[0]))
+        self._json({'error': 'not found'}, status=404)
+
+    def do_POST(self):
+        fake = self.server.fake
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.path == '/token':
+            number = fake.count('token')
+            time.sleep(fake.token_delay)
+            return self._json({'access_token': f'token-{number}', 'expires_in': 3600, 'token_type': 'Bearer'})
+        if self.path.startswith('/batch/gmail/v1'):
+            fake.count('batch')
+            return self._batch(body.decode())
+        self._json({'error': 'not found'}, status=404)
+
+    def _batch(self, body):
+        """Ответ multipart/mixed: на каждую вложенную часть GET .../messages/<id> - письмо"""
+        boundary = re.search(r'boundary="?([^";]+)', self.headers['Content-Type']).group(1)
+        parts = [part for part in body.split(f'--{boundary}') if 'HTTP/1.1' in part]
+        response_boundary = 'fake_gmail_batch'
+        chunks = []
+        for part in parts:
+            self.server.fake.count('batch_parts')
+            content_id = re.search(r'Content-ID: <(.+?)>', part).group(1)
+            message_id = re.search(r'GET \S+/messages/([^?\s]+)', part).group(1)
+            message = json.dumps(self.server.fake.message(message_id))
+            chunks.append(
+                f'--{response_boundary}\r\nContent-Type: application/http\r\n'
+                f'Content-ID: <response-{content_id}>\r\n\r\n'
+                f'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n'
+                f'Content-Length: {len(message)}\r\n\r\n{message}\r\n'
+            )
+        chunks.append(f'--{response_boundary}--\r\n')
+        self._send(''.join(chunks).encode(), content_type=f'multipart/mixed; boundary={response_boundary}')
+
+
+class FakeGmail:
+    """Сервер в фоновом потоке; calls - число обращений по видам (token, list, get, batch, batch_parts)"""
+
+    def __init__(self, token_delay=0.0):
+        self.token_delay = token_delay
+        self.calls = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), FakeGmailHandler)
+        self._server.fake = self
+
+    @property
+    def root_url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}/'
+
+    def count(self, kind):
+        with self._lock:
+            self.calls[kind] = self.calls.get(kind, 0) + 1
+            return self.calls[kind]
+
+    def message(self, message_id):
+        return {
+            'id': message_id,
+            'snippet': f'Текст {message_id}',
+            'payload': {'headers': [
+                {'name': 'Subject', 'value': f'Тема {message_id}'},
+                {'name': 'From', 'value': 'sender@example.com'},
+                {'name': 'Date', 'value': 'Mon, 19 Oct 2026 10:00:00 +0000'},
+            ]},
+        }
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,30 @@
+"""
+Маршруты API: асинхронные списки каталога не перекрыты роутером DRF
+"""
+
+from django.test import SimpleTestCase
+from django.urls import resolve
+
+from api import views
+
+
+class CatalogRoutesTests(SimpleTestCase):
+
+    def test_async_catalog_views_are_reachable(self):
+        routes = {
+            '/api/excursions/': views.api_excursions,
+            '/api/countries/': views.api_countries,
+            '/api/categories/': views.api_categories,
+            '/api/cities/': views.api_cities,
+            '/api/cities-home/': views.api_cities_for_home,
+            '/api/stats/': views.api_stats,
+            '/api/search/autocomplete/': views.search_autocomplete,
+        }
+        for path, view in routes.items():
+            with self.subTest(path=path):
+                self.assertIs(resolve(path).func, view)
+
+    def test_viewset_routes_remain(self):
+        self.assertEqual(resolve('/api/excursions/1/').url_name, 'excursion-detail')
+        self.assertEqual(resolve('/api/excursions/stats/').url_name, 'excursion-stats')
+        self.assertEqual(resolve('/api/search/').url_name, 'api-search')
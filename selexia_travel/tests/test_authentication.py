@@ -0,0 +1,52 @@
+"""
+Пользователь сессии: изменения в БД (пароль, блокировка, профиль) видны со следующего запроса
+"""
+
+from django.contrib.auth import BACKEND_SESSION_KEY, get_user
+from django.http import HttpRequest
+
+from selexia_travel.models import User
+
+from .utils import CatalogTestCase
+
+
+class SessionUserTests(CatalogTestCase):
+
+    def _session_user(self):
+        request = HttpRequest()
+        request.session = self.client.session
+        return get_user(request)
+
+    def test_sessions_keep_original_backend_paths(self):
+        for backend in ('django.contrib.auth.backends.ModelBackend',
+                        'allauth.account.auth_backends.AuthenticationBackend'):
+            self.client.force_login(self.user, backend=backend)
+            self.assertEqual(self.client.session[BACKEND_SESSION_KEY], backend)
+            self.assertEqual(self._session_user().pk, self.user.pk)
+
+    def test_password_change_ends_other_sessions(self):
+        self.client.force_login(self.user)
+        self.assertTrue(self._session_user().is_authenticated)
+
+        self.user.set_password('secret-2')
+        self.user.save()
+
+        self.assertFalse(self._session_user().is_authenticated)
+
+    def test_deactivation_by_update_applies_immediately(self):
+        self.client.force_login(self.user)
+        self.assertTrue(self._session_user().is_authenticated)
+
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        self.assertFalse(self._session_user().is_authenticated)
+
+    def test_profile_update_is_visible_immediately(self):
+        self.client.force_login(self.user)
+        self._session_user()
+
+        User.objects.filter(pk=self.user.pk).update(first_name='Анна', is_staff=True)
+
+        user = self._session_user()
+        self.assertEqual(user.first_name, 'Анна')
+        self.assertTrue(user.is_staff)
@@ -0,0 +1,104 @@
+"""
+Условные ответы каталога: ETag / 304, сдвиг версий и счетчик просмотров
+"""
+
+from django.test import RequestFactory
+
+from selexia_travel.api_views import excursion_detail_api
+from selexia_travel.caching import get_catalog_versions, shared_cache
+from selexia_travel.favorites import toggle_favorite
+from selexia_travel.models import Excursion, Favorite
+
+from .utils import CatalogTestCase
+
+
+class CatalogETagTests(CatalogTestCase):
+
+    def test_repeated_request_with_etag_gets_304(self):
+        response = self.client.get('/api/excursions/popular/')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+
+        response = self.client.get('/api/excursions/popular/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_async_catalog_list_gets_304(self):
+        response = self.client.get('/api/excursions/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), len(self.excursions))
+
+        response = self.client.get('/api/excursions/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_catalog_change_gives_new_etag(self):
+        etag = self.client.get('/api/excursions/popular/')['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            excursion = self.excursions[0]
+            excursion.title_ru = 'Новое название'
+            excursion.save()
+
+        response = self.client.get('/api/excursions/popular/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_views_count_does_not_change_etag(self):
+        etag = self.client.get('/api/excursions/popular/')['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Excursion.objects.filter(pk=self.excursions[0].pk).update(views_count=100)
+            excursion = Excursion.objects.get(pk=self.excursions[0].pk)
+            excursion.save(update_fields=['views_count'])
+
+        response = self.client.get('/api/excursions/popular/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_versions_live_in_shared_cache(self):
+        versions = get_catalog_versions((Excursion,))
+        self.assertEqual(shared_cache().get('catalog:version:selexia_travel.excursion'), versions[0])
+
+
+class ExcursionViewsCountTests(CatalogTestCase):
+
+    def test_view_counted_when_response_is_304(self):
+        excursion = self.excursions[0]
+        url = f'/api/excursions/{excursion.pk}/'
+
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        excursion.refresh_from_db()
+        self.assertEqual(excursion.views_count, 2)
+
+    def test_unknown_excursion_is_not_counted(self):
+        response = self.client.get('/api/excursions/999999/')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(sum(Excursion.objects.values_list('views_count', flat=True)), 0)
+
+
+class FavoriteETagTests(CatalogTestCase):
+
+    def _detail(self, etag=None):
+        request = RequestFactory().get('/api/excursion/', HTTP_IF_NONE_MATCH=etag or '')
+        request.user = self.user
+        request.LANGUAGE_CODE = 'ru'
+        return excursion_detail_api(request, slug=self.excursions[0].slug)
+
+    def test_favorite_toggle_invalidates_personal_etag(self):
+        response = self._detail()
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertEqual(self._detail(etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            toggle_favorite(self.user, 'excursion', self.excursions[0].pk)
+        self.assertTrue(Favorite.objects.filter(user=self.user).exists())
+        self.assertEqual(self._detail(etag).status_code, 200)
+
+        etag = self._detail()['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            toggle_favorite(self.user, 'excursion', self.excursions[0].pk)
+        self.assertEqual(self._detail(etag).status_code, 200)
@@ -0,0 +1,50 @@
+"""
+Чтение с реплик: после чужих изменений избранного каталог читается с реплик, после изменений каталога - из основной БД
+"""
+
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from selexia_travel import db_router
+from selexia_travel.favorites import toggle_favorite
+from selexia_travel.models import Excursion
+
+from .utils import CatalogTestCase
+
+
+@override_settings(REPLICA_DATABASES=['replica_1'])
+class ReplicaRoutingMiddlewareTests(CatalogTestCase):
+
+    def _reads_primary(self, method='get', cookies=None):
+        seen = []
+
+        def view(request):
+            seen.append(db_router._use_primary.get())
+            return HttpResponse()
+
+        request = getattr(RequestFactory(), method)('/catalog/')
+        request.COOKIES.update(cookies or {})
+        response = db_router.ReplicaRoutingMiddleware(view)(request)
+        return seen[0], response
+
+    def test_catalog_reads_go_to_replicas(self):
+        self.assertFalse(self._reads_primary()[0])
+
+    def test_favorite_toggle_does_not_force_other_users_to_primary(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            toggle_favorite(self.user, 'excursion', self.excursions[0].pk)
+
+        self.assertFalse(self._reads_primary()[0])
+
+    def test_catalog_change_sends_reads_to_primary(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Excursion.objects.filter(pk=self.excursions[0].pk).first().save()
+
+        self.assertTrue(self._reads_primary()[0])
+
+    def test_writer_reads_own_writes_from_primary(self):
+        reads_primary, response = self._reads_primary(method='post')
+        self.assertTrue(reads_primary)
+
+        cookie = response.cookies[db_router.PRIMARY_COOKIE_NAME].value
+        self.assertTrue(self._reads_primary(cookies={db_router.PRIMARY_COOKIE_NAME: cookie})[0])
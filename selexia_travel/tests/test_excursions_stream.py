@@ -0,0 +1,77 @@
+"""
+Legacy excursions_api: потоковая выдача под ASGI (JSON-массив и NDJSON), лимит записей и is_favorite
+"""
+
+import json
+
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from selexia_travel.api_views import excursions_api
+from selexia_travel.models import Favorite
+
+from .utils import CatalogTestCase
+
+
+@override_settings(LEGACY_EXCURSIONS_API_MAX_ITEMS=4, LEGACY_EXCURSIONS_API_CHUNK_SIZE=2)
+class ExcursionsStreamTests(CatalogTestCase):
+    excursions_count = 5
+
+    def _get(self, query='', user=None, **headers):
+        request = RequestFactory().get(f'/api/excursions/{query}', **headers)
+        if user is not None:
+            request.user = user
+        response = excursions_api(request)
+        self.assertTrue(response.is_async)
+
+        # Так тело отдает ASGI-обработчик Django: async for по чанкам в цикле событий
+        async def consume():
+            return [chunk async for chunk in response]
+
+        chunks = async_to_sync(consume)()
+        return response, chunks, b''.join(chunks).decode()
+
+    def test_json_array_is_capped_and_streamed_in_chunks(self):
+        response, chunks, body = self._get()
+
+        self.assertEqual(response['Content-Type'], 'application/json')
+        items = json.loads(body)
+        self.assertEqual(len(items), 4)
+        self.assertEqual(len({item['id'] for item in items}), 4)
+        self.assertGreater(len(chunks), 1)
+
+    def test_ndjson_lines_are_capped(self):
+        for query, headers in (('?format=ndjson', {}), ('', {'HTTP_ACCEPT': 'application/x-ndjson'})):
+            with self.subTest(query=query, headers=headers):
+                response, _, body = self._get(query, **headers)
+
+                self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+                self.assertTrue(body.endswith('\n'))
+                lines = body.splitlines()
+                self.assertEqual(len(lines), 4)
+                self.assertTrue(all('id' in json.loads(line) for line in lines))
+
+    def test_empty_result(self):
+        _, _, body = self._get('?category=999999')
+        self.assertEqual(json.loads(body), [])
+
+        _, _, body = self._get('?category=999999&format=ndjson')
+        self.assertEqual(body, '')
+
+    def test_is_favorite_from_precomputed_ids(self):
+        favorite = self.excursions[-1]
+        Favorite.objects.create(user=self.user, item_type='excursion', excursion=favorite)
+
+        with CaptureQueriesContext(connection) as queries:
+            _, _, body = self._get(user=self.user)
+
+        flags = {item['id']: item['is_favorite'] for item in json.loads(body)}
+        self.assertEqual([pk for pk, is_favorite in flags.items() if is_favorite], [favorite.pk])
+        favorite_queries = [query for query in queries.captured_queries if 'selexia_travel_favorite' in query['sql']]
+        self.assertEqual(len(favorite_queries), 1)
+
+    def test_anonymous_user_has_no_favorites(self):
+        _, _, body = self._get()
+        self.assertFalse(any(item['is_favorite'] for item in json.loads(body)))
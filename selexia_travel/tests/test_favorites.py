@@ -0,0 +1,85 @@
+"""
+API избранного: переключение, проверка входных данных и пакетная синхронизация
+"""
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.views import FavoriteViewSet
+from selexia_travel.models import Favorite
+
+from .utils import CatalogTestCase
+
+
+class FavoritesToggleTests(CatalogTestCase):
+    url = '/api/favorites/toggle/'
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def _toggle(self, payload):
+        return self.client.post(self.url, payload, content_type='application/json')
+
+    def test_toggle_adds_and_removes(self):
+        excursion = self.excursions[0]
+
+        response = self._toggle({'item_id': excursion.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['is_favorite'], True)
+        self.assertEqual(response.json()['favorites_count'], 1)
+
+        response = self._toggle({'item_id': excursion.pk, 'item_type': 'excursion'})
+        self.assertEqual(response.json()['is_favorite'], False)
+        self.assertFalse(Favorite.objects.filter(user=self.user).exists())
+
+    def test_invalid_payload_gets_400(self):
+        for payload in ({'item_id': 'abc'}, {}, {'item_id': self.excursions[0].pk, 'item_type': 'hotel'}):
+            with self.subTest(payload=payload):
+                self.assertEqual(self._toggle(payload).status_code, 400)
+
+    def test_missing_item_status_matches_viewset(self):
+        toggle = self._toggle({'item_id': 999999, 'item_type': 'excursion'})
+        # FavoriteViewSet не подключен к роутеру - вызываем напрямую
+        request = APIRequestFactory().post('/', {'item_id': 999999, 'item_type': 'excursion'}, format='json')
+        force_authenticate(request, user=self.user)
+        create = FavoriteViewSet.as_view({'post': 'create'})(request)
+        self.assertEqual(toggle.status_code, 400)
+        self.assertEqual(toggle.status_code, create.status_code)
+        self.assertEqual(toggle.json()['error'], create.data['error'])
+
+
+class FavoritesSyncTests(CatalogTestCase):
+    url = '/api/favorites/sync/'
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def _sync(self, operations):
+        return self.client.post(self.url, {'operations': operations}, content_type='application/json')
+
+    def test_last_operation_per_item_wins(self):
+        first, second, _ = self.excursions
+        Favorite.objects.create(user=self.user, item_type='excursion', excursion=second)
+
+        response = self._sync([
+            {'op': 'add', 'item_type': 'excursion', 'item_id': first.pk},
+            {'op': 'remove', 'item_type': 'excursion', 'item_id': first.pk},
+            {'op': 'add', 'item_type': 'excursion', 'item_id': first.pk},
+            {'op': 'remove', 'item_type': 'excursion', 'item_id': second.pk},
+            {'op': 'add', 'item_type': 'country', 'item_id': 999999},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['added'], [{'item_type': 'excursion', 'item_id': first.pk}])
+        self.assertEqual(data['removed'], [{'item_type': 'excursion', 'item_id': second.pk}])
+        self.assertEqual(data['rejected'], [{'item_type': 'country', 'item_id': 999999}])
+        self.assertEqual(
+            list(Favorite.objects.filter(user=self.user).values_list('excursion_id', flat=True)), [first.pk]
+        )
+
+    def test_invalid_operations_get_400(self):
+        for operations in ([], [{'op': 'add', 'item_type': 'excursion', 'item_id': 'abc'}]):
+            with self.subTest(operations=operations):
+                self.assertEqual(self._sync(operations).status_code, 400)
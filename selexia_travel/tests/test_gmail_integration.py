@@ -0,0 +1,104 @@
+"""
+Gmail: batch-запросы писем, кэш писем и однократное обновление токена (на локальной подмене Gmail)
+"""
+
+import threading
+import unittest
+from datetime import timedelta
+from importlib.util import find_spec
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from selexia_travel.caching import shared_cache
+from selexia_travel.gmail_integration import GmailProfileUpdater, messages_cache_key
+from selexia_travel.models import GmailCredentials, User
+
+from .fake_gmail import FakeGmail
+
+
+class FakeGmailMixin:
+    token_delay = 0.0
+
+    def setUp(self):
+        super().setUp()
+        shared_cache().clear()
+        self.gmail = FakeGmail(token_delay=self.token_delay).start()
+        self.addCleanup(self.gmail.stop)
+        settings_override = override_settings(
+            GMAIL_API_ROOT_URL=self.gmail.root_url,
+            GMAIL_TOKEN_URI=f'{self.gmail.root_url}token',
+            GMAIL_BATCH_SIZE=3,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create_user(username='mailer', email='mailer@example.com')
+
+
+@unittest.skipUnless(find_spec('googleapiclient'), 'нужны клиентские библиотеки Google')
+class GmailMessagesTests(FakeGmailMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user.set_gmail_credentials('access', 'refresh', timezone.now() + timedelta(hours=1))
+
+    def test_messages_fetched_in_batches(self):
+        messages = GmailProfileUpdater().get_gmail_messages(self.user, max_results=7)
+
+        self.assertEqual([message['id'] for message in messages], [f'm{number}' for number in range(7)])
+        self.assertEqual(messages[0]['subject'], 'Тема m0')
+        self.assertEqual(self.gmail.calls.get('list'), 1)
+        self.assertEqual(self.gmail.calls.get('batch'), 3)
+        self.assertEqual(self.gmail.calls.get('batch_parts'), 7)
+        self.assertNotIn('get', self.gmail.calls)
+
+    def test_messages_are_cached(self):
+        updater = GmailProfileUpdater()
+        updater.get_gmail_messages(self.user, max_results=5)
+        messages = updater.get_gmail_messages(self.user, max_results=3)
+
+        self.assertEqual(len(messages), 3)
+        self.assertEqual(self.gmail.calls.get('list'), 1)
+
+    def test_connect_and_disconnect_reset_cache(self):
+        GmailProfileUpdater().get_gmail_messages(self.user)
+        self.assertIsNotNone(shared_cache().get(messages_cache_key(self.user.pk)))
+
+        self.user.set_gmail_credentials('other-access', 'other-refresh', timezone.now() + timedelta(hours=1))
+        self.assertIsNone(shared_cache().get(messages_cache_key(self.user.pk)))
+
+        GmailProfileUpdater().get_gmail_messages(self.user)
+        self.user.clear_gmail_credentials()
+        self.assertIsNone(shared_cache().get(messages_cache_key(self.user.pk)))
+
+
+@unittest.skipUnless(find_spec('googleapiclient'), 'нужны клиентские библиотеки Google')
+class GmailTokenRefreshTests(FakeGmailMixin, TransactionTestCase):
+    token_delay = 0.3
+
+    def setUp(self):
+        super().setUp()
+        self.user.set_gmail_credentials('expired', 'refresh', timezone.now() - timedelta(minutes=5))
+
+    def test_concurrent_refresh_calls_google_once(self):
+        results = []
+
+        def refresh():
+            try:
+                results.append(GmailProfileUpdater().refresh_user_token(User.objects.get(pk=self.user.pk)))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=refresh) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [True] * 5)
+        self.assertEqual(self.gmail.calls.get('token'), 1)
+        stored = GmailCredentials.objects.get(user=self.user)
+        self.assertEqual(stored.access_token, 'token-1')
+        self.assertGreater(stored.token_expiry, timezone.now())
+
@@ -0,0 +1,41 @@
+"""
+HTML-списки экскурсий читают переводимые колонки только на языке запроса
+"""
+
+from django.conf import settings
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .utils import CatalogTestCase
+
+
+@override_settings(STORAGES={
+    **settings.STORAGES,
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+class LocalizedCatalogTests(CatalogTestCase):
+
+    def _excursion_queries(self, queries):
+        table = '"selexia_travel_excursion"'
+        return [query['sql'] for query in queries if f'FROM {table}' in query['sql']]
+
+    def test_catalog_cards_use_request_language_only(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/en/catalog/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Excursion 1')
+        self.assertNotContains(response, 'Экскурсия 1')
+        self.assertContains(response, 'Antalya')
+
+        selects = self._excursion_queries(queries.captured_queries)
+        self.assertTrue(selects)
+        for sql in selects:
+            self.assertNotIn('description_ru', sql)
+            self.assertNotIn('program_ru', sql)
+
+    def test_catalog_cards_in_russian(self):
+        response = self.client.get('/catalog/')
+        self.assertContains(response, 'Экскурсия 1')
+        self.assertContains(response, 'Анталья')
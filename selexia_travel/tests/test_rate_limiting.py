@@ -0,0 +1,59 @@
+"""
+Ограничение частоты запросов: 429 с Retry-After и проверка общего кэша на Railway
+"""
+
+from django.test import SimpleTestCase, override_settings
+
+from selexia_travel.checks import check_shared_caches
+
+from .utils import CatalogTestCase
+
+
+@override_settings(RATE_LIMIT_ENABLED=True, RATE_LIMITS={
+    'search_autocomplete': {'ip': '3/m'},
+    'favorites': {'ip': '2/m', 'user': '2/m'},
+})
+class RateLimitTests(CatalogTestCase):
+
+    def test_autocomplete_over_budget_gets_429_with_retry_after(self):
+        for _ in range(3):
+            self.assertEqual(self.client.get('/api/search/autocomplete/?q=Экс').status_code, 200)
+
+        response = self.client.get('/api/search/autocomplete/?q=Экс')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+        self.assertEqual(response.json()['retry_after'], int(response['Retry-After']))
+
+    def test_budget_is_per_client_ip(self):
+        for _ in range(3):
+            self.client.get('/api/search/autocomplete/?q=Экс', REMOTE_ADDR='10.0.0.1')
+        response = self.client.get('/api/search/autocomplete/?q=Экс', REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, 200)
+
+    def test_drf_throttle_over_budget_gets_429_with_retry_after(self):
+        self.client.force_login(self.user)
+        url = '/api/favorites/toggle/'
+        payload = {'item_id': self.excursions[0].pk, 'item_type': 'excursion'}
+        for _ in range(2):
+            self.assertEqual(self.client.post(url, payload, content_type='application/json').status_code, 200)
+
+        response = self.client.post(url, payload, content_type='application/json')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    local = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+    database = {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'selexia_shared_cache'}
+
+    @override_settings(RAILWAY_ENVIRONMENT=True, SHARED_CACHE='shared', RATE_LIMIT_CACHE='shared')
+    def test_process_local_cache_fails_on_railway(self):
+        with self.settings(CACHES={'default': self.local, 'shared': self.local}):
+            self.assertEqual([error.id for error in check_shared_caches(None)], ['selexia_travel.E001'] * 2)
+        with self.settings(CACHES={'default': self.local, 'shared': self.database}):
+            self.assertEqual(check_shared_caches(None), [])
+
+    @override_settings(RAILWAY_ENVIRONMENT=False)
+    def test_local_development_is_allowed(self):
+        with self.settings(CACHES={'default': self.local, 'shared': self.local}):
+            self.assertEqual(check_shared_caches(None), [])
@@ -0,0 +1,37 @@
+"""
+Похожие экскурсии: совместные интересы из БД и блочный расчет
+"""
+
+from unittest import mock
+
+from selexia_travel import recommendations
+from selexia_travel.models import Favorite, User
+
+from .utils import CatalogTestCase
+
+
+class ComputeNeighborsTests(CatalogTestCase):
+    excursions_count = 5
+
+    def setUp(self):
+        super().setUp()
+        first, _, _, _, last = self.excursions
+        # Единственная отличающаяся пара - общие интересы двух пользователей
+        for number in range(2):
+            user = User.objects.create_user(username=f'fan{number}', email=f'fan{number}@example.com')
+            Favorite.objects.create(user=user, item_type='excursion', excursion=first)
+            Favorite.objects.create(user=user, item_type='excursion', excursion=last)
+
+    def test_co_interest_ranks_neighbor_first(self):
+        neighbors = recommendations.compute_neighbors(k=3)
+        first, last = self.excursions[0], self.excursions[-1]
+
+        self.assertEqual(neighbors[first.pk][0][0], last.pk)
+        self.assertEqual(neighbors[last.pk][0][0], first.pk)
+        self.assertTrue(all(len(items) == 3 for items in neighbors.values()))
+        self.assertTrue(all(excursion_id not in dict(items) for excursion_id, items in neighbors.items()))
+
+    def test_block_size_does_not_change_result(self):
+        expected = recommendations.compute_neighbors(k=3)
+        with mock.patch.object(recommendations, 'BLOCK_CELLS', len(self.excursions) * 2):
+            self.assertEqual(recommendations.compute_neighbors(k=3), expected)
@@ -0,0 +1,104 @@
+"""
+Связи пользователя с экскурсиями: статус бронирования, право на отзыв и запоминание на время запроса
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+from itertools import product
+
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory
+from django.utils import timezone
+
+from selexia_travel.models import Booking, Favorite, Review
+from selexia_travel.relationships import forget_relationships, get_relationships, load_relationships
+
+from .utils import CatalogTestCase
+
+
+class RelationshipsTests(CatalogTestCase):
+    excursions_count = 4
+
+    def _book(self, excursion, status):
+        return Booking.objects.create(
+            excursion=excursion, user=self.user, status=status,
+            date=timezone.now().date() + timedelta(days=30), people_count=1, total_price=Decimal('10'),
+            contact_phone='+70000000000', contact_email=self.user.email,
+        )
+
+    def _request(self):
+        request = RequestFactory().get('/')
+        request.user = self.user
+        return request
+
+    def test_booking_status_priority(self):
+        cases = [
+            (('pending', 'cancelled'), 'pending', False),
+            (('cancelled', 'pending', 'confirmed'), 'confirmed', True),
+            (('confirmed', 'completed', 'pending'), 'completed', True),
+            (('cancelled',), 'cancelled', False),
+        ]
+        self.assertEqual(len(self.excursions), len(cases))
+        for excursion, (statuses, expected, has_booking) in zip(self.excursions, cases):
+            for status in statuses:
+                self._book(excursion, status)
+
+        relationships = load_relationships(self.user, [excursion.pk for excursion in self.excursions])
+
+        for excursion, (statuses, expected, has_booking) in zip(self.excursions, cases):
+            with self.subTest(statuses=statuses):
+                self.assertEqual(relationships[excursion.pk]['booking_status'], expected)
+                self.assertEqual(relationships[excursion.pk]['has_booking'], has_booking)
+
+    def test_can_review_matches_user_method(self):
+        statuses = (None, 'pending', 'confirmed', 'completed', 'cancelled')
+        for booking_status, reviewed in product(statuses, (False, True)):
+            with self.subTest(booking_status=booking_status, reviewed=reviewed):
+                Booking.objects.all().delete()
+                Review.objects.all().delete()
+                excursion = self.excursions[0]
+                if booking_status:
+                    self._book(excursion, booking_status)
+                if reviewed:
+                    Review.objects.create(excursion=excursion, user=self.user, rating=5, text='Отлично')
+
+                relationship = load_relationships(self.user, [excursion.pk])[excursion.pk]
+                self.assertEqual(relationship['can_review'], self.user.can_review_excursion(excursion))
+                self.assertEqual(relationship['has_reviewed'], self.user.has_reviewed_excursion(excursion))
+
+    def test_excursions_without_rows_get_defaults(self):
+        first, second = self.excursions[:2]
+        Favorite.objects.create(user=self.user, item_type='excursion', excursion=first)
+
+        relationships = load_relationships(self.user, [first.pk, second.pk, 999999])
+
+        self.assertTrue(relationships[first.pk]['is_favorite'])
+        for excursion_id in (second.pk, 999999):
+            self.assertEqual(relationships[excursion_id], {
+                'booking_status': None, 'has_booking': False, 'has_reviewed': False,
+                'is_favorite': False, 'can_review': False,
+            })
+
+    def test_anonymous_user_gets_defaults_without_queries(self):
+        with self.assertNumQueries(0):
+            relationships = load_relationships(AnonymousUser(), [self.excursions[0].pk])
+        self.assertFalse(relationships[self.excursions[0].pk]['can_review'])
+
+    def test_relationships_memoized_per_request(self):
+        first, second, third = self.excursions[:3]
+        request = self._request()
+
+        with self.assertNumQueries(1):
+            get_relationships(request, [first.pk, second.pk])
+        with self.assertNumQueries(0):
+            self.assertEqual(set(get_relationships(request, [second.pk, first.pk])), {first.pk, second.pk})
+        # Запрашиваются только новые экскурсии
+        with self.assertNumQueries(1):
+            get_relationships(request, [first.pk, third.pk])
+
+        # Другой запрос видит свежие данные, а сброс обновляет связь в текущем
+        Favorite.objects.create(user=self.user, item_type='excursion', excursion=first)
+        self.assertFalse(get_relationships(request, [first.pk])[first.pk]['is_favorite'])
+        self.assertTrue(get_relationships(self._request(), [first.pk])[first.pk]['is_favorite'])
+        forget_relationships(request, first.pk)
+        self.assertTrue(get_relationships(request, [first.pk])[first.pk]['is_favorite'])
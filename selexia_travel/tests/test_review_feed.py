@@ -0,0 +1,72 @@
+"""
+Лента отзывов: курсорная пагинация и кэш первой страницы
+"""
+
+from datetime import timedelta
+
+from django.utils import timezone
+
+from selexia_travel.models import Review, User
+from selexia_travel.review_feed import get_review_page
+
+from .utils import CatalogTestCase
+
+
+class ReviewFeedTests(CatalogTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.excursion = cls.excursions[0]
+        authors = [
+            User.objects.create_user(username=f'author{number}', email=f'author{number}@example.com')
+            for number in range(23)
+        ]
+        cls.reviews = [
+            Review.objects.create(excursion=cls.excursion, user=author, rating=5, text=f'Отзыв {number}')
+            for number, author in enumerate(authors)
+        ]
+        # Часть отзывов с одинаковым временем: порядок внутри них задает id
+        started = timezone.now() - timedelta(days=1)
+        for number, review in enumerate(cls.reviews):
+            Review.objects.filter(pk=review.pk).update(created_at=started + timedelta(minutes=number // 3))
+        Review.objects.filter(pk=cls.reviews[5].pk).update(is_approved=False)
+
+    def _url(self, **params):
+        query = '&'.join(f'{name}={value}' for name, value in params.items())
+        return f'/api/excursions/{self.excursion.pk}/reviews/' + (f'?{query}' if query else '')
+
+    def test_cursor_walks_whole_feed_without_gaps_or_repeats(self):
+        expected = list(
+            Review.objects.filter(excursion=self.excursion, is_approved=True)
+            .order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+
+        seen = []
+        page = self.client.get(self._url()).json()
+        while True:
+            seen += [review['id'] for review in page['results']]
+            if not page['next_cursor']:
+                break
+            page = self.client.get(self._url(cursor=page['next_cursor'])).json()
+
+        self.assertEqual(seen, expected)
+        self.assertNotIn(self.reviews[5].pk, seen)
+
+    def test_page_size_is_bounded(self):
+        page = self.client.get(self._url(page_size=4)).json()
+        self.assertEqual(len(page['results']), 4)
+        self.assertIsNotNone(page['next_cursor'])
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(self._url(cursor='not-a-cursor'))
+        self.assertEqual(response.status_code, 400)
+
+    def test_first_page_is_rebuilt_after_new_review(self):
+        first = get_review_page(self.excursion.pk)['results'][0]['id']
+        self.assertEqual(get_review_page(self.excursion.pk)['results'][0]['id'], first)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            review = Review.objects.create(excursion=self.excursion, user=self.user, rating=4, text='Новый')
+
+        self.assertEqual(get_review_page(self.excursion.pk)['results'][0]['id'], review.pk)
@@ -0,0 +1,34 @@
+"""
+Service Worker: кэш страниц только для публичных ответов
+"""
+
+from django.conf import settings
+from django.test import override_settings
+
+from .utils import CatalogTestCase
+
+
+# Страницы рендерятся без collectstatic: статика без манифеста
+@override_settings(STORAGES={
+    **settings.STORAGES,
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+class ServiceWorkerPagesTests(CatalogTestCase):
+
+    def test_pages_of_signed_in_user_are_private(self):
+        self.client.force_login(self.user)
+        for path in ('/catalog/', '/profile/', '/favorites/'):
+            with self.subTest(path=path):
+                response = self.client.get(path)
+                self.assertIn('private', response.get('Cache-Control', ''))
+
+    def test_anonymous_catalog_page_is_not_private(self):
+        response = self.client.get('/catalog/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('private', response.get('Cache-Control', ''))
+
+    def test_worker_limits_page_cache_and_clears_it_on_logout(self):
+        script = self.client.get('/sw.js').content.decode()
+        self.assertIn("const LOGOUT_URL = '/accounts/logout/';", script)
+        self.assertIn('const PAGE_CACHE_MAX_ENTRIES = 20;', script)
+        self.assertNotIn('/profile/', script.split('const PAGE_CACHE_PATHS = ', 1)[1].split(';', 1)[0])
@@ -0,0 +1,20 @@
+"""
+Соцвход: сохраненные аккаунты vk и mailru (кнопок в шаблонах нет) остаются рабочими
+"""
+
+from allauth.socialaccount.models import SocialAccount, SocialApp
+from django.contrib.sites.models import Site
+
+from .utils import CatalogTestCase
+
+
+class SocialProvidersTests(CatalogTestCase):
+
+    def test_existing_vk_and_mailru_accounts_resolve_their_provider(self):
+        # Ключи этих провайдеров хранятся в БД (SocialApp), а не в SOCIALACCOUNT_PROVIDERS
+        for provider in ('vk', 'mailru'):
+            with self.subTest(provider=provider):
+                app = SocialApp.objects.create(provider=provider, name=provider, client_id='id', secret='secret')
+                app.sites.add(Site.objects.get_current())
+                account = SocialAccount.objects.create(user=self.user, provider=provider, uid=f'{provider}-1')
+                self.assertEqual(account.get_provider().id, provider)
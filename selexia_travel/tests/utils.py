@@ -0,0 +1,39 @@
+"""
+Общие данные для тестов: небольшой каталог и пользователи
+"""
+
+from decimal import Decimal
+
+from django.core.cache import caches
+from django.test import TestCase
+
+from selexia_travel.models import Category, City, Country, Excursion, User
+
+
+class CatalogTestCase(TestCase):
+    """Каталог из одной страны, двух городов, категории и нескольких опубликованных экскурсий"""
+    excursions_count = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.country = Country.objects.create(name_ru='Турция', name_en='Turkey', iso_code='TR', slug='turkey')
+        cls.city = City.objects.create(
+            name_ru='Анталья', name_en='Antalya', country=cls.country, slug='antalya',
+            latitude=Decimal('36.88'), longitude=Decimal('30.70'),
+        )
+        cls.category = Category.objects.create(name_ru='Обзорные', name_en='Sightseeing', slug='sightseeing')
+        cls.excursions = [
+            Excursion.objects.create(
+                title_ru=f'Экскурсия {number}', title_en=f'Excursion {number}',
+                description_ru='Описание', short_description_ru='Кратко',
+                country=cls.country, city=cls.city, category=cls.category,
+                price=Decimal(10 + number), duration=2, status='published', slug=f'excursion-{number}',
+            )
+            for number in range(cls.excursions_count)
+        ]
+        cls.user = User.objects.create_user(username='traveller', email='traveller@example.com', password='secret-1')
+
+    def setUp(self):
+        # Версии каталога, счетчики лимитов и кэши ответов не переносятся между тестами
+        for cache in caches.all():
+            cache.clear()
@@ -0,0 +1,155 @@
+"""
+Сборка переводов: один django.mo на язык и компактный JSON-каталог для SPA
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from django.conf import settings
+
+
+# Порядок слияния доменов: при совпадении msgid побеждает более поздний домен
+TRANSLATION_DOMAINS = ('vue', 'ui', 'models', 'messages', 'django')
+
+# Домены, строки которых нужны фронтенду
+SPA_DOMAINS = ('vue', 'ui')
+
+STAMP_FILE = '.build-stamp.json'
+
+
+def catalog_static_name(language):
+    """Имя JSON-каталога в статике (хэш в URL добавляет манифест collectstatic)"""
+    return f'i18n/{language}.json'
+
+
+def _catalog_output_dir():
+    return Path(getattr(settings, 'TRANSLATION_CATALOG_DIR', settings.BASE_DIR / 'static' / 'i18n'))
+
+
+def _file_digest(path):
+    return hashlib.sha1(path.read_bytes()).hexdigest()
+
+
+def _read_stamp(lc_messages_dir):
+    try:
+        return json.loads((lc_messages_dir / STAMP_FILE).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_stamp(lc_messages_dir, stamp):
+    (lc_messages_dir / STAMP_FILE).write_text(
+        json.dumps(stamp, ensure_ascii=False, indent=2, sort_keys=True), encoding='utf-8'
+    )
+
+
+def source_files(lc_messages_dir):
+    """Существующие .po файлы доменов в порядке слияния"""
+    return [
+        lc_messages_dir / f'{domain}.po'
+        for domain in TRANSLATION_DOMAINS
+        if (lc_messages_dir / f'{domain}.po').exists()
+    ]
+
+
+def is_up_to_date(lc_messages_dir, json_path):
+    """
+    Проверяет, что .mo и JSON собраны из текущих .po.
+    Сначала сравнивает mtime/размер, хэш содержимого считается только при их расхождении.
+    """
+    stamp = _read_stamp(lc_messages_dir)
+    sources = source_files(lc_messages_dir)
+    if not stamp or not (lc_messages_dir / 'django.mo').exists() or not json_path.exists():
+        return False, stamp
+    if sorted(stamp.get('sources', {})) != sorted(path.name for path in sources):
+        return False, stamp
+
+    for path in sources:
+        recorded = stamp['sources'][path.name]
+        stat = path.stat()
+        if recorded.get('mtime_ns') == stat.st_mtime_ns and recorded.get('size') == stat.st_size:
+            continue
+        if recorded.get('sha1') != _file_digest(path):
+            return False, stamp
+    return True, stamp
+
+
+def _read_catalog(path, locale):
+    from babel.messages.pofile import read_po
+
+    with open(path, 'r', encoding='utf-8') as f:
+        return read_po(f, locale=locale)
+
+
+def _spa_messages(catalogs):
+    """Переведенные строки SPA-доменов: {msgid: msgstr | [формы множественного числа]}"""
+    messages = {}
+    for domain, catalog in catalogs:
+        if domain not in SPA_DOMAINS:
+            continue
+        for message in catalog:
+            if not message.id or message.fuzzy:
+                continue
+            if message.pluralizable:
+                if all(message.string):
+                    messages[message.id[0]] = list(message.string)
+            elif message.string:
+                messages[message.id] = message.string
+    return messages
+
+
+def build_locale(lc_messages_dir, language, force=False):
+    """
+    Собирает домены локали в один django.mo и JSON-каталог для SPA.
+    Возвращает (json_path, skipped): skipped=True, если исходники не менялись.
+    """
+    from babel.messages.catalog import Catalog
+    from babel.messages.mofile import write_mo
+
+    json_path = _catalog_output_dir() / f'{language}.json'
+    if not force:
+        up_to_date, _ = is_up_to_date(lc_messages_dir, json_path)
+        if up_to_date:
+            return json_path, True
+
+    sources = source_files(lc_messages_dir)
+    catalogs = [(path.stem, _read_catalog(path, language)) for path in sources]
+
+    merged = Catalog(locale=language, domain='django', fuzzy=False)
+    for _, catalog in catalogs:
+        merged.mime_headers = catalog.mime_headers
+        for message in catalog:
+            if message.id and message.string and not message.fuzzy:
+                merged[message.id] = message
+
+    mo_path = lc_messages_dir / 'django.mo'
+    tmp_path = mo_path.with_suffix('.mo.tmp')
+    with open(tmp_path, 'wb') as f:
+        write_mo(f, merged, use_fuzzy=False)
+    os.replace(tmp_path, mo_path)
+
+    plural_forms = merged.plural_forms
+    payload = {
+        'language': language,
+        'plural_forms': plural_forms,
+        'messages': _spa_messages(catalogs),
+    }
+    json_path.parent.mkdir(parents=True, exist_ok=True)
+    json_path.write_text(
+        json.dumps(payload, ensure_ascii=False, separators=(',', ':'), sort_keys=True), encoding='utf-8'
+    )
+
+    _write_stamp(lc_messages_dir, {
+        'sources': {
+            path.name: {
+                'sha1': _file_digest(path),
+                'mtime_ns': path.stat().st_mtime_ns,
+                'size': path.stat().st_size,
+            }
+            for path in sources
+        },
+        'catalog_sha1': _file_digest(json_path),
+    })
+    return json_path, False
@@ -6,8 +6,11 @@ from django.conf.urls.static import static
 from django.conf.urls.i18n import i18n_patterns
 from django.views.i18n import set_language
 
+from allauth.account import views as account_views
+
 # Импортируем views
 from . import views
+from .rate_limiting import rate_limit
 
 # API URL patterns (не зависят от языка)
 api_urlpatterns = [
@@ -17,11 +20,18 @@ api_urlpatterns = [
     # Кастомная социальная регистрация
     path('accounts/social/signup/', views.social_signup_view, name='social_signup'),
     
-    # Django Allauth
+    # Django Allauth (вход, регистрация и сброс пароля - с ограничением частоты POST;
+    # маршруты без имени перекрывают allauth, reverse по именам allauth дает те же URL)
+    path('accounts/login/', rate_limit('auth_login', methods=('POST',))(account_views.login)),
+    path('accounts/signup/', rate_limit('auth_signup', methods=('POST',))(account_views.signup)),
+    path('accounts/password/reset/', rate_limit('auth_password_reset', methods=('POST',))(account_views.password_reset)),
     path('accounts/', include('allauth.urls')),
     
     # DRF API
     path('api/', include('api.urls')),
+    
+    # Service Worker (в корне, чтобы область действия покрывала весь сайт)
+    path('sw.js', views.service_worker_view, name='service_worker'),
 ]
 
 # Основные страницы (зависят от языка)
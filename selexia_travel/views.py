@@ -3,7 +3,7 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
 from django.db.models import Q, Avg, Count, F, Sum
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, Http404
 from .models import Excursion, Review
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.translation import gettext as _
@@ -13,8 +13,10 @@ from django.views.generic import ListView, DetailView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.utils import timezone
 from datetime import datetime, timedelta
+import hashlib
 import json
 import time
+from django.core.exceptions import ObjectDoesNotExist
 from django.core.mail import send_mail, send_mass_mail
 from django.template.loader import render_to_string
 from django.conf import settings
@@ -28,6 +30,12 @@ from .forms import (
     ApplicationForm, BookingForm, ReviewForm, 
     ExcursionFilterForm, ContactForm
 )
+from .caching import conditional_catalog
+from .service_worker import build_service_worker_context
+from .excursion_detail import get_excursion_bundle
+from .relationships import get_relationship, get_relationships
+from .rate_limiting import rate_limit
+from . import favorites as favorites_service
 
 
 def home_view(request):
@@ -36,7 +44,7 @@ def home_view(request):
     popular_excursions = Excursion.objects.filter(
         status='published', 
         is_popular=True
-    ).select_related('city', 'country', 'category').prefetch_related('images')[:6]
+    ).localized(request.LANGUAGE_CODE).prefetch_related('images')[:6]
     
     # Получаем все страны
     countries = Country.objects.all().prefetch_related('cities')
@@ -51,32 +59,35 @@ def home_view(request):
         is_approved=True
     ).select_related('user', 'excursion')[:3]
     
-    # Получаем избранное для авторизованных пользователей
+    # Получаем избранное для авторизованных пользователей (одним запросом)
     user_favorites = []
     user_favorite_countries = []
     user_favorite_categories = []
+    favorites_stamp = 'anonymous'
     if request.user.is_authenticated:
-        user_favorites = Favorite.objects.filter(user=request.user, excursion__isnull=False).values_list('excursion_id', flat=True)
-        user_favorite_countries = Favorite.objects.filter(user=request.user, country__isnull=False).values_list('country_id', flat=True)
-        user_favorite_categories = Favorite.objects.filter(user=request.user, category__isnull=False).values_list('category_id', flat=True)
-    
-    # Получаем статистику
-    stats = {
-        'excursions_count': Excursion.objects.filter(status='published').count(),
-        'countries_count': Country.objects.count(),
-        'reviews_count': Review.objects.filter(is_approved=True).count(),
-        'happy_customers': User.objects.filter(bookings__status='completed').distinct().count(),
-    }
+        for excursion_id, country_id, category_id in Favorite.objects.filter(
+            user=request.user
+        ).values_list('excursion_id', 'country_id', 'category_id'):
+            if excursion_id:
+                user_favorites.append(excursion_id)
+            if country_id:
+                user_favorite_countries.append(country_id)
+            if category_id:
+                user_favorite_categories.append(category_id)
+        # Ключ фрагментного кэша: одинаковый набор избранного - одинаковая разметка
+        favorites_stamp = hashlib.md5(
+            f'{sorted(user_favorites)}|{sorted(user_favorite_countries)}'.encode()
+        ).hexdigest()
     
     context = {
         'popular_excursions': popular_excursions,
         'countries': countries,
         'categories': categories,
         'recent_reviews': recent_reviews,
-        'stats': stats,
         'user_favorites': user_favorites,
         'user_favorite_countries': user_favorite_countries,
         'user_favorite_categories': user_favorite_categories,
+        'favorites_stamp': favorites_stamp,
         'application_form': ApplicationForm(),
     }
     
@@ -94,8 +105,9 @@ class CatalogView(ListView):
     paginate_by = 12
     
     def get_queryset(self):
-        queryset = Excursion.objects.filter(status='published').select_related(
-            'city', 'country', 'category'
+        # Карточкам нужны название, краткое описание и город только на языке запроса
+        queryset = Excursion.objects.filter(status='published').localized(
+            self.request.LANGUAGE_CODE, 'title', 'short_description', related=('city',)
         ).prefetch_related('images')
         
         # Поиск
@@ -115,15 +127,15 @@ class CatalogView(ListView):
         # Фильтры
         country = self.request.GET.get('country')
         if country:
-            queryset = queryset.filter(country__slug=country)
+            queryset = queryset.in_section(country=country)
         
         city = self.request.GET.get('city')
         if city:
-            queryset = queryset.filter(city__slug=city)
+            queryset = queryset.in_section(city=city)
         
         category = self.request.GET.get('category')
         if category:
-            queryset = queryset.filter(category__slug=category)
+            queryset = queryset.in_section(category=category)
         
         # Фильтр по цене
         price_min = self.request.GET.get('price_min')
@@ -149,7 +161,7 @@ class CatalogView(ListView):
         elif sort == 'newest':
             queryset = queryset.order_by('-created_at')
         else:  # popular
-            queryset = queryset.order_by('-is_popular', '-views_count', '-rating')
+            queryset = queryset.order_by('-popularity_score')
         
         return queryset
     
@@ -178,13 +190,13 @@ class ExcursionDetailView(DetailView):
     slug_field = 'slug'
     slug_url_kwarg = 'slug'
     
-    def get_queryset(self):
-        return Excursion.objects.filter(status='published').select_related(
-            'city', 'country', 'category'
-        ).prefetch_related('images', 'reviews__user')
-    
     def get_object(self):
-        excursion = super().get_object()
+        # Экскурсия, отзывы, рейтинг и похожие - из общего пакета детальной страницы
+        try:
+            self.bundle = get_excursion_bundle(self.request.LANGUAGE_CODE, slug=self.kwargs['slug'])
+        except Excursion.DoesNotExist:
+            raise Http404('Экскурсия не найдена')
+        excursion = self.bundle['excursion']
         # Увеличиваем счетчик просмотров
         Excursion.objects.filter(pk=excursion.pk).update(views_count=F('views_count') + 1)
         return excursion
@@ -197,46 +209,29 @@ class ExcursionDetailView(DetailView):
         from datetime import date
         context['today'] = date.today()
         
-        # Отзывы
-        reviews = excursion.reviews.filter(is_approved=True).select_related('user').prefetch_related('images')
-        context['reviews'] = reviews[:10]  # Показываем только первые 10
-        context['reviews_count'] = reviews.count()
-        
-        # Проверяем права пользователя на экскурсию
-        user_can_review = False
-        user_has_reviewed = False
-        user_has_booking = False
+        # Отзывы: первая страница ленты
+        context['reviews'] = self.bundle['reviews']
+        context['reviews_count'] = self.bundle['reviews_total']
         
-        if self.request.user.is_authenticated:
-            user_can_review = self.request.user.can_review_excursion(excursion)
-            user_has_reviewed = self.request.user.has_reviewed_excursion(excursion)
-            user_has_booking = Booking.objects.filter(
-                user=self.request.user,
-                excursion=excursion,
-                status__in=['confirmed', 'completed']
-            ).exists()
-        
-        context['user_can_review'] = user_can_review
-        context['user_has_reviewed'] = user_has_reviewed
-        context['user_has_booking'] = user_has_booking
+        # Связи пользователя с экскурсией и похожими (бронирование, отзыв, избранное) одним запросом
+        relationships = get_relationships(
+            self.request, [excursion.pk] + [similar.pk for similar in self.bundle['similar_excursions']]
+        )
+        relationship = relationships[excursion.pk]
+        context['user_can_review'] = relationship['can_review']
+        context['user_has_reviewed'] = relationship['has_reviewed']
+        context['user_has_booking'] = relationship['has_booking']
         
         # Статистика рейтинга
-        if reviews.exists():
-            rating_breakdown = {}
-            for i in range(1, 6):
-                count = reviews.filter(rating=i).count()
-                percentage = (count / reviews.count()) * 100 if reviews.count() > 0 else 0
-                rating_breakdown[i] = {'count': count, 'percentage': percentage}
-            context['rating_breakdown'] = rating_breakdown
+        if self.bundle['reviews_total']:
+            context['rating_breakdown'] = self.bundle['rating_breakdown']
             
             # Последние отзывы для сайдбара
-            context['recent_reviews'] = reviews[:3]
+            context['recent_reviews'] = context['reviews'][:3]
         
-        # Похожие экскурсии
-        context['similar_excursions'] = Excursion.objects.filter(
-            status='published',
-            category=excursion.category
-        ).exclude(pk=excursion.pk)[:4]
+        # Похожие экскурсии (из предрасчитанной таблицы соседей)
+        context['similar_excursions'] = self.bundle['similar_excursions']
+        context['similar_excursions_data'] = self.bundle['similar_excursions_data']
         
         # Формы
         context['booking_form'] = BookingForm(user=self.request.user)
@@ -245,22 +240,11 @@ class ExcursionDetailView(DetailView):
         # Добавляем пользователя в контекст
         context['user'] = self.request.user
         
-        # Проверяем, добавлена ли экскурсия в избранное
-        if self.request.user.is_authenticated:
-            context['is_favorite'] = Favorite.objects.filter(
-                user=self.request.user,
-                excursion=excursion
-            ).exists()
-            
-            # Получаем список ID избранных экскурсий пользователя
-            user_favorite_excursions = Favorite.objects.filter(
-                user=self.request.user,
-                excursion__isnull=False
-            ).values_list('excursion_id', flat=True)
-            context['user_favorite_excursions'] = user_favorite_excursions
-        else:
-            context['is_favorite'] = False
-            context['user_favorite_excursions'] = []
+        # Избранное: текущая экскурсия и показанные на странице похожие
+        context['is_favorite'] = relationship['is_favorite']
+        context['user_favorite_excursions'] = [
+            excursion_id for excursion_id, item in relationships.items() if item['is_favorite']
+        ]
         
         return context
 
@@ -446,9 +430,14 @@ def bookings_view(request):
     if not request.user.is_authenticated:
         return redirect('account_login')
     
-    bookings = Booking.objects.filter(user=request.user).select_related(
+    bookings = list(Booking.objects.filter(user=request.user).select_related(
         'excursion__country', 'excursion__city'
-    ).order_by('-created_at')
+    ).order_by('-created_at'))
+    
+    # Можно ли оставить отзыв по каждой экскурсии - одним запросом на весь список
+    relationships = get_relationships(request, {booking.excursion_id for booking in bookings})
+    for booking in bookings:
+        booking.can_review = relationships[booking.excursion_id]['can_review']
     
     context = {
         'bookings': bookings,
@@ -474,6 +463,7 @@ def user_reviews_view(request):
 
 
 @csrf_exempt
+@rate_limit('application', methods=('POST',))
 def submit_application(request):
     """Обработка заявки с главной страницы"""
     if request.method == 'POST':
@@ -494,6 +484,7 @@ def submit_application(request):
 
 @login_required
 @csrf_exempt
+@rate_limit('booking', methods=('POST',))
 def submit_booking(request):
     """Обработка бронирования"""
     print(f"DEBUG: ===== НАЧАЛО submit_booking =====")
@@ -740,50 +731,17 @@ def toggle_favorite(request):
             item_id = data.get('item_id')
             item_type = data.get('item_type', 'excursion')
             
-            print(f"DEBUG: toggle_favorite called with item_id={item_id}, item_type={item_type}")
-            print(f"DEBUG: request.body = {request.body}")
-            print(f"DEBUG: data = {data}")
-            
-            if item_type == 'excursion':
-                item = get_object_or_404(Excursion, id=item_id, status='published')
-                # Проверяем, есть ли уже в избранном
-                existing_favorite = Favorite.objects.filter(user=request.user, excursion=item).first()
-                if existing_favorite:
-                    existing_favorite.delete()
-                    is_favorite = False
-                    print(f"DEBUG: Removed from favorites")
-                else:
-                    Favorite.objects.create(user=request.user, excursion=item, item_type='excursion')
-                    is_favorite = True
-                    print(f"DEBUG: Added to favorites")
-            elif item_type == 'category':
-                item = get_object_or_404(Category, id=item_id)
-                existing_favorite = Favorite.objects.filter(user=request.user, category=item).first()
-                if existing_favorite:
-                    existing_favorite.delete()
-                    is_favorite = False
-                else:
-                    Favorite.objects.create(user=request.user, category=item, item_type='category')
-                    is_favorite = True
-            elif item_type == 'country':
-                item = get_object_or_404(Country, id=item_id)
-                existing_favorite = Favorite.objects.filter(user=request.user, country=item).first()
-                if existing_favorite:
-                    existing_favorite.delete()
-                    is_favorite = False
-                else:
-                    Favorite.objects.create(user=request.user, country=item, item_type='country')
-                    is_favorite = True
-            else:
+            if item_type not in favorites_service.FAVORITE_ITEM_TYPES:
                 return JsonResponse({'success': False, 'error': 'Неизвестный тип элемента'})
-            
-            favorites_count = request.user.favorites.count()
-            print(f"DEBUG: Returning success, is_favorite={is_favorite}, favorites_count={favorites_count}")
+            try:
+                is_favorite = favorites_service.toggle_favorite(request.user, item_type, item_id)
+            except ObjectDoesNotExist:
+                return JsonResponse({'success': False, 'error': 'Элемент не найден'})
             
             return JsonResponse({
                 'success': True,
                 'is_favorite': is_favorite,
-                'favorites_count': favorites_count
+                'favorites_count': request.user.favorites.count()
             })
         except Exception as e:
             print(f"DEBUG: Error in toggle_favorite: {str(e)}")
@@ -867,6 +825,7 @@ def cities_by_country(request):
         return JsonResponse({'cities': []})
 
 
+@rate_limit('contact', methods=('POST',))
 def contact_view(request):
     """Страница контактов"""
     if request.method == 'POST':
@@ -885,6 +844,18 @@ def contact_view(request):
     return render(request, 'contact.html', context)
 
 
+def service_worker_view(request):
+    """Service Worker, сгенерированный из манифеста статики текущего деплоя"""
+    response = render(
+        request, 'sw.js', build_service_worker_context(),
+        content_type='application/javascript; charset=utf-8'
+    )
+    # Сам sw.js не кэшируем, чтобы браузер сразу видел новый деплой
+    response['Cache-Control'] = 'no-cache'
+    response['Service-Worker-Allowed'] = '/'
+    return response
+
+
 def about_view(request):
     """Страница о компании"""
     context = {
@@ -919,7 +890,7 @@ class CountryDetailView(DetailView):
         context['popular_excursions'] = Excursion.objects.filter(
             status='published',
             country=country
-        ).order_by('-is_popular', '-views_count')[:8]
+        ).localized(self.request.LANGUAGE_CODE, related=('city',)).order_by('-popularity_score')[:8]
         
         # Статистика
         context['stats'] = {
@@ -1039,15 +1010,15 @@ def excursions_api(request):
     # Фильтрация
     country = request.GET.get('country')
     if country:
-        excursions = excursions.filter(country__slug=country)
+        excursions = excursions.in_section(country=country)
     
     city = request.GET.get('city')
     if city:
-        excursions = excursions.filter(city__slug=city)
+        excursions = excursions.in_section(city=city)
     
     category = request.GET.get('category')
     if category:
-        excursions = excursions.filter(category__slug=category)
+        excursions = excursions.in_section(category=category)
     
     # Поиск
     search = request.GET.get('search')
@@ -1095,13 +1066,12 @@ def excursions_api(request):
     return JsonResponse(data)
 
 
+@conditional_catalog(Excursion, ExcursionImage, Country, City, Category, Review, ReviewImage)
 def excursion_detail_api(request, slug):
     """API для получения детальной информации об экскурсии"""
     try:
-        excursion = Excursion.objects.select_related('country', 'city', 'category').get(slug=slug, status='published')
-        
-        # Получаем отзывы
-        reviews = Review.objects.filter(excursion=excursion, is_approved=True).select_related('user')
+        bundle = get_excursion_bundle(request.LANGUAGE_CODE, slug=slug)
+        excursion = bundle['excursion']
         
         data = {
             'id': excursion.id,
@@ -1139,21 +1109,10 @@ def excursion_detail_api(request, slug):
                     'url': img.image.url,
                     'caption': img.caption_ru,
                 }
-                for img in excursion.images.all()
-            ],
-            'reviews': [
-                {
-                    'id': review.id,
-                    'rating': review.rating,
-                    'text': review.text,
-                    'created_at': review.created_at.isoformat(),
-                    'user': {
-                        'name': review.user.full_name,
-                        'avatar': review.user.avatar.url if review.user.avatar else None,
-                    }
-                }
-                for review in reviews[:10]  # Только первые 10 отзывов
+                for img in bundle['images']
             ],
+            # Первая страница ленты отзывов (дальше - /api/excursions/<id>/reviews/?cursor=)
+            'reviews': bundle['reviews'],
         }
         
         return JsonResponse(data)
@@ -1250,15 +1209,10 @@ def submit_review_new(request):
         
         excursion = Excursion.objects.get(id=excursion_id)
         
-        # Используем новый метод для проверки прав на отзыв
-        if not request.user.can_review_excursion(excursion):
-            # Проверяем, есть ли вообще подходящие бронирования
-            eligible_bookings = request.user.bookings.filter(
-                excursion=excursion,
-                status__in=['confirmed', 'completed']
-            )
-            
-            if not eligible_bookings.exists():
+        # Права на отзыв: бронирования и существующий отзыв одним запросом
+        relationship = get_relationship(request, excursion.pk)
+        if not relationship['can_review']:
+            if not relationship['has_booking']:
                 return JsonResponse({
                     'error': 'Для оставления отзыва необходимо иметь подтвержденное или завершенное бронирование на эту экскурсию'
                 }, status=403)
@@ -1342,13 +1296,13 @@ def catalog_vue(request):
         )
     
     if country:
-        excursions = excursions.filter(country__slug=country)
+        excursions = excursions.in_section(country=country)
     
     if city:
-        excursions = excursions.filter(city__slug=city)
+        excursions = excursions.in_section(city=city)
     
     if category:
-        excursions = excursions.filter(category__slug=category)
+        excursions = excursions.in_section(category=category)
     
     if price_min:
         excursions = excursions.filter(price__gte=float(price_min))
@@ -1370,7 +1324,7 @@ def catalog_vue(request):
     
     # Сортировка
     if sort == 'popular':
-        excursions = excursions.order_by('-views_count', '-rating')
+        excursions = excursions.order_by('-popularity_score')
     elif sort == 'rating':
         excursions = excursions.order_by('-rating')
     elif sort == 'price_low':
@@ -1440,28 +1394,20 @@ def excursion_detail_vue(request, slug):
     """
     Детальная страница экскурсии с Vue.js интеграцией
     """
-    excursion = get_object_or_404(Excursion, slug=slug, status='published')
+    try:
+        bundle = get_excursion_bundle(request.LANGUAGE_CODE, slug=slug)
+    except Excursion.DoesNotExist:
+        raise Http404('Экскурсия не найдена')
+    excursion = bundle['excursion']
     
-    # Увеличиваем счетчик просмотров
+    # Увеличиваем счетчик просмотров атомарным UPDATE (без сдвига версии каталога)
+    Excursion.objects.filter(pk=excursion.pk).update(views_count=F('views_count') + 1)
     excursion.views_count += 1
-    excursion.save()
-    
-    # Получаем связанные экскурсии
-    related_excursions = Excursion.objects.filter(
-        status='published',
-        category=excursion.category
-    ).exclude(id=excursion.id)[:6]
-    
-    # Получаем отзывы для экскурсии
-    reviews = Review.objects.filter(
-        excursion=excursion,
-        is_approved=True
-    ).select_related('user')[:10]
     
     # Сериализуем изображения в JSON строку
     import json
     images_data = []
-    for image in excursion.images.all():
+    for image in bundle['images']:
         # Исправляем путь к изображению
         image_url = image.image.url if image.image else '/static/images/placeholder.jpg'
         images_data.append({
@@ -1473,19 +1419,19 @@ def excursion_detail_vue(request, slug):
     
     # Сериализуем отзывы в JSON
     reviews_data = []
-    for review in reviews:
+    for review in bundle['reviews']:
         reviews_data.append({
-            'id': review.id,
-            'text': review.text,
-            'rating': review.rating,
-            'created_at': review.created_at.strftime('%d.%m.%Y'),
-            'user_name': review.user.first_name or review.user.username,
-            'user_avatar': review.user.avatar.url if review.user.avatar else None
+            'id': review['id'],
+            'text': review['text'],
+            'rating': review['rating'],
+            'created_at': review['created_at'].strftime('%d.%m.%Y'),
+            'user_name': review['user']['name'],
+            'user_avatar': review['user']['avatar']
         })
     
     context = {
         'excursion': excursion,
-        'related_excursions': related_excursions,
+        'related_excursions': bundle['similar_excursions'],
         'images_data_json': json.dumps(images_data),
         'reviews_data_json': json.dumps(reviews_data),
     }
@@ -1532,13 +1478,13 @@ def api_excursions(request):
         )
     
     if country:
-        excursions = excursions.filter(country__slug=country)
+        excursions = excursions.in_section(country=country)
     
     if city:
-        excursions = excursions.filter(city__slug=city)
+        excursions = excursions.in_section(city=city)
     
     if category:
-        excursions = excursions.filter(category__slug=category)
+        excursions = excursions.in_section(category=category)
     
     if price_min:
         try:
@@ -1588,7 +1534,7 @@ def api_excursions(request):
     elif ordering == '-created_at':
         excursions = excursions.order_by('-created_at')
     elif sort == 'popular':
-        excursions = excursions.order_by('-views_count', '-rating')
+        excursions = excursions.order_by('-popularity_score')
     elif sort == 'rating':
         excursions = excursions.order_by('-rating')
     elif sort == 'price_low':
@@ -1755,28 +1701,11 @@ def api_favorites_toggle(request):
         if not excursion_id:
             return JsonResponse({'error': 'ID экскурсии обязателен'}, status=400)
         
-        # Проверяем существование экскурсии
         try:
-            excursion = Excursion.objects.get(id=excursion_id, status='published')
-        except Excursion.DoesNotExist:
+            is_favorite = favorites_service.toggle_favorite(request.user, 'excursion', excursion_id)
+        except ObjectDoesNotExist:
             return JsonResponse({'error': 'Экскурсия не найдена'}, status=404)
-        
-        # Проверяем, есть ли уже в избранном
-        favorite, created = Favorite.objects.get_or_create(
-            user=request.user,
-            excursion=excursion,
-            defaults={'created_at': timezone.now()}
-        )
-        
-        if not created:
-            # Если уже есть - удаляем
-            favorite.delete()
-            is_favorite = False
-            message = 'Убрано из избранного'
-        else:
-            # Если добавили - оставляем
-            is_favorite = True
-            message = 'Добавлено в избранное'
+        message = 'Добавлено в избранное' if is_favorite else 'Убрано из избранного'
         
         return JsonResponse({
             'success': True,
@@ -1803,9 +1732,9 @@ def excursion_detail_simple(request, slug):
     """
     excursion = get_object_or_404(Excursion, slug=slug, status='published')
     
-    # Увеличиваем счетчик просмотров
+    # Увеличиваем счетчик просмотров атомарным UPDATE (без сдвига версии каталога)
+    Excursion.objects.filter(pk=excursion.pk).update(views_count=F('views_count') + 1)
     excursion.views_count += 1
-    excursion.save()
     
     context = {
         'excursion': excursion,
@@ -2035,7 +1964,6 @@ def social_signup_view(request):
     from allauth.socialaccount.models import SocialAccount
     from .models import User  # Используем кастомную модель User
     from django.contrib.auth import login
-    from django.contrib.auth.backends import ModelBackend
     
     # Если пользователь уже авторизован, перенаправляем на dashboard
     if request.user.is_authenticated:
@@ -2159,10 +2087,7 @@ def gmail_callback_view(request):
         if tokens:
             # Сохраняем токены в профиле пользователя
             user = request.user
-            user.gmail_access_token = tokens['access_token']
-            user.gmail_refresh_token = tokens['refresh_token']
-            user.gmail_token_expiry = tokens['token_expiry']
-            user.save(update_fields=['gmail_access_token', 'gmail_refresh_token', 'gmail_token_expiry'])
+            user.set_gmail_credentials(tokens['access_token'], tokens['refresh_token'], tokens['token_expiry'])
             
             # Обновляем профиль из Gmail
             from .gmail_integration import sync_user_with_gmail
@@ -2190,7 +2115,8 @@ def sync_gmail_profile_view(request):
     try:
         user = request.user
         
-        if not user.gmail_access_token:
+        credentials = user.get_gmail_credentials()
+        if not credentials or not credentials.access_token:
             messages.error(request, 'Gmail аккаунт не подключен')
             return redirect('dashboard')
         
@@ -2214,14 +2140,9 @@ def disconnect_gmail_view(request):
         user = request.user
         
         # Очищаем Gmail данные
-        user.gmail_access_token = None
-        user.gmail_refresh_token = None
-        user.gmail_token_expiry = None
+        user.clear_gmail_credentials()
         user.gmail_profile_updated = None
-        user.save(update_fields=[
-            'gmail_access_token', 'gmail_refresh_token', 
-            'gmail_token_expiry', 'gmail_profile_updated'
-        ])
+        user.save(update_fields=['gmail_profile_updated'])
         
         messages.success(request, 'Gmail аккаунт успешно отключен')
         
@@ -0,0 +1,332 @@
+document.addEventListener('DOMContentLoaded', function() {
+    const navbar = document.querySelector('.navbar');
+    const scrollToTopBtn = document.getElementById('scrollToTop');
+    const navbarToggler = document.querySelector('.navbar-toggler');
+    const navbarCollapse = document.querySelector('.navbar-collapse');
+
+    // Обработка скролла
+    function handleScroll() {
+        const scrolled = window.scrollY > 50;
+
+        if (navbar) {
+            if (scrolled) {
+                navbar.classList.add('scrolled');
+                navbar.classList.remove('transparent');
+            } else if (window.selexiaConfig.isHomePage) {
+                navbar.classList.remove('scrolled');
+                navbar.classList.add('transparent');
+            }
+        }
+
+        // Показ/скрытие кнопки "наверх"
+        if (scrollToTopBtn) {
+            if (scrolled) {
+                scrollToTopBtn.classList.add('show');
+            } else {
+                scrollToTopBtn.classList.remove('show');
+            }
+        }
+    }
+
+    window.addEventListener('scroll', handleScroll);
+
+    // Инициализация при загрузке
+    handleScroll();
+
+    // Кнопка "наверх"
+    if (scrollToTopBtn) {
+        scrollToTopBtn.addEventListener('click', function() {
+            window.scrollTo({
+                top: 0,
+                behavior: 'smooth'
+            });
+        });
+    }
+
+    // Обработка мобильного меню
+    if (navbarToggler && navbarCollapse) {
+        navbarToggler.addEventListener('click', function() {
+            const isExpanded = this.getAttribute('aria-expanded') === 'true';
+            this.setAttribute('aria-expanded', !isExpanded);
+        });
+
+        // Закрытие меню при клике на ссылку
+        const navLinks = navbarCollapse.querySelectorAll('.nav-link:not(.dropdown-toggle)');
+        navLinks.forEach(link => {
+            link.addEventListener('click', function() {
+                if (window.innerWidth < 992) {
+                    const bsCollapse = bootstrap.Collapse.getInstance(navbarCollapse);
+                    if (bsCollapse) {
+                        bsCollapse.hide();
+                    }
+                }
+            });
+        });
+    }
+
+    // Обработка активных ссылок
+    const currentPath = window.location.pathname;
+    const navLinks = document.querySelectorAll('.navbar-nav .nav-link');
+
+    navLinks.forEach(link => {
+        const href = link.getAttribute('href');
+        if (href === currentPath || (href !== '/' && currentPath.startsWith(href))) {
+            link.classList.add('active');
+        }
+    });
+
+    // Обработка избранного
+    function updateFavoritesCount() {
+        if (window.selexiaConfig.user.isAuthenticated) {
+            fetch('/api/favorites/count/')
+                .then(response => response.json())
+                .then(data => {
+                    const countElement = document.getElementById('favorites-count');
+                    if (countElement && data.count > 0) {
+                        countElement.textContent = data.count;
+                        countElement.style.display = 'flex';
+                    } else if (countElement) {
+                        countElement.style.display = 'none';
+                    }
+                })
+                .catch(error => console.log('Favorites count error:', error));
+        }
+    }
+
+    // Обновление счетчика избранного при загрузке
+    updateFavoritesCount();
+
+    // Функция для показа уведомлений
+    window.showToast = function(message, type = 'info') {
+        const toast = document.getElementById('liveToast');
+        const toastBody = toast.querySelector('.toast-body');
+
+        if (toastBody) {
+            toastBody.textContent = message;
+
+            // Добавляем класс для типа уведомления
+            toast.className = `toast bg-${type} text-white`;
+
+            const bsToast = new bootstrap.Toast(toast, {
+                delay: 5000
+            });
+            bsToast.show();
+        }
+    };
+
+    // Обработка CSRF токена для AJAX запросов
+    function getCookie(name) {
+        let cookieValue = null;
+        if (document.cookie && document.cookie !== '') {
+            const cookies = document.cookie.split(';');
+            for (let i = 0; i < cookies.length; i++) {
+                const cookie = cookies[i].trim();
+                if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                    cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                    break;
+                }
+            }
+        }
+        return cookieValue;
+    }
+
+    // Настройка CSRF для всех AJAX запросов
+    const csrftoken = getCookie('csrftoken');
+    if (csrftoken) {
+        window.csrfToken = csrftoken;
+    }
+
+    // Добавление анимаций при появлении элементов
+    const observerOptions = {
+        threshold: 0.1,
+        rootMargin: '0px 0px -50px 0px'
+    };
+
+    const observer = new IntersectionObserver((entries) => {
+        entries.forEach(entry => {
+            if (entry.isIntersecting) {
+                entry.target.classList.add('fade-in');
+                observer.unobserve(entry.target);
+            }
+        });
+    }, observerOptions);
+
+    // Наблюдение за элементами для анимации
+    const animatedElements = document.querySelectorAll('.card, .tour-item, .testimonial-item');
+    animatedElements.forEach(el => observer.observe(el));
+
+
+
+    // Улучшенная обработка dropdown меню
+    const dropdownElements = document.querySelectorAll('.dropdown-toggle');
+    dropdownElements.forEach(dropdown => {
+        dropdown.addEventListener('click', function(e) {
+            e.preventDefault();
+            const dropdownMenu = this.nextElementSibling;
+
+            // Закрываем все другие dropdown
+            document.querySelectorAll('.dropdown-menu.show').forEach(menu => {
+                if (menu !== dropdownMenu) {
+                    menu.classList.remove('show');
+                }
+            });
+
+            // Переключаем текущий dropdown
+            if (dropdownMenu) {
+                dropdownMenu.classList.toggle('show');
+            }
+        });
+    });
+
+    // Закрытие dropdown при клике вне
+    document.addEventListener('click', function(e) {
+        if (!e.target.closest('.dropdown')) {
+            document.querySelectorAll('.dropdown-menu.show').forEach(menu => {
+                menu.classList.remove('show');
+            });
+        }
+    });
+
+    // Обработка языкового переключателя
+    const languageLinks = document.querySelectorAll('#languageDropdown + .dropdown-menu .dropdown-item');
+    languageLinks.forEach(link => {
+        link.addEventListener('click', function(e) {
+            e.preventDefault();
+            const language = this.textContent.includes('English') ? 'en' : 'ru';
+
+            // Здесь можно добавить логику смены языка
+            console.log('Switching to language:', language);
+            window.showToast('Смена языка будет доступна в следующих версиях', 'info');
+        });
+    });
+
+    // Плавная прокрутка для якорных ссылок
+    document.querySelectorAll('a[href^="#"]').forEach(anchor => {
+        anchor.addEventListener('click', function(e) {
+            const targetId = this.getAttribute('href');
+            if (targetId !== '#' && targetId !== '#!') {
+                const targetElement = document.querySelector(targetId);
+                if (targetElement) {
+                    e.preventDefault();
+                    const offsetTop = targetElement.offsetTop - 100; // Учитываем высоту navbar
+                    window.scrollTo({
+                        top: offsetTop,
+                        behavior: 'smooth'
+                    });
+                }
+            }
+        });
+    });
+
+    // Обработка формы подписки в футере
+    const subscriptionForm = document.querySelector('footer form');
+    if (subscriptionForm) {
+        subscriptionForm.addEventListener('submit', function(e) {
+            e.preventDefault();
+            const emailInput = this.querySelector('input[type="email"]');
+            const email = emailInput.value.trim();
+
+            if (email) {
+                // Имитация отправки
+                setTimeout(() => {
+                    window.showToast('Спасибо за подписку! Мы будем присылать вам интересные предложения.', 'success');
+                    emailInput.value = '';
+                }, 500);
+            }
+        });
+    }
+
+    // Улучшенная анимация для navbar при скролле
+    let ticking = false;
+    function requestTick() {
+        if (!ticking) {
+            requestAnimationFrame(handleScroll);
+            ticking = true;
+        }
+    }
+
+    window.addEventListener('scroll', () => {
+        requestTick();
+        ticking = false;
+    });
+
+    // Предзагрузка критичных изображений
+    const criticalImages = document.querySelectorAll('img[data-preload]');
+    criticalImages.forEach(img => {
+        const imageUrl = img.getAttribute('data-src') || img.src;
+        if (imageUrl) {
+            const preloadImg = new Image();
+            preloadImg.src = imageUrl;
+        }
+    });
+
+    // Обработка ошибок изображений
+    document.querySelectorAll('img').forEach(img => {
+        img.addEventListener('error', function() {
+            this.src = window.selexiaConfig.staticUrl + 'images/placeholder.jpg';
+            this.alt = 'Изображение недоступно';
+        });
+    });
+
+    // Оптимизация производительности для мобильных устройств
+    if (/Android|webOS|iPhone|iPad|iPod|BlackBerry|IEMobile|Opera Mini/i.test(navigator.userAgent)) {
+        document.body.classList.add('mobile-device');
+
+        // Отключаем некоторые анимации на мобильных для лучшей производительности
+        const style = document.createElement('style');
+        style.textContent = `
+            @media (max-width: 768px) {
+                .fade-in { animation: none !important; }
+                .slide-down { animation: none !important; }
+                * { transition-duration: 0.1s !important; }
+            }
+        `;
+        document.head.appendChild(style);
+    }
+});
+
+// Экспорт полезных функций в глобальную область
+window.SelexiaUtils = {
+    showToast: window.showToast,
+    csrfToken: window.csrfToken,
+    config: window.selexiaConfig
+};
+
+// Регистрация Service Worker (сгенерирован из манифеста статики)
+if ('serviceWorker' in navigator) {
+    window.addEventListener('load', function() {
+        navigator.serviceWorker.register('/sw.js').catch(function(error) {
+            console.warn('Service Worker не зарегистрирован:', error);
+        });
+    });
+}
+
+// Строки интерфейса для фронтенда: статический JSON-каталог с хэшем в URL
+// (кэшируется браузером навсегда, обновляется вместе с версией файла)
+window.selexiaI18n = (function() {
+    let catalog = null;
+    let loading = null;
+
+    function load() {
+        if (!loading) {
+            loading = fetch(window.selexiaConfig.i18nCatalogUrl, { credentials: 'omit' })
+                .then(response => response.ok ? response.json() : { messages: {} })
+                .catch(() => ({ messages: {} }))
+                .then(data => {
+                    catalog = data;
+                    return data;
+                });
+        }
+        return loading;
+    }
+
+    function t(msgid) {
+        const translated = catalog && catalog.messages[msgid];
+        if (Array.isArray(translated)) {
+            return translated[0];
+        }
+        return translated || msgid;
+    }
+
+    return { load: load, t: t };
+})();
@@ -0,0 +1,867 @@
+// Обработка мобильного меню (бургера)
+document.addEventListener('DOMContentLoaded', function() {
+    const navbarToggler = document.querySelector('.navbar-toggler');
+    const navbarCollapse = document.querySelector('.navbar-collapse');
+
+    if (navbarToggler && navbarCollapse) {
+        // Обработка клика по бургеру
+        navbarToggler.addEventListener('click', function() {
+            navbarCollapse.classList.toggle('show');
+        });
+
+        // Закрытие мобильного меню при клике на ссылку
+        const mobileNavLinks = navbarCollapse.querySelectorAll('.nav-link');
+        mobileNavLinks.forEach(link => {
+            link.addEventListener('click', function() {
+                if (window.innerWidth < 992) {
+                    navbarCollapse.classList.remove('show');
+                }
+            });
+        });
+
+        // Закрытие мобильного меню при клике вне его
+        document.addEventListener('click', function(event) {
+            if (!navbarToggler.contains(event.target) && !navbarCollapse.contains(event.target)) {
+                navbarCollapse.classList.remove('show');
+            }
+        });
+    }
+
+    // Обработка изменения размера экрана
+    window.addEventListener('resize', function() {
+        if (window.innerWidth >= 992) {
+            navbarCollapse.classList.remove('show');
+        }
+    });
+});
+
+// Smooth scrolling for navigation links
+document.querySelectorAll('a[href^="#"]').forEach(anchor => {
+    anchor.addEventListener('click', function (e) {
+        e.preventDefault();
+        const target = document.querySelector(this.getAttribute('href'));
+        if (target) {
+            target.scrollIntoView({
+                behavior: 'smooth',
+                block: 'start'
+            });
+        }
+    });
+});
+
+// Header background change on scroll
+window.addEventListener('scroll', function() {
+    const header = document.querySelector('.header');
+    if (header) {
+        if (window.scrollY > 100) {
+            header.style.background = 'rgba(255, 255, 255, 0.98)';
+            header.style.boxShadow = '0 2px 20px rgba(0,0,0,0.15)';
+        } else {
+            header.style.background = 'rgba(255, 255, 255, 0.95)';
+            header.style.boxShadow = '0 2px 20px rgba(0,0,0,0.1)';
+        }
+    }
+});
+
+// Search form animation
+const searchFormElement = document.querySelector('#search-form');
+if (searchFormElement) {
+    searchFormElement.addEventListener('submit', function(e) {
+        e.preventDefault();
+        const button = this.querySelector('button[type="submit"]');
+        const originalText = button.innerHTML;
+
+        button.innerHTML = '<i class="fas fa-spinner fa-spin me-2"></i>Поиск...';
+        button.disabled = true;
+
+        // Simulate search process
+        setTimeout(() => {
+            button.innerHTML = originalText;
+            button.disabled = false;
+            alert('Поиск выполнен! Здесь будут результаты.');
+        }, 2000);
+    });
+}
+
+// Обработка НОВЫХ форм заявки
+const newContactForm = document.querySelector('#contactForm');
+const newContactFormMobile = document.querySelector('#contactFormMobile');
+
+if (newContactForm) {
+    newContactForm.addEventListener('submit', function(e) {
+        const button = this.querySelector('button[type="submit"]');
+        const originalText = button.innerHTML;
+
+        button.innerHTML = '<i class="fas fa-spinner fa-spin me-2"></i>Отправка...';
+        button.disabled = true;
+
+        // Form will be submitted normally to Django view
+        // Button will be re-enabled after page reload
+    });
+}
+
+if (newContactFormMobile) {
+    newContactFormMobile.addEventListener('submit', function(e) {
+        const button = this.querySelector('button[type="submit"]');
+        const originalText = button.innerHTML;
+
+        button.innerHTML = '<i class="fas fa-spinner fa-spin me-2"></i>Отправка...';
+        button.disabled = true;
+
+        // Form will be submitted normally to Django view
+        // Button will be re-enabled after page reload
+    });
+}
+
+// Application form submission (старая форма для совместимости)
+const applicationForm = document.querySelector('.application-form form');
+if (applicationForm) {
+    applicationForm.addEventListener('submit', function(e) {
+        const button = this.querySelector('button[type="submit"]');
+        const originalText = button.innerHTML;
+
+        button.innerHTML = '<i class="fas fa-spinner fa-spin me-2"></i>Отправка...';
+        button.disabled = true;
+
+        // Form will be submitted normally to Django view
+        // Button will be re-enabled after page reload
+    });
+}
+
+// Favorite functionality
+document.querySelectorAll('.favorite-btn').forEach(button => {
+    button.addEventListener('click', function(e) {
+        e.preventDefault();
+        e.stopPropagation();
+
+        const excursionId = this.dataset.excursionId;
+        const categoryId = this.dataset.categoryId;
+        const countryId = this.dataset.countryId;
+        const isFavorite = this.dataset.isFavorite === 'true';
+
+        // Determine what type of favorite this is
+        let itemId, itemType;
+        if (excursionId) {
+            itemId = excursionId;
+            itemType = 'excursion';
+        } else if (categoryId) {
+            itemId = categoryId;
+            itemType = 'category';
+        } else if (countryId) {
+            itemId = countryId;
+            itemType = 'country';
+        }
+
+        if (!itemId) return;
+
+        // Toggle favorite state
+        fetch('/api/favorites/toggle/', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value,
+            },
+            body: JSON.stringify({
+                item_id: itemId,
+                item_type: itemType
+            })
+        })
+        .then(response => {
+            if (response.status === 401) {
+                // User not authenticated, show login modal
+                showLoginModal();
+                return;
+            }
+            return response.json();
+        })
+        .then(data => {
+            if (data && data.success) {
+                // Update button state
+                this.dataset.isFavorite = data.is_favorite.toString();
+
+                // Toggle heart images
+                const heartSvg = this.querySelector('img[src*="heart.svg"]:not([src*="heartRED"])');
+                const heartRedSvg = this.querySelector('img[src*="heartRED.svg"]');
+
+                if (data.is_favorite) {
+                    if (heartSvg) heartSvg.classList.add('d-none');
+                    if (heartRedSvg) heartRedSvg.classList.remove('d-none');
+                } else {
+                    if (heartSvg) heartSvg.classList.remove('d-none');
+                    if (heartRedSvg) heartRedSvg.classList.add('d-none');
+                }
+
+                // Update favorites count if exists
+                const favoritesCount = document.querySelector('.favorites-count');
+                if (favoritesCount && data.favorites_count !== undefined) {
+                    favoritesCount.textContent = data.favorites_count;
+                }
+
+                // Update header favorites count
+                updateHeaderFavoritesCount();
+            } else if (data && !data.success) {
+                console.error('Error toggling favorite:', data.error);
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+        });
+    });
+});
+
+// Function to show login modal
+function showLoginModal() {
+    const modal = document.getElementById('loginModal');
+    if (modal) {
+        const bootstrapModal = new bootstrap.Modal(modal);
+        bootstrapModal.show();
+    }
+}
+
+// Function to update favorites count in header
+function updateHeaderFavoritesCount() {
+    const favoritesCount = document.querySelector('.favorites-count');
+    if (favoritesCount && typeof window.updateFavoritesCount === 'function') {
+        window.updateFavoritesCount();
+    }
+}
+
+// Intersection Observer for animations
+const observerOptions = {
+    threshold: 0.1,
+    rootMargin: '0px 0px -50px 0px'
+};
+
+const observer = new IntersectionObserver((entries) => {
+    entries.forEach(entry => {
+        if (entry.isIntersecting) {
+            entry.target.style.opacity = '1';
+            entry.target.style.transform = 'translateY(0)';
+        }
+    });
+}, observerOptions);
+
+// Observe elements for animation
+document.querySelectorAll('.feature-card, .country-card, .category-card, .destination-card, .review-card').forEach(el => {
+    el.style.opacity = '0';
+    el.style.transform = 'translateY(30px)';
+    el.style.transition = 'all 0.6s ease-out';
+    observer.observe(el);
+});
+
+// Auto-complete for search (mock functionality)
+const searchInput = document.querySelector('.search-input');
+const searchSuggestions = document.querySelector('#search-suggestions');
+const searchForm = document.querySelector('#search-form');
+
+if (searchInput && searchSuggestions) {
+    // Расширенный список городов и стран для демонстрации
+    const destinations = [
+        'Турция', 'Анталья', 'Стамбул', 'Каппадокия', 'Памуккале',
+        'Греция', 'Афины', 'Санторини', 'Крит', 'Родос',
+        'Италия', 'Рим', 'Венеция', 'Флоренция', 'Милан',
+        'Испания', 'Барселона', 'Мадрид', 'Валенсия', 'Севилья',
+        'Франция', 'Париж', 'Ницца', 'Лион', 'Марсель',
+        'Германия', 'Берлин', 'Мюнхен', 'Гамбург', 'Кёльн',
+        'Нидерланды', 'Амстердам', 'Роттердам', 'Гаага',
+        'Португалия', 'Лиссабон', 'Порту', 'Синтра',
+        'Хорватия', 'Загреб', 'Сплит', 'Дубровник',
+        'Чехия', 'Прага', 'Брно', 'Карловы Вары'
+    ];
+
+    let currentFocus = -1;
+
+    searchInput.addEventListener('input', function() {
+        const value = this.value.toLowerCase();
+        currentFocus = -1;
+
+        if (value.length > 1) {
+            const matches = destinations.filter(dest => 
+                dest.toLowerCase().includes(value)
+            );
+
+            // Clear previous suggestions
+            searchSuggestions.innerHTML = '';
+
+            if (matches.length > 0) {
+                // Display suggestions
+                matches.forEach((match, index) => {
+                    const suggestion = document.createElement('div');
+                    suggestion.classList.add('search-suggestion');
+                    suggestion.textContent = match;
+                    suggestion.dataset.index = index;
+
+                    // Highlight matching text
+                    const regex = new RegExp(`(${value})`, 'gi');
+                    suggestion.innerHTML = match.replace(regex, '<strong>$1</strong>');
+
+                    searchSuggestions.appendChild(suggestion);
+                });
+
+                searchSuggestions.classList.add('show');
+            } else {
+                searchSuggestions.classList.remove('show');
+            }
+        } else {
+            searchSuggestions.classList.remove('show');
+        }
+    });
+
+    // Handle suggestion clicks
+    searchSuggestions.addEventListener('click', function(e) {
+        if (e.target.classList.contains('search-suggestion')) {
+            const selectedSuggestion = e.target.textContent.replace(/<[^>]*>/g, '');
+            searchInput.value = selectedSuggestion;
+            searchSuggestions.classList.remove('show');
+            searchInput.focus();
+        }
+    });
+
+    // Keyboard navigation
+    searchInput.addEventListener('keydown', function(e) {
+        const suggestions = searchSuggestions.querySelectorAll('.search-suggestion');
+
+        if (suggestions.length === 0) return;
+
+        switch(e.key) {
+            case 'ArrowDown':
+                e.preventDefault();
+                currentFocus++;
+                if (currentFocus >= suggestions.length) currentFocus = 0;
+                updateSelectedSuggestion(suggestions);
+                break;
+            case 'ArrowUp':
+                e.preventDefault();
+                currentFocus--;
+                if (currentFocus < 0) currentFocus = suggestions.length - 1;
+                updateSelectedSuggestion(suggestions);
+                break;
+            case 'Enter':
+                e.preventDefault();
+                if (currentFocus > -1 && suggestions[currentFocus]) {
+                    const selectedSuggestion = suggestions[currentFocus].textContent.replace(/<[^>]*>/g, '');
+                    searchInput.value = selectedSuggestion;
+                    searchSuggestions.classList.remove('show');
+                }
+                break;
+            case 'Escape':
+                searchSuggestions.classList.remove('show');
+                currentFocus = -1;
+                break;
+        }
+    });
+
+    function updateSelectedSuggestion(suggestions) {
+        suggestions.forEach((suggestion, index) => {
+            suggestion.classList.toggle('selected', index === currentFocus);
+        });
+    }
+
+    // Close suggestions when clicking outside
+    document.addEventListener('click', function(e) {
+        if (!searchInput.contains(e.target) && !searchSuggestions.contains(e.target)) {
+            searchSuggestions.classList.remove('show');
+            currentFocus = -1;
+        }
+    });
+
+    // Focus effects
+    searchInput.addEventListener('focus', function() {
+        if (this.value.length > 1 && searchSuggestions.children.length > 0) {
+            searchSuggestions.classList.add('show');
+        }
+    });
+}
+
+// Search form submission
+if (searchForm) {
+    searchForm.addEventListener('submit', function(e) {
+        e.preventDefault();
+
+        const searchValue = searchInput.value.trim();
+        const categoryValue = document.querySelector('#category-select').value;
+
+        if (!searchValue && !categoryValue) {
+            // Show error or alert
+            alert('Пожалуйста, укажите город/страну или выберите категорию');
+            return;
+        }
+
+        // Prepare search parameters
+        const searchParams = new URLSearchParams();
+        if (searchValue) searchParams.append('search', searchValue);
+        if (categoryValue) searchParams.append('category', categoryValue);
+
+        // Redirect to catalog page with search parameters
+        const catalogUrl = `/catalog/?${searchParams.toString()}`;
+        window.location.href = catalogUrl;
+    });
+}
+
+// Глобальная функция инициализации каруселей
+window.initCarousels = function() {
+    console.log('Инициализация каруселей...');
+
+    // Ждем загрузки Bootstrap
+    if (typeof bootstrap === 'undefined') {
+        console.log('Bootstrap не загружен, ждем...');
+        setTimeout(window.initCarousels, 100);
+        return;
+    }
+
+    // Автоматическое воспроизведение каруселей
+    const countriesCarousel = document.getElementById('countriesCarousel');
+    const destinationsCarousel = document.getElementById('destinationsCarousel');
+    const reviewsCarousel = document.getElementById('reviewsCarousel');
+
+    console.log('Найдены карусели:', {
+        countries: countriesCarousel,
+        destinations: destinationsCarousel,
+        reviews: reviewsCarousel
+    });
+
+    // Анимация появления карточек стран
+    if (countriesCarousel) {
+        const countryCards = countriesCarousel.querySelectorAll('.country-card');
+        countryCards.forEach((card, index) => {
+            card.style.opacity = '0';
+            card.style.transform = 'translateY(30px)';
+
+            setTimeout(() => {
+                card.style.transition = 'all 0.6s cubic-bezier(0.175, 0.885, 0.32, 1.275)';
+                card.style.opacity = '1';
+                card.style.transform = 'translateY(0)';
+            }, index * 100);
+        });
+    }
+
+    if (destinationsCarousel) {
+        try {
+            // Проверяем, не инициализирована ли уже карусель
+            if (destinationsCarousel.classList.contains('carousel-initialized')) {
+                console.log('Карусель экскурсий уже инициализирована');
+            } else {
+                const destinationsCarouselInstance = new bootstrap.Carousel(destinationsCarousel, {
+                    interval: 5000,
+                    ride: 'carousel',
+                    wrap: true,
+                    touch: true,
+                    pause: 'hover'
+                });
+
+                destinationsCarousel.classList.add('carousel-initialized');
+                console.log('Карусель экскурсий инициализирована');
+
+                // Пауза карусели при наведении
+                destinationsCarousel.addEventListener('mouseenter', function() {
+                    destinationsCarouselInstance.pause();
+                });
+
+                destinationsCarousel.addEventListener('mouseleave', function() {
+                    destinationsCarouselInstance.cycle();
+                });
+            }
+        } catch (error) {
+            console.error('Ошибка инициализации карусели экскурсий:', error);
+        }
+    }
+
+    if (reviewsCarousel) {
+        try {
+            // Проверяем, не инициализирована ли уже карусель
+            if (reviewsCarousel.classList.contains('carousel-initialized')) {
+                console.log('Карусель отзывов уже инициализирована');
+            } else {
+                const reviewsCarouselInstance = new bootstrap.Carousel(reviewsCarousel, {
+                    interval: 6000,
+                    ride: 'carousel',
+                    wrap: true,
+                    touch: true
+                });
+
+                reviewsCarousel.classList.add('carousel-initialized');
+                console.log('Карусель отзывов инициализирована');
+                console.log('Экземпляр карусели отзывов:', reviewsCarouselInstance);
+
+                // Пауза карусели при наведении
+                reviewsCarousel.addEventListener('mouseenter', function() {
+                    reviewsCarouselInstance.pause();
+                });
+
+                reviewsCarousel.addEventListener('mouseleave', function() {
+                    reviewsCarouselInstance.cycle();
+                });
+            }
+        } catch (error) {
+            console.error('Ошибка инициализации карусели отзывов:', error);
+            console.error('Детали ошибки:', error.message, error.stack);
+        }
+    }
+
+    // Плавные переходы для каруселей
+    document.querySelectorAll('.carousel-item').forEach(item => {
+        item.style.transition = 'transform 0.6s ease-in-out';
+    });
+
+    // Проверяем все карусели на странице
+    const allCarousels = document.querySelectorAll('.carousel');
+    console.log('Всего каруселей на странице:', allCarousels.length);
+    allCarousels.forEach((carousel, index) => {
+        console.log(`Карусель ${index + 1}:`, carousel.id, carousel);
+    });
+};
+
+// Функция для принудительной инициализации каруселей
+function forceInitCarousels() {
+    // Удаляем классы инициализации
+    document.querySelectorAll('.carousel').forEach(carousel => {
+        carousel.classList.remove('carousel-initialized');
+    });
+
+    // Перезапускаем инициализацию
+    window.initCarousels();
+}
+
+// Обработчик кликов по карточкам отзывов
+document.addEventListener('click', function(e) {
+    const reviewCard = e.target.closest('.review-card');
+    if (reviewCard && reviewCard.dataset.excursionUrl) {
+        window.location.href = reviewCard.dataset.excursionUrl;
+    }
+});
+
+// Обработчик кликов по карточкам экскурсий (для новой карусели)
+document.addEventListener('click', function(e) {
+    const destinationCard = e.target.closest('.destination-card');
+    if (destinationCard && !e.target.closest('.favorite-btn')) {
+        const link = destinationCard.querySelector('a[href*="excursion_detail"]');
+        if (link) {
+            e.preventDefault();
+            window.location.href = link.href;
+        }
+    }
+});
+
+// Обработчик для кнопок избранного в новой карусели экскурсий
+document.addEventListener('click', function(e) {
+    if (e.target.closest('#destinationsCarousel .favorite-btn')) {
+        const btn = e.target.closest('.favorite-btn');
+        const excursionId = btn.dataset.excursionId;
+        const isFavorite = btn.dataset.isFavorite === 'true';
+        const heart = btn.querySelector('i');
+
+        // Отправляем AJAX запрос для добавления/удаления из избранного
+        fetch('/api/favorites/toggle/', {
+            method: 'POST',
+            headers: {
+                'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value,
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                item_id: excursionId,
+                item_type: 'excursion'
+            })
+        })
+        .then(response => {
+            if (response.status === 401) {
+                // User not authenticated, show login modal
+                showLoginModal();
+                return;
+            }
+                return response.json();
+        })
+        .then(data => {
+            if (data && data.success) {
+                // Update button state
+                btn.dataset.isFavorite = data.is_favorite.toString();
+
+                // Toggle heart icon
+                if (data.is_favorite) {
+                    heart.classList.remove('far');
+                    heart.classList.add('fas');
+                } else {
+                    heart.classList.remove('fas');
+                    heart.classList.add('far');
+                }
+
+                // Update favorites count if exists
+                const favoritesCount = document.querySelector('.favorites-count');
+                if (favoritesCount && data.favorites_count !== undefined) {
+                    favoritesCount.textContent = data.favorites_count;
+                }
+
+                // Update header favorites count
+                updateHeaderFavoritesCount();
+            } else if (data && !data.success) {
+                console.error('Error toggling favorite:', data.error);
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+        });
+    }
+});
+
+// Обработчик для кнопок избранного в карусели стран
+document.addEventListener('click', function(e) {
+    if (e.target.closest('#countriesCarousel .favorite-btn')) {
+        const btn = e.target.closest('.favorite-btn');
+        const countryId = btn.dataset.countryId;
+        const isFavorite = btn.dataset.isFavorite === 'true';
+        const heart = btn.querySelector('i');
+
+        // Отправляем AJAX запрос для добавления/удаления из избранного
+        fetch('/api/favorites/toggle/', {
+            method: 'POST',
+            headers: {
+                'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value,
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                item_id: countryId,
+                item_type: 'country'
+            })
+        })
+        .then(response => {
+            if (response.status === 401) {
+                // User not authenticated, show login modal
+                showLoginModal();
+                return;
+            }
+            return response.json();
+        })
+        .then(data => {
+            if (data && data.success) {
+                // Update button state
+                btn.dataset.isFavorite = data.is_favorite.toString();
+
+                // Toggle heart icon
+                if (data.is_favorite) {
+                    heart.classList.remove('far');
+                    heart.classList.add('fas');
+                } else {
+                    heart.classList.remove('fas');
+                    heart.classList.add('far');
+                }
+
+                // Update favorites count if exists
+                const favoritesCount = document.querySelector('.favorites-count');
+                if (favoritesCount && data.favorites_count !== undefined) {
+                    favoritesCount.textContent = data.favorites_count;
+                }
+
+                // Update header favorites count
+                updateHeaderFavoritesCount();
+            } else if (data && !data.success) {
+                console.error('Error toggling favorite:', data.error);
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+        });
+    }
+});
+
+// Обработчик кликов по карточкам стран (переход в каталог)
+document.addEventListener('click', function(e) {
+    const countryCard = e.target.closest('#countriesCarousel .country-card');
+    if (countryCard && !e.target.closest('.favorite-btn') && !e.target.closest('.btn-explore')) {
+        // Получаем название страны
+        const countryName = countryCard.querySelector('.country-name');
+        if (countryName) {
+            const countryNameText = countryName.textContent.trim();
+            // Переходим в каталог с фильтром по стране
+            window.location.href = `/catalog/?country=${encodeURIComponent(countryNameText)}`;
+        }
+    }
+});
+
+// Обработчик для кнопок "Исследовать"
+document.addEventListener('click', function(e) {
+    if (e.target.closest('#countriesCarousel .btn-explore')) {
+        const btn = e.target.closest('.btn-explore');
+        const countryCard = btn.closest('.country-card');
+        const countryName = countryCard.querySelector('.country-name');
+
+        if (countryName) {
+            const countryNameText = countryName.textContent.trim();
+            // Добавляем анимацию нажатия
+            btn.style.transform = 'scale(0.95)';
+            setTimeout(() => {
+                btn.style.transform = '';
+                window.location.href = `/catalog/?country=${encodeURIComponent(countryNameText)}`;
+            }, 150);
+        }
+    }
+});
+
+// Вызываем инициализацию при загрузке DOM
+document.addEventListener('DOMContentLoaded', function() {
+    console.log('DOM загружен, начинаем инициализацию каруселей...');
+
+    // Проверяем наличие элементов карусели
+    const countriesCarousel = document.getElementById('countriesCarousel');
+    console.log('Карусель стран найдена в DOM:', countriesCarousel);
+
+    if (countriesCarousel) {
+        console.log('Количество слайдов в карусели стран:', countriesCarousel.querySelectorAll('.carousel-item').length);
+        console.log('Активный слайд:', countriesCarousel.querySelector('.carousel-item.active'));
+    }
+
+    // Ждем немного для полной загрузки Bootstrap
+    setTimeout(function() {
+        console.log('Запускаем инициализацию каруселей...');
+        window.initCarousels();
+    }, 200);
+});
+
+// Дополнительная инициализация при полной загрузке страницы
+window.addEventListener('load', function() {
+    setTimeout(function() {
+        if (typeof bootstrap !== 'undefined') {
+            window.initCarousels();
+        }
+    }, 500);
+});
+
+        // Принудительная инициализация каруселей каждые 5 секунд, если они не работают
+let carouselCheckInterval = setInterval(function() {
+    const carousels = document.querySelectorAll('.carousel');
+    let allWorking = true;
+
+    carousels.forEach(carousel => {
+        if (!carousel.classList.contains('carousel-initialized')) {
+            allWorking = false;
+        }
+    });
+
+    if (!allWorking && typeof bootstrap !== 'undefined') {
+        console.log('Принудительная инициализация каруселей...');
+        window.initCarousels();
+    }
+
+    if (allWorking) {
+        clearInterval(carouselCheckInterval);
+    }
+}, 5000);
+
+// Инициализация улучшенной карусели экскурсий
+document.addEventListener('DOMContentLoaded', function() {
+    console.log('Инициализация карусели экскурсий...');
+
+    // Ждем загрузки Bootstrap
+    function initDestinationsCarousel() {
+        if (typeof bootstrap === 'undefined') {
+            console.log('Bootstrap не загружен, ждем...');
+            setTimeout(initDestinationsCarousel, 100);
+            return;
+        }
+
+        const carousel = document.querySelector('#destinationsCarousel');
+
+        if (carousel) {
+            try {
+                // Проверяем, не инициализирована ли уже карусель
+                if (carousel.classList.contains('carousel-initialized')) {
+                    console.log('Карусель экскурсий уже инициализирована');
+                    return;
+                }
+
+                const carouselInstance = new bootstrap.Carousel(carousel, {
+                    interval: 5000,
+                    ride: 'carousel',
+                    wrap: true,
+                    touch: true,
+                    pause: 'hover'
+                });
+
+                carousel.classList.add('carousel-initialized');
+                console.log('Карусель экскурсий успешно инициализирована');
+
+                // Touch/swipe поддержка для мобильных устройств
+                let startX = 0;
+                let endX = 0;
+
+                carousel.addEventListener('touchstart', function(e) {
+                    startX = e.touches[0].clientX;
+                }, { passive: true });
+
+                carousel.addEventListener('touchend', function(e) {
+                    endX = e.changedTouches[0].clientX;
+                    handleSwipe();
+                }, { passive: true });
+
+                function handleSwipe() {
+                    const threshold = 50; // минимальное расстояние для свайпа
+                    const diff = startX - endX;
+
+                    if (Math.abs(diff) > threshold) {
+                        if (diff > 0) {
+                            // Свайп влево - следующий слайд
+                            carouselInstance.next();
+                        } else {
+                            // Свайп вправо - предыдущий слайд
+                            carouselInstance.prev();
+                        }
+                    }
+                }
+
+                // Автопауза при наведении мыши
+                carousel.addEventListener('mouseenter', function() {
+                    carouselInstance.pause();
+                });
+
+                carousel.addEventListener('mouseleave', function() {
+                    carouselInstance.cycle();
+                });
+
+                // Обработчики для кнопок избранного
+                document.querySelectorAll('#destinationsCarousel .favorite-btn').forEach(btn => {
+                    btn.addEventListener('click', function(e) {
+                        e.stopPropagation();
+                        e.preventDefault();
+
+                        const excursionId = this.dataset.excursionId;
+                        const isFavorite = this.dataset.isFavorite === 'true';
+                        const heart = this.querySelector('i');
+
+                        // Отправляем AJAX запрос для добавления/удаления из избранного
+                        fetch(`/toggle-favorite/${excursionId}/`, {
+                            method: 'POST',
+                            headers: {
+                                'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value,
+                                'Content-Type': 'application/json',
+                            },
+                        })
+                        .then(response => response.json())
+                        .then(data => {
+                            if (data.success) {
+                                // Обновляем иконку
+                                if (data.is_favorite) {
+                                    heart.classList.remove('far');
+                                    heart.classList.add('fas');
+                                    this.dataset.isFavorite = 'true';
+                                } else {
+                                    heart.classList.remove('fas');
+                                    heart.classList.add('far');
+                                    this.dataset.isFavorite = 'false';
+                                }
+                            }
+                        })
+                        .catch(error => {
+                            console.error('Ошибка при обновлении избранного:', error);
+                        });
+                    });
+                });
+
+            } catch (error) {
+                console.error('Ошибка инициализации карусели экскурсий:', error);
+            }
+        } else {
+            console.log('Карусель экскурсий не найдена');
+        }
+    }
+
+    // Запускаем инициализацию
+    initDestinationsCarousel();
+});
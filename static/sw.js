@@ -1,29 +0,0 @@
-// Простой Service Worker для Selexia Travel
-const CACHE_NAME = 'selexia-travel-v1';
-const urlsToCache = [
-  '/',
-  '/static/css/style.css',
-  '/static/js/main.js'
-];
-
-self.addEventListener('install', function(event) {
-  event.waitUntil(
-    caches.open(CACHE_NAME)
-      .then(function(cache) {
-        return cache.addAll(urlsToCache);
-      })
-  );
-});
-
-self.addEventListener('fetch', function(event) {
-  event.respondWith(
-    caches.match(event.request)
-      .then(function(response) {
-        if (response) {
-          return response;
-        }
-        return fetch(event.request);
-      }
-    )
-  );
-});
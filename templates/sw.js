@@ -0,0 +1,222 @@
+{% autoescape off %}// Service Worker для Selexia Travel (генерируется из манифеста статики, не редактировать вручную)
+const SW_VERSION = '{{ version }}';
+const STATIC_URL = '{{ static_url }}';
+const STATIC_CACHE = 'selexia-static';
+// Имя сменено: прежний кэш страниц мог содержать личные страницы и удаляется при активации
+const PAGES_CACHE = 'selexia-pages-public';
+const API_CACHE = 'selexia-api';
+const IMAGE_CACHE = 'selexia-images';
+const KNOWN_CACHES = [STATIC_CACHE, PAGES_CACHE, API_CACHE, IMAGE_CACHE];
+
+// API каталога: "stale-while-revalidate" с ограничением числа записей (LRU)
+const API_CACHE_PREFIXES = {{ api_cache_prefixes }};
+const API_CACHE_MAX_ENTRIES = {{ api_cache_max_entries }};
+
+// Изображения карточек экскурсий: вытеснение самых старых при превышении объема
+const IMAGE_CACHE_PREFIXES = {{ image_cache_prefixes }};
+const IMAGE_CACHE_MAX_BYTES = {{ image_cache_max_bytes }};
+const SIZE_HEADER = 'X-SW-Size';
+
+// HTML страницы без сети: только публичные разделы и не private-ответы (их получают вошедшие)
+const PAGE_CACHE_PATHS = {{ page_cache_paths }};
+const PAGE_CACHE_MAX_ENTRIES = {{ page_cache_max_entries }};
+
+// Выход из аккаунта очищает кэш страниц
+const LOGOUT_URL = '{{ logout_url }}';
+
+// Снимок справочника для просмотра каталога без сети
+const BOOTSTRAP_URL = '{{ bootstrap_url }}';
+
+// Файлы для предварительного кэширования (хэшированные URL текущего деплоя)
+const PRECACHE_URLS = {{ precache_urls }};
+
+// Все актуальные URL статики: все, чего здесь нет, - устаревшие версии файлов
+const ASSET_URLS = new Set({{ asset_urls }});
+
+// Установка: докачиваем только те файлы, которых еще нет в кэше
+self.addEventListener('install', (event) => {
+  event.waitUntil(
+    caches.open(STATIC_CACHE)
+      .then((cache) => Promise.all(
+        PRECACHE_URLS.map((url) => cache.match(url).then((cached) => cached || cache.add(url)))
+      ))
+      .then(() => revalidateApi(new Request(BOOTSTRAP_URL)).catch(() => null))
+      .then(() => self.skipWaiting())
+  );
+});
+
+// Активация: удаляем старые кэши и устаревшие версии статических файлов
+self.addEventListener('activate', (event) => {
+  event.waitUntil(
+    caches.keys()
+      .then((cacheNames) => Promise.all(
+        cacheNames
+          .filter((cacheName) => !KNOWN_CACHES.includes(cacheName))
+          .map((cacheName) => caches.delete(cacheName))
+      ))
+      .then(() => caches.open(STATIC_CACHE))
+      .then((cache) => cache.keys().then((requests) => Promise.all(
+        requests
+          .filter((request) => !ASSET_URLS.has(new URL(request.url).pathname))
+          .map((request) => cache.delete(request))
+      )))
+      .then(() => self.clients.claim())
+  );
+});
+
+// Сохраняет ответ в конец очереди и удаляет самые давно использованные записи сверх maxEntries
+function putLimited(cache, request, response, maxEntries) {
+  return cache.delete(request)
+    .then(() => cache.put(request, response))
+    .then(() => cache.keys())
+    .then((requests) => Promise.all(
+      requests
+        .slice(0, Math.max(0, requests.length - maxEntries))
+        .map((oldRequest) => cache.delete(oldRequest))
+    ));
+}
+
+function putApiResponse(cache, request, response) {
+  return putLimited(cache, request, response, API_CACHE_MAX_ENTRIES);
+}
+
+// Страницу можно сохранить: публичный раздел, успешный ответ без private / no-store
+function isCacheablePage(url, response) {
+  if (!response || response.status !== 200) {
+    return false;
+  }
+  const cacheControl = (response.headers.get('Cache-Control') || '').toLowerCase();
+  if (cacheControl.includes('private') || cacheControl.includes('no-store')) {
+    return false;
+  }
+  return PAGE_CACHE_PATHS.some((path) => (path === '/' ? url.pathname === '/' : url.pathname.startsWith(path)));
+}
+
+// Условный запрос к серверу с ETag закэшированной версии (304 - данные не изменились)
+function revalidateApi(request) {
+  return caches.open(API_CACHE).then((cache) =>
+    cache.match(request).then((cached) => {
+      const headers = new Headers(request.headers);
+      const etag = cached && cached.headers.get('ETag');
+      if (etag) {
+        headers.set('If-None-Match', etag);
+      }
+      return fetch(request.url, { headers: headers, credentials: 'same-origin', cache: 'no-cache' })
+        .then((response) => {
+          if (response.status === 304 && cached) {
+            return putApiResponse(cache, request, cached.clone()).then(() => cached);
+          }
+          if (response.status === 200) {
+            return putApiResponse(cache, request, response.clone()).then(() => response);
+          }
+          return response;
+        });
+    })
+  );
+}
+
+// Удаляет самые старые изображения, пока суммарный объем больше лимита
+function trimImageCache(cache) {
+  return cache.keys().then((requests) =>
+    Promise.all(requests.map((request) => cache.match(request))).then((responses) => {
+      let total = responses.reduce((sum, response) => sum + Number(response && response.headers.get(SIZE_HEADER) || 0), 0);
+      const deletions = [];
+      for (let i = 0; i < requests.length && total > IMAGE_CACHE_MAX_BYTES; i++) {
+        total -= Number(responses[i] && responses[i].headers.get(SIZE_HEADER) || 0);
+        deletions.push(cache.delete(requests[i]));
+      }
+      return Promise.all(deletions);
+    })
+  );
+}
+
+// Кэширует изображение, запоминая его размер в служебном заголовке
+function putImageResponse(cache, request, response) {
+  return response.blob().then((blob) => {
+    const headers = new Headers(response.headers);
+    headers.set(SIZE_HEADER, String(blob.size));
+    return cache.put(request, new Response(blob, { status: response.status, headers: headers }))
+      .then(() => trimImageCache(cache));
+  });
+}
+
+self.addEventListener('fetch', (event) => {
+  const { request } = event;
+  const url = new URL(request.url);
+  if (url.origin !== self.location.origin) {
+    return;
+  }
+
+  // Выход (GET или POST): страницы прошлой сессии больше не показываются без сети
+  if (url.pathname === LOGOUT_URL) {
+    event.waitUntil(caches.delete(PAGES_CACHE));
+    return;
+  }
+
+  if (request.method !== 'GET') {
+    return;
+  }
+
+  // Статика: URL содержит хэш содержимого, поэтому "Cache First" безопасен
+  if (url.pathname.startsWith(STATIC_URL) && ASSET_URLS.has(url.pathname)) {
+    event.respondWith(
+      caches.open(STATIC_CACHE).then((cache) =>
+        cache.match(request).then((cached) => cached || fetch(request).then((response) => {
+          if (response && response.status === 200) {
+            cache.put(request, response.clone());
+          }
+          return response;
+        }))
+      )
+    );
+    return;
+  }
+
+  // API каталога: сразу отдаем кэш, в фоне сверяемся с сервером по ETag
+  if (API_CACHE_PREFIXES.some((prefix) => url.pathname.startsWith(prefix))) {
+    event.respondWith(
+      caches.open(API_CACHE).then((cache) =>
+        cache.match(request).then((cached) => {
+          const network = revalidateApi(request);
+          if (cached) {
+            event.waitUntil(network.catch(() => null));
+            return cached;
+          }
+          return network;
+        })
+      )
+    );
+    return;
+  }
+
+  // Изображения экскурсий: "Cache First" с ограничением объема кэша
+  if (request.destination === 'image' && IMAGE_CACHE_PREFIXES.some((prefix) => url.pathname.startsWith(prefix))) {
+    event.respondWith(
+      caches.open(IMAGE_CACHE).then((cache) =>
+        cache.match(request).then((cached) => cached || fetch(request).then((response) => {
+          if (response && response.status === 200) {
+            event.waitUntil(putImageResponse(cache, request, response.clone()));
+          }
+          return response;
+        }))
+      )
+    );
+    return;
+  }
+
+  // HTML страницы: "Network First" с откатом на кэш публичных страниц при отсутствии сети
+  if (request.mode === 'navigate') {
+    event.respondWith(
+      fetch(request)
+        .then((response) => {
+          if (isCacheablePage(url, response)) {
+            const copy = response.clone();
+            event.waitUntil(caches.open(PAGES_CACHE).then((cache) => putLimited(cache, request, copy, PAGE_CACHE_MAX_ENTRIES)));
+          }
+          return response;
+        })
+        .catch(() => caches.open(PAGES_CACHE).then((cache) => cache.match(request)))
+    );
+  }
+});
+{% endautoescape %}